@@ -1,60 +1,180 @@
-from django.contrib import admin
-from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog
-
-
-# ============================================================
-# Admin configuration for Vehicle model
-# ============================================================
-@admin.register(Vehicle)
-class VehicleAdmin(admin.ModelAdmin):
-    list_display = ['vehicle_number', 'vehicle_type', 'capacity', 'status', 'created_at']
-    list_filter = ['vehicle_type', 'status']
-    search_fields = ['vehicle_number']
-    ordering = ['-created_at']
-
-
-# ============================================================
-# Admin configuration for Driver model
-# ============================================================
-@admin.register(Driver)
-class DriverAdmin(admin.ModelAdmin):
-    list_display = ['driver_name', 'phone', 'license_number', 'experience', 'is_available', 'created_at']
-    list_filter = ['is_available', 'experience']
-    search_fields = ['driver_name', 'license_number']
-    ordering = ['-created_at']
-
-
-# ============================================================
-# Admin configuration for Trip model
-# ============================================================
-@admin.register(Trip)
-class TripAdmin(admin.ModelAdmin):
-    list_display = ['id', 'vehicle', 'driver', 'start_location', 'end_location', 'distance', 'status', 'created_at']
-    list_filter = ['status', 'vehicle__vehicle_type']
-    search_fields = ['start_location', 'end_location', 'vehicle__vehicle_number', 'driver__driver_name']
-    ordering = ['-created_at']
-    raw_id_fields = ['vehicle', 'driver']
-
-
-# ============================================================
-# Admin configuration for FuelLog model
-# ============================================================
-@admin.register(FuelLog)
-class FuelLogAdmin(admin.ModelAdmin):
-    list_display = ['vehicle', 'date', 'fuel_quantity', 'cost', 'created_at']
-    list_filter = ['date', 'vehicle__vehicle_type']
-    search_fields = ['vehicle__vehicle_number']
-    ordering = ['-date', '-created_at']
-    raw_id_fields = ['vehicle']
-
-
-# ============================================================
-# Admin configuration for MaintenanceLog model
-# ============================================================
-@admin.register(MaintenanceLog)
-class MaintenanceLogAdmin(admin.ModelAdmin):
-    list_display = ['vehicle', 'maintenance_type', 'date', 'cost', 'next_due_date', 'created_at']
-    list_filter = ['maintenance_type', 'date', 'vehicle__vehicle_type']
-    search_fields = ['vehicle__vehicle_number', 'description']
-    ordering = ['-date', '-created_at']
-    raw_id_fields = ['vehicle']
+import datetime
+
+from django.contrib import admin
+from django.db.models import Q
+from django.utils import timezone
+
+from .autocomplete import prefix_filter
+from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog
+from .pagination import EstimatedCountPaginator
+from .search import search_filter
+
+
+# ============================================================
+# Shared configuration for large tables
+# ============================================================
+# Every changelist query is bounded so it stays fast however big the
+# tables get:
+#   * page counts come from EstimatedCountPaginator, and the separate
+#     unfiltered "N total" count is not run,
+#   * filter facets (per-choice counts) are never computed,
+#   * filters offer fixed choices, so building them reads nothing,
+#   * search goes through indexes only: prefix ranges on the search
+#     keys of numbers, names and licences (the same ones the autocomplete
+#     endpoint uses) and the FTS5 index for free text,
+#   * vehicle and driver pickers use admin autocomplete, which searches
+#     the same way and pages its results.
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin whose changelist, search and pickers never scan a table.
+
+    ``search_fields`` only documents what the search box matches; the
+    matching itself is declared by:
+      * prefix_search_fields: own SearchKeyFields,
+      * related_search_fields: {foreign key: prefix fields of its model},
+      * search_index: name of a SEARCH_INDEXES full-text index.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    prefix_search_fields = []
+    related_search_fields = {}
+    search_index = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        condition = prefix_filter(self.prefix_search_fields, search_term)
+        for relation, fields in self.related_search_fields.items():
+            related = self.model._meta.get_field(relation).related_model
+            matches = related.objects.filter(prefix_filter(fields, search_term)).values('pk')
+            condition |= Q(**{f'{relation}__in': matches})
+        if self.search_index:
+            text_condition = search_filter(self.search_index, search_term)
+            if text_condition is not None:
+                condition |= text_condition
+        return queryset.filter(condition), False
+
+
+class RecentDateListFilter(admin.DateFieldListFilter):
+    """
+    Django's date filter (today, past 7 days, this month, this year) plus
+    each of the previous RECENT_MONTHS months and RECENT_YEARS years.
+    Every choice is a range on the indexed date column, and the choices
+    are worked out from today's date instead of scanning the table the
+    way date_hierarchy does.
+    """
+    RECENT_MONTHS = 12
+    RECENT_YEARS = 2
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        today = timezone.localdate()
+        month = today.replace(day=1)
+        links = []
+        for _ in range(self.RECENT_MONTHS):
+            previous = (month - datetime.timedelta(days=1)).replace(day=1)
+            links.append((previous.strftime('%B %Y'), {
+                self.lookup_kwarg_since: previous,
+                self.lookup_kwarg_until: month,
+            }))
+            month = previous
+        year = today.year
+        for offset in range(1, self.RECENT_YEARS + 1):
+            links.append((str(year - offset), {
+                self.lookup_kwarg_since: datetime.date(year - offset, 1, 1),
+                self.lookup_kwarg_until: datetime.date(year - offset + 1, 1, 1),
+            }))
+        self.links = tuple(self.links) + tuple(links)
+
+
+class ExperienceListFilter(admin.SimpleListFilter):
+    """
+    Years of experience in fixed bands, instead of one choice per
+    distinct value read from the table.
+    """
+    title = 'experience'
+    parameter_name = 'experience_band'
+    BANDS = {
+        '0-2': (0, 2),
+        '3-5': (3, 5),
+        '6-10': (6, 10),
+        '11+': (11, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(band, f'{band} years') for band in self.BANDS]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.BANDS:
+            return queryset
+        low, high = self.BANDS[self.value()]
+        queryset = queryset.filter(experience__gte=low)
+        return queryset if high is None else queryset.filter(experience__lte=high)
+
+
+# ============================================================
+# Admin configuration for Vehicle model
+# ============================================================
+@admin.register(Vehicle)
+class VehicleAdmin(LargeTableAdmin):
+    list_display = ['vehicle_number', 'vehicle_type', 'capacity', 'status', 'created_at']
+    list_filter = ['vehicle_type', 'status']
+    search_fields = ['vehicle_number']
+    prefix_search_fields = ['vehicle_number_key']
+    ordering = ['-created_at']
+
+
+# ============================================================
+# Admin configuration for Driver model
+# ============================================================
+@admin.register(Driver)
+class DriverAdmin(LargeTableAdmin):
+    list_display = ['driver_name', 'phone', 'license_number', 'experience', 'is_available', 'created_at']
+    list_filter = ['is_available', ExperienceListFilter]
+    search_fields = ['driver_name', 'license_number']
+    prefix_search_fields = ['driver_name_key', 'license_number_key']
+    ordering = ['-created_at']
+    autocomplete_fields = ['assigned_vehicle']
+
+
+# ============================================================
+# Admin configuration for Trip model
+# ============================================================
+@admin.register(Trip)
+class TripAdmin(LargeTableAdmin):
+    list_display = ['id', 'vehicle', 'driver', 'start_location', 'end_location', 'distance', 'status', 'created_at']
+    list_filter = ['status', 'vehicle__vehicle_type']
+    search_fields = ['start_location', 'end_location', 'notes', 'vehicle__vehicle_number', 'driver__driver_name']
+    related_search_fields = {'vehicle': ['vehicle_number_key'], 'driver': ['driver_name_key', 'license_number_key']}
+    search_index = 'trips'
+    ordering = ['-created_at']
+    autocomplete_fields = ['vehicle', 'driver']
+
+
+# ============================================================
+# Admin configuration for FuelLog model
+# ============================================================
+@admin.register(FuelLog)
+class FuelLogAdmin(LargeTableAdmin):
+    list_display = ['vehicle', 'date', 'fuel_quantity', 'cost', 'created_at']
+    list_filter = [('date', RecentDateListFilter), 'vehicle__vehicle_type']
+    search_fields = ['vehicle__vehicle_number']
+    related_search_fields = {'vehicle': ['vehicle_number_key']}
+    ordering = ['-date', '-created_at']
+    autocomplete_fields = ['vehicle']
+
+
+# ============================================================
+# Admin configuration for MaintenanceLog model
+# ============================================================
+@admin.register(MaintenanceLog)
+class MaintenanceLogAdmin(LargeTableAdmin):
+    list_display = ['vehicle', 'maintenance_type', 'date', 'cost', 'next_due_date', 'created_at']
+    list_filter = ['maintenance_type', ('date', RecentDateListFilter), 'vehicle__vehicle_type']
+    search_fields = ['vehicle__vehicle_number', 'description']
+    related_search_fields = {'vehicle': ['vehicle_number_key']}
+    search_index = 'maintenance'
+    ordering = ['-date', '-created_at']
+    autocomplete_fields = ['vehicle']
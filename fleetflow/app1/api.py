@@ -0,0 +1,121 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.core.exceptions import ValidationError
+
+from .cache import get_versions
+from .routers import replica_snapshot
+from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog
+
+
+# ============================================================
+# READ-ONLY JSON API
+# ============================================================
+# Each resource lists the fields it serialises and the query parameters
+# it can be filtered by ({param: lookup}).
+
+MAX_PAGE_SIZE = 200
+
+RESOURCES = {
+    'vehicles': {
+        'model': Vehicle,
+        'fields': ['id', 'vehicle_number', 'vehicle_type', 'capacity', 'purchase_date', 'status', 'created_at', 'updated_at'],
+        'filters': {
+            'status': 'status',
+            'vehicle_type': 'vehicle_type',
+            'updated_since': 'updated_at__gte',
+        },
+    },
+    'drivers': {
+        'model': Driver,
+        'fields': ['id', 'driver_name', 'phone', 'license_number', 'experience', 'assigned_vehicle', 'is_available', 'created_at', 'updated_at'],
+        'filters': {
+            'is_available': 'is_available',
+            'vehicle': 'assigned_vehicle',
+            'updated_since': 'updated_at__gte',
+        },
+    },
+    'trips': {
+        'model': Trip,
+        'fields': ['id', 'vehicle', 'driver', 'start_location', 'end_location', 'distance', 'status', 'start_date', 'end_date', 'notes', 'created_at', 'updated_at'],
+        'filters': {
+            'status': 'status',
+            'vehicle': 'vehicle',
+            'driver': 'driver',
+            'updated_since': 'updated_at__gte',
+        },
+    },
+    'fuel_logs': {
+        'model': FuelLog,
+        'fields': ['id', 'vehicle', 'date', 'fuel_quantity', 'cost', 'odometer_reading', 'created_at', 'updated_at'],
+        'filters': {
+            'vehicle': 'vehicle',
+            'start_date': 'date__gte',
+            'end_date': 'date__lte',
+            'updated_since': 'updated_at__gte',
+        },
+    },
+    'maintenance_logs': {
+        'model': MaintenanceLog,
+        'fields': ['id', 'vehicle', 'maintenance_type', 'date', 'cost', 'description', 'next_due_date', 'created_at', 'updated_at'],
+        'filters': {
+            'vehicle': 'vehicle',
+            'maintenance_type': 'maintenance_type',
+            'start_date': 'date__gte',
+            'end_date': 'date__lte',
+            'updated_since': 'updated_at__gte',
+        },
+    },
+}
+
+
+def filter_queryset(name, params):
+    """
+    The resource's queryset filtered by the recognised query parameters.
+    Raises ValidationError naming the parameter when a value is invalid.
+    """
+    resource = RESOURCES[name]
+    model = resource['model']
+    queryset = model.objects.all()
+    for param, lookup in resource['filters'].items():
+        value = params.get(param)
+        if value in (None, ''):
+            continue
+        field = model._meta.get_field(lookup.split('__')[0])
+        target = field.target_field if field.is_relation else field
+        if target.get_internal_type() == 'BooleanField':
+            value = {'true': True, 'false': False}.get(value.lower(), value)
+        try:
+            value = target.to_python(value)
+        except ValidationError as exc:
+            raise ValidationError({param: exc.messages})
+        queryset = queryset.filter(**{lookup: value})
+    return queryset
+
+
+def list_etag(name, path, params):
+    """
+    ETag of a response built from one resource, computed without
+    querying the table: the model's cache version (bumped by every save,
+    delete, bulk import and bulk transition), the replica snapshot the
+    rows are read from (the version counts primary writes the replica
+    may not have yet), the URL path and the request's parameters
+    (filters, cursor, limit) in a stable order.
+    """
+    model = RESOURCES[name]['model']
+    version = get_versions([model])[0]
+    snapshot = replica_snapshot()
+    query = urlencode(sorted((key, value) for key, values in params.lists() for value in values))
+    raw = f"{name}|{version}|{snapshot.isoformat() if snapshot else ''}|{path}|{query}"
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def serialize(name, obj):
+    """
+    One row as a dict; foreign keys are given by id.
+    """
+    data = {}
+    for field_name in RESOURCES[name]['fields']:
+        field = obj._meta.get_field(field_name)
+        data[field.attname if field.is_relation else field_name] = field.value_from_object(obj)
+    return data
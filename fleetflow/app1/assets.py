@@ -0,0 +1,339 @@
+import gzip
+import json
+import mimetypes
+import os
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+# ============================================================
+# CSS PURGING
+# ============================================================
+# Vendor stylesheets are trimmed to the rules FleetFlow can match: a
+# selector is kept when every class it requires appears as a word in
+# the templates, scripts or Python code.  Rules without classes
+# (elements, :root variables) and @font-face/@keyframes are always
+# kept, and "/*!" licence comments are preserved.
+
+WORD_RE = re.compile(r'[A-Za-z0-9_-]+')
+# "alert-{{ message.tags }}" keeps every alert-* class
+DYNAMIC_PREFIX_RE = re.compile(r'([A-Za-z][\w-]*-)\{\{')
+CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+IGNORED_IN_SELECTOR_RE = re.compile(r':not\([^()]*\)|\[[^\]]*\]')
+GROUPING_AT_RULES = {'media', 'supports', 'container', 'layer'}
+
+
+def used_words(paths):
+    """
+    (words, prefixes) found in the given files: every identifier-like
+    word, and the prefixes of classes completed by a template variable.
+    """
+    words, prefixes = set(), set()
+    for path in paths:
+        with open(path, encoding='utf-8') as handle:
+            text = handle.read()
+        words.update(WORD_RE.findall(text))
+        prefixes.update(DYNAMIC_PREFIX_RE.findall(text))
+    return words, tuple(sorted(prefixes))
+
+
+def _skip_string(css, i):
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+
+def _rules(css):
+    """
+    Yield (prelude, body) for each top-level rule of ``css``; ``body`` is
+    None for statements such as @charset and for kept comments.
+    """
+    i, n = 0, len(css)
+    while i < n:
+        if css[i].isspace():
+            i += 1
+            continue
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            if css.startswith('/*!', i):
+                yield css[i:end], None
+            i = end
+            continue
+
+        start = j = i
+        while j < n and css[j] not in '{;':
+            j = _skip_string(css, j) if css[j] in '"\'' else j + 1
+        if j >= n:
+            return
+        if css[j] == ';':
+            yield css[start:j + 1].strip(), None
+            i = j + 1
+            continue
+
+        depth, k = 1, j + 1
+        while k < n and depth:
+            if css[k] in '"\'':
+                k = _skip_string(css, k)
+                continue
+            if css[k] == '{':
+                depth += 1
+            elif css[k] == '}':
+                depth -= 1
+            k += 1
+        yield css[start:j].strip(), css[j + 1:k - 1]
+        i = k
+
+
+def _split_selectors(prelude):
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and not depth:
+            parts.append(prelude[start:i].strip())
+            start = i + 1
+    parts.append(prelude[start:].strip())
+    return parts
+
+
+def _selector_used(selector, words, prefixes):
+    classes = CLASS_RE.findall(IGNORED_IN_SELECTOR_RE.sub('', selector))
+    return all(name in words or name.startswith(prefixes) for name in classes)
+
+
+def purge_css(css, words, prefixes=()):
+    """
+    ``css`` without the rules none of ``words``/``prefixes`` can match.
+    """
+    out = []
+    for prelude, body in _rules(css):
+        if body is None:
+            out.append(prelude)
+        elif prelude.startswith('@'):
+            name = re.match(r'@([\w-]+)', prelude).group(1).lower()
+            if name in GROUPING_AT_RULES:
+                inner = purge_css(body, words, prefixes)
+                if inner:
+                    out.append(f'{prelude}{{{inner}}}')
+            else:
+                out.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [s for s in _split_selectors(prelude) if _selector_used(s, words, prefixes)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{body}}}")
+    return ''.join(out)
+
+
+# ============================================================
+# HASHED, PRE-COMPRESSED STATIC FILES
+# ============================================================
+# collectstatic writes every file under a content-hashed name (so it can
+# be cached forever) and, for text assets, .gz and .br siblings that the
+# middleware below or a front-end server can send as they are.
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.map', '.json', '.txt', '.html', '.ttf', '.eot'}
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+DEFAULT_MAX_AGE = 60
+
+
+def compress_file(path):
+    """
+    Write gzip (and, when the brotli package is installed, brotli)
+    versions of ``path`` next to it, keeping only those that are smaller.
+    """
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, 'wb') as handle:
+                handle.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also pre-compresses text assets.
+
+    Until collectstatic has written the manifest, names are used as they
+    are instead of raising "Missing staticfiles manifest entry", so a
+    deploy that skipped collectstatic still renders its pages.
+    """
+    manifest_found = False
+
+    def read_manifest(self):
+        content = super().read_manifest()
+        self.manifest_found = content is not None
+        return content
+
+    def save_manifest(self):
+        super().save_manifest()
+        self.manifest_found = True
+
+    def stored_name(self, name):
+        if not self.manifest_found:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS and self.exists(name):
+                compress_file(self.path(name))
+
+
+# ============================================================
+# STATIC FILE MIDDLEWARE
+# ============================================================
+# Serves the collected files from STATIC_ROOT when Django itself faces
+# clients (single-box depot installs).  Hashed names are sent with a
+# one-year immutable Cache-Control so browsers never re-request them;
+# the smallest variant the client accepts (br, gzip, identity) is sent.
+# In DEBUG the staticfiles runserver handler serves files instead.
+
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        name, _, value = params.strip().partition('=')
+        try:
+            quality = float(value) if name.strip() == 'q' else 1.0
+        except ValueError:
+            quality = 1.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticAsset:
+    """
+    One collected file and its pre-compressed variants.
+    """
+    def __init__(self, path, immutable):
+        self.path = path
+        self.immutable = immutable
+        stat = os.stat(path)
+        self.mtime = int(stat.st_mtime)
+        self.size = stat.st_size
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type in ('application/javascript', 'image/svg+xml'):
+            self.content_type += '; charset=utf-8'
+        self.variants = [(coding, path + suffix) for coding, suffix in ENCODINGS if os.path.exists(path + suffix)]
+        self._content = {}
+
+    def choose(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding) if self.variants else ()
+        for coding, path in self.variants:
+            if coding in accepted:
+                return coding, path
+        return None, self.path
+
+    def read(self, path):
+        # Files never change under a running server, so keep them in memory
+        if path not in self._content:
+            with open(path, 'rb') as handle:
+                self._content[path] = handle.read()
+        return self._content[path]
+
+
+def build_index(root, static_url):
+    """
+    {url path: StaticAsset} for every collected file under ``root``.
+    """
+    manifest_path = os.path.join(root, ManifestStaticFilesStorage.manifest_name)
+    hashed = set()
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as handle:
+            hashed = set(json.load(handle).get('paths', {}).values())
+
+    index = {}
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if filename.endswith(('.gz', '.br')) and os.path.exists(os.path.join(directory, filename[:-3])):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            index[static_url + name] = StaticAsset(path, immutable=name in hashed)
+    return index
+
+
+class StaticAssetMiddleware:
+    """
+    Answers requests for collected static files before any other
+    middleware runs.  Not used in DEBUG, when STATIC_ROOT has not been
+    collected, or when STATIC_URL points at another host.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        root = getattr(settings, 'STATIC_ROOT', None)
+        static_url = settings.STATIC_URL or ''
+        if settings.DEBUG or not root or not os.path.isdir(root) or not static_url.startswith('/'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.index = build_index(str(root), static_url)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.serve(request)
+        return self.get_response(request) if response is None else response
+
+    async def __acall__(self, request):
+        response = self.serve(request)
+        return await self.get_response(request) if response is None else response
+
+    def serve(self, request):
+        asset = self.index.get(request.path_info) if request.method in ('GET', 'HEAD') else None
+        if asset is None:
+            return None
+
+        coding, path = asset.choose(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        etag = f'"{asset.size:x}-{asset.mtime:x}{"-" + coding if coding else ""}"'
+        response = get_conditional_response(request, etag=etag, last_modified=asset.mtime)
+        if response is None:
+            content = asset.read(path)
+            response = HttpResponse(b'' if request.method == 'HEAD' else content, content_type=asset.content_type)
+            response.headers['Content-Length'] = len(content)
+            if coding:
+                response.headers['Content-Encoding'] = coding
+
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(asset.mtime)
+        # Browsers must not reinterpret a file as another type (e.g. script)
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+        if asset.immutable:
+            response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response.headers['Cache-Control'] = f'public, max-age={DEFAULT_MAX_AGE}'
+        if asset.variants:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        return response
@@ -0,0 +1,91 @@
+from django.db.models import Q
+
+from .models import Vehicle, Driver, normalize_search_key
+
+
+# ============================================================
+# AUTOCOMPLETE
+# ============================================================
+# Case-insensitive prefix search for the vehicle and driver pickers.
+# Each searched field has an indexed SearchKeyField copy upper-cased in
+# Python (SQLite's UPPER() only folds ASCII, so "mü" would never match
+# "Müller"), and a prefix becomes the range key >= 'ABC' AND
+# key < 'ABC\U0010ffff', so a page is read straight from the index in
+# order.  (A LIKE 'abc%' filter cannot use an index on SQLite unless
+# the column is NOCASE.)
+#
+# Sources searching several fields read one ordered page from each index
+# and merge them, so the cost depends on the page, not the table size.
+# Later pages read every row before them, so paging stops at MAX_PAGE;
+# a picker user types more of the term long before that.
+
+AUTOCOMPLETE_SOURCES = {
+    'vehicles': {
+        'model': Vehicle,
+        'fields': ['vehicle_number_key'],
+    },
+    'drivers': {
+        'model': Driver,
+        'fields': ['driver_name_key', 'license_number_key'],
+    },
+}
+
+PAGE_SIZE = 20
+MAX_PAGE = 50
+MAX_TERM_LENGTH = 100
+# Sorts after every character, so it closes the prefix range
+PREFIX_END = '\U0010ffff'
+
+
+def normalize_term(term):
+    return normalize_search_key((term or '').strip()[:MAX_TERM_LENGTH])
+
+
+def prefix_filter(fields, term):
+    """
+    Q matching rows where any of the search key ``fields`` starts with
+    ``term`` (any case), written as ranges on their indexes.
+    """
+    prefix = normalize_term(term)
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + PREFIX_END})
+    return condition
+
+
+def _prefix_matches(model, field, prefix, limit):
+    """
+    Up to ``limit`` (key, pk) pairs whose search key ``field`` starts
+    with ``prefix`` (already normalized), in index order.
+    """
+    return list(
+        model.objects.filter(**{f'{field}__gte': prefix, f'{field}__lt': prefix + PREFIX_END})
+        .order_by(field, 'pk')
+        .values_list(field, 'pk')[:limit]
+    )
+
+
+def autocomplete(source, term, page=1, page_size=PAGE_SIZE):
+    """
+    One page of ``source`` objects with a searched field starting with
+    ``term`` (any case), best key first, as (objects, has_more).  There
+    is no more after MAX_PAGE.
+    """
+    if page > MAX_PAGE:
+        return [], False
+    spec = AUTOCOMPLETE_SOURCES[source]
+    model = spec['model']
+    prefix = normalize_term(term)
+    end = page * page_size
+
+    # A row matching several fields is listed under its smallest key
+    best = {}
+    for field in spec['fields']:
+        for key, pk in _prefix_matches(model, field, prefix, end + 1):
+            if pk not in best or key < best[pk]:
+                best[pk] = key
+    ranked = sorted(best, key=lambda pk: (best[pk], pk))
+    page_ids = ranked[end - page_size:end]
+
+    objects = model.objects.in_bulk(page_ids)
+    return [objects[pk] for pk in page_ids if pk in objects], len(ranked) > end and page < MAX_PAGE
@@ -0,0 +1,125 @@
+from collections import defaultdict
+
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Vehicle, Driver, Trip
+
+
+# ============================================================
+# AVAILABILITY
+# ============================================================
+# A trip books its driver and vehicle from start_date until end_date;
+# a started trip without an end_date books them until it ends.  Trips
+# without a start_date (unscheduled) and cancelled trips book nothing.
+# Two windows overlap when each starts before the other ends, so ending
+# at 10:00 and starting at 10:00 is not a clash.
+#
+# The (driver, end_date, start_date) and (vehicle, end_date, start_date)
+# indexes answer "is this driver booked between T1 and T2" with two
+# range reads: trips ending after T1 and starting before T2, and
+# unfinished trips starting before T2.  Each term below is kept whole
+# (never "end_date > T1 OR end_date IS NULL") so SQLite can match it to
+# the index; the cost depends on the driver's trips after T1, not on
+# their history.  The fleet-wide questions run that probe once per
+# driver or vehicle inside a single query.
+#
+# Bulk paths (CSV import, starting many trips) load the bookings of all
+# the drivers and vehicles involved once into a BookingCalendar and
+# check each trip in memory, adding it as it is accepted so the trips
+# of one batch cannot clash with each other either.
+
+
+def booking_terms(start, end=None):
+    """
+    [ended-after-start, still-running] conditions, which together select
+    the trips overlapping [start, end); ``end`` None means open-ended.
+    """
+    starts = Q(start_date__lt=end) if end is not None else Q(start_date__isnull=False)
+    return [Q(end_date__gt=start) & starts, Q(end_date__isnull=True) & starts]
+
+
+def conflicting_trips(start, end=None, driver=None, vehicle=None, exclude=None):
+    """
+    Trips of ``driver`` or ``vehicle`` overlapping [start, end), other
+    than the trip with pk ``exclude``.
+    """
+    owners = []
+    if driver is not None:
+        owners.append(Q(driver=driver))
+    if vehicle is not None:
+        owners.append(Q(vehicle=vehicle))
+    terms = [owner & term for owner in owners for term in booking_terms(start, end)]
+    if not terms:
+        return Trip.objects.none()
+    trips = Trip.objects.exclude(status='cancelled').filter(Q(*terms, _connector=Q.OR))
+    return trips.exclude(pk=exclude) if exclude is not None else trips
+
+
+def overlaps(start, end, other_start, other_end):
+    """
+    Whether [start, end) and [other_start, other_end) overlap; an end of
+    None is open.
+    """
+    return (other_end is None or start < other_end) and (end is None or other_start < end)
+
+
+class BookingCalendar:
+    """
+    Bookings of some drivers and vehicles from ``start`` on, read with one
+    query.  Trips in ``exclude`` (the ones being checked) are left out.
+    """
+    def __init__(self, start, drivers=(), vehicles=(), exclude=()):
+        self.bookings = defaultdict(list)
+        terms = [
+            owner & term
+            for owner in (Q(driver__in=set(drivers)), Q(vehicle__in=set(vehicles)))
+            for term in booking_terms(start)
+        ]
+        trips = (
+            Trip.objects.exclude(status='cancelled').exclude(pk__in=exclude)
+            .filter(Q(*terms, _connector=Q.OR)).order_by()
+            .values_list('pk', 'driver_id', 'vehicle_id', 'start_date', 'end_date')
+        )
+        for pk, driver_id, vehicle_id, start_date, end_date in trips:
+            self.add(f"trip #{pk}", driver_id, vehicle_id, start_date, end_date)
+
+    def add(self, label, driver_id, vehicle_id, start, end):
+        """
+        Book the driver and vehicle for [start, end) under ``label``.
+        """
+        for owner in (('driver', driver_id), ('vehicle', vehicle_id)):
+            self.bookings[owner].append((start, end, label))
+
+    def clashes(self, driver_id, vehicle_id, start, end):
+        """
+        {'driver'/'vehicle': label of the booking it clashes with} for
+        [start, end); empty when both are free.
+        """
+        found = {}
+        for owner in (('driver', driver_id), ('vehicle', vehicle_id)):
+            for other_start, other_end, label in self.bookings[owner]:
+                if overlaps(start, end, other_start, other_end):
+                    found[owner[0]] = label
+                    break
+        return found
+
+
+def _free(queryset, relation, start, end):
+    booked = Trip.objects.exclude(status='cancelled').filter(**{relation: OuterRef('pk')})
+    for term in booking_terms(start, end):
+        queryset = queryset.exclude(Exists(booked.filter(term)))
+    return queryset
+
+
+def free_drivers(start, end=None):
+    """
+    Drivers marked available with no trip overlapping [start, end).
+    """
+    return _free(Driver.objects.filter(is_available=True), 'driver', start, end)
+
+
+def free_vehicles(start, end=None):
+    """
+    Active vehicles with no trip overlapping [start, end).
+    """
+    return _free(Vehicle.objects.filter(status='active'), 'vehicle', start, end)
@@ -0,0 +1,221 @@
+import hashlib
+import time
+from operator import attrgetter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .routers import max_lag_seconds, reads_from_replica
+
+
+# ============================================================
+# VERSIONED PAGE-CONTEXT CACHE
+# ============================================================
+# Every cached context is stored under a key that embeds the current
+# version number of each model it was built from.  Saving or deleting
+# one of those models bumps its version, so later lookups miss and the
+# context is rebuilt; stale entries simply expire.
+#
+# A context built on the replica may predate writes that the versions
+# already count, so it is kept only for the replica lag allowance.
+
+KEY_PREFIX = 'fleetflow'
+STATS_KEYS = {
+    'hits': f'{KEY_PREFIX}:stats:hits',
+    'misses': f'{KEY_PREFIX}:stats:misses',
+    'row_hits': f'{KEY_PREFIX}:stats:row_hits',
+    'row_misses': f'{KEY_PREFIX}:stats:row_misses',
+}
+
+
+def get_cache():
+    return caches[getattr(settings, 'FLEETFLOW_CACHE_ALIAS', 'default')]
+
+
+def _version_key(model):
+    return f'{KEY_PREFIX}:version:{model._meta.label_lower}'
+
+
+def _initial_version():
+    # Start from the clock rather than 1, so a cache that was cleared or
+    # restarted never hands out a version (and API ETag) seen before
+    return time.time_ns() // 1000
+
+
+def get_versions(models):
+    """
+    Current version number of each model, in the order given.
+    """
+    cache = get_cache()
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add() keeps whatever another process may have stored first
+            initial = _initial_version()
+            cache.add(key, initial, timeout=None)
+            versions[key] = cache.get(key, initial)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    """
+    Invalidate every cached context that depends on this model.
+    """
+    cache = get_cache()
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+
+
+def bump_version_on_commit(model):
+    """
+    Bump now, and again once the surrounding transaction commits, so a
+    request that read the old rows mid-transaction cannot leave them
+    cached under the new version.
+    """
+    bump_version(model)
+    transaction.on_commit(lambda: bump_version(model))
+
+
+def _count(name, delta=1):
+    cache = get_cache()
+    key = STATS_KEYS[name]
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, delta, timeout=None)
+
+
+def _context_key(name, models, extra):
+    versions = '.'.join(str(version) for version in get_versions(models))
+    key = f'{KEY_PREFIX}:context:{name}:{versions}'
+    if extra is not None:
+        key = f'{key}:{extra}'
+    return key
+
+
+def _timeout(timeout):
+    if timeout is None:
+        timeout = getattr(settings, 'FLEETFLOW_CACHE_TIMEOUT', 300)
+    if reads_from_replica():
+        timeout = min(timeout, max_lag_seconds())
+    return timeout
+
+
+def cached_context(name, models, builder, extra=None, timeout=None):
+    """
+    Return the context built by ``builder()``, cached until one of
+    ``models`` changes.  ``extra`` is mixed into the key for inputs
+    that are not model data (e.g. today's date).
+    """
+    cache = get_cache()
+    key = _context_key(name, models, extra)
+
+    context = cache.get(key)
+    if context is not None:
+        _count('hits')
+        return context
+
+    _count('misses')
+    context = builder()
+    cache.set(key, context, _timeout(timeout))
+    return context
+
+
+async def acached_context(name, models, builder, extra=None, timeout=None):
+    """
+    cached_context() for async views; ``builder`` is awaited.
+    """
+    cache = get_cache()
+    key = await sync_to_async(_context_key)(name, models, extra)
+
+    context = await cache.aget(key)
+    if context is not None:
+        await sync_to_async(_count)('hits')
+        return context
+
+    await sync_to_async(_count)('misses')
+    context = await builder()
+    await cache.aset(key, context, _timeout(timeout))
+    return context
+
+
+# ============================================================
+# ROW FRAGMENT CACHE
+# ============================================================
+# List pages render each table row from its own small template.  A row's
+# HTML is cached under the object's pk plus the attributes it shows that
+# can change (its updated_at, the updated_at of the related rows it
+# displays, date-dependent flags), so an edit simply misses the old key.
+# All rows of a page are fetched with one get_many(); only the misses
+# are rendered and stored back with one set_many().
+
+ROW_FRAGMENTS = {
+    'trips': {
+        'template': 'trips/row.html',
+        'name': 'trip',
+        'key': ['updated_at', 'vehicle.updated_at', 'driver.updated_at'],
+    },
+    'fuel_logs': {
+        'template': 'fuel/row.html',
+        'name': 'fuel',
+        'key': ['updated_at', 'vehicle.updated_at'],
+    },
+    'maintenance_logs': {
+        'template': 'maintenance/row.html',
+        'name': 'maintenance',
+        'key': ['updated_at', 'vehicle.updated_at', 'is_due'],
+    },
+}
+
+
+def _row_key(name, digest, obj, getters):
+    values = '|'.join(str(getter(obj)) for getter in getters)
+    # Hashed so the key stays short and free of spaces (memcached)
+    return f'{KEY_PREFIX}:row:{name}:{digest}:{obj.pk}:{hashlib.md5(values.encode()).hexdigest()}'
+
+
+def render_rows(name, objects):
+    """
+    The rendered table row of each object, in order, reusing the cached
+    HTML of every row that has not changed.
+    """
+    spec = ROW_FRAGMENTS[name]
+    template = get_template(spec['template'])
+    # Editing the row template must not serve rows rendered by the old one
+    digest = hashlib.md5(template.template.source.encode()).hexdigest()[:8]
+    getters = [attrgetter(path) for path in spec['key']]
+    cache = get_cache()
+
+    objects = list(objects)
+    keys = [_row_key(name, digest, obj, getters) for obj in objects]
+    cached = cache.get_many(keys)
+
+    rendered = {}
+    for key, obj in zip(keys, objects):
+        if key not in cached:
+            rendered[key] = template.render({spec['name']: obj})
+    if rendered:
+        cache.set_many(rendered, getattr(settings, 'FLEETFLOW_FRAGMENT_TIMEOUT', 86400))
+    if keys:
+        _count('row_hits', len(keys) - len(rendered))
+        _count('row_misses', len(rendered))
+    return [mark_safe(cached[key] if key in cached else rendered[key]) for key in keys]
+
+
+def cache_stats():
+    """
+    Hit/miss totals for monitoring.
+    """
+    values = get_cache().get_many(list(STATS_KEYS.values()))
+    stats = {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    return stats
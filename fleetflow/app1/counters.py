@@ -0,0 +1,133 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog, FleetCounter
+from .stats import vehicle_stats, driver_stats, trip_stats, fuel_stats, maintenance_stats
+
+
+# ============================================================
+# DASHBOARD COUNTERS
+# ============================================================
+
+COUNTER_NAMES = [
+    'total_vehicles',
+    'active_vehicles',
+    'total_drivers',
+    'available_drivers',
+    'total_trips',
+    'completed_trips',
+    'total_fuel_cost',
+    'total_maintenance_cost',
+]
+
+# Counters holding money; every other counter is a whole-number count.
+AMOUNT_COUNTERS = {'total_fuel_cost', 'total_maintenance_cost'}
+
+
+def _decimal(value):
+    return Decimal(str(value or 0))
+
+
+def contributions(instance):
+    """
+    Return how much a single saved object adds to each counter.
+    """
+    if isinstance(instance, Vehicle):
+        return {
+            'total_vehicles': 1,
+            'active_vehicles': 1 if instance.status == 'active' else 0,
+        }
+    if isinstance(instance, Driver):
+        return {
+            'total_drivers': 1,
+            'available_drivers': 1 if instance.is_available else 0,
+        }
+    if isinstance(instance, Trip):
+        return {
+            'total_trips': 1,
+            'completed_trips': 1 if instance.status == 'completed' else 0,
+        }
+    if isinstance(instance, FuelLog):
+        return {'total_fuel_cost': _decimal(instance.cost)}
+    if isinstance(instance, MaintenanceLog):
+        return {'total_maintenance_cost': _decimal(instance.cost)}
+    return {}
+
+
+def diff(old, new):
+    """
+    Per-counter difference between two contributions() results.
+    """
+    names = set(old) | set(new)
+    return {name: new.get(name, 0) - old.get(name, 0) for name in names}
+
+
+def apply_deltas(deltas):
+    """
+    Add the given deltas to their counters in one transaction.
+
+    If a counter row is missing the whole table is rebuilt from source
+    instead, so the counters never start from a wrong baseline.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        for name, delta in deltas.items():
+            updated = FleetCounter.objects.filter(name=name).update(
+                value=F('value') + delta, updated_at=now
+            )
+            if not updated:
+                rebuild_counters()
+                return
+
+
+def compute_counters():
+    """
+    Recompute every counter from the source tables.
+    """
+    vehicles = vehicle_stats()
+    drivers = driver_stats()
+    trips = trip_stats()
+    return {
+        'total_vehicles': vehicles['total'],
+        'active_vehicles': vehicles['active'],
+        'total_drivers': drivers['total'],
+        'available_drivers': drivers['available'],
+        'total_trips': trips['total'],
+        'completed_trips': trips['completed'],
+        'total_fuel_cost': fuel_stats()['total_cost'],
+        'total_maintenance_cost': maintenance_stats()['total_cost'],
+    }
+
+
+def rebuild_counters():
+    """
+    Overwrite the counter table with freshly computed values.
+    Returns a dict of {name: (old_value, new_value)}.
+    """
+    with transaction.atomic():
+        values = compute_counters()
+        old = dict(FleetCounter.objects.select_for_update().values_list('name', 'value'))
+        changes = {}
+        for name, value in values.items():
+            FleetCounter.objects.update_or_create(name=name, defaults={'value': value})
+            changes[name] = (old.get(name), _decimal(value))
+    return changes
+
+
+def get_counters():
+    """
+    Read all counters with a single query.
+    Missing rows (e.g. before the first rebuild) read as zero.
+    """
+    values = dict(FleetCounter.objects.values_list('name', 'value'))
+    counters = {}
+    for name in COUNTER_NAMES:
+        value = values.get(name, 0)
+        counters[name] = value if name in AMOUNT_COUNTERS else int(value)
+    return counters
@@ -0,0 +1,188 @@
+import numpy as np
+from django.db import connections, transaction
+from django.db.models import FloatField, Sum
+from django.db.models.functions import Cast
+
+from .models import FuelLog, VehicleEfficiency
+
+
+# ============================================================
+# FUEL EFFICIENCY
+# ============================================================
+# Efficiency is measured fill-up to fill-up: the fuel bought at a fill
+# covers the distance driven since the previous odometer reading of the
+# same vehicle.  A vehicle's whole history is loaded with one
+# values_list() query into float arrays and every figure is computed
+# with array operations, so the cost grows with the row count only.
+#
+# The figures are stored per vehicle in VehicleEfficiency: saving or
+# deleting a fuel log recomputes that vehicle's row from its own
+# history, and rebuild_efficiency() recomputes every row.  Reports and
+# the API read the small table, never the fuel history.
+
+ROLLING_WINDOW = 5
+
+HISTORY_DTYPE = np.dtype([
+    ('vehicle', np.int64),
+    ('odometer', np.float64),
+    ('quantity', np.float64),
+    ('cost', np.float64),
+])
+
+
+EFFICIENCY_FIELDS = [
+    'intervals', 'distance', 'fuel_quantity', 'fuel_cost',
+    'km_per_litre', 'cost_per_km', 'rolling_km_per_litre',
+]
+
+
+def load_fuel_history(vehicles=None):
+    """
+    (vehicle_ids, odometer, quantity, cost) arrays for every fuel log with
+    an odometer reading (of the given vehicle ids only, when passed),
+    grouped by vehicle and in date order within each.
+    """
+    queryset = FuelLog.objects.filter(odometer_reading__isnull=False)
+    if vehicles is not None:
+        queryset = queryset.filter(vehicle_id__in=vehicles)
+    # Exactly the reverse of fuellog_vehicle_date_idx, so the database
+    # walks the index backwards instead of sorting
+    rows = queryset.order_by('-vehicle_id', 'date', 'created_at').values_list(
+        'vehicle_id',
+        Cast('odometer_reading', FloatField()),
+        Cast('fuel_quantity', FloatField()),
+        Cast('cost', FloatField()),
+    )
+    # Rows go straight from the cursor into the array; the ORM's
+    # per-row handling would cost more than all the arithmetic below
+    sql, params = rows.query.sql_with_params()
+    with connections[rows.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        data = np.fromiter(cursor, dtype=HISTORY_DTYPE)
+    return data['vehicle'], data['odometer'], data['quantity'], data['cost']
+
+
+def compute_efficiency(vehicle_ids, odometer, quantity, cost, window=ROLLING_WINDOW):
+    """
+    Per-vehicle totals and ratios from the arrays returned by
+    load_fuel_history(), as {vehicle_id: {...}}.
+
+    An interval only counts when both readings belong to the same vehicle
+    and the odometer went forward; ``rolling_km_per_litre`` covers the
+    last ``window`` such intervals.
+    """
+    if len(vehicle_ids) < 2:
+        return {}
+
+    same_vehicle = vehicle_ids[1:] == vehicle_ids[:-1]
+    distance = odometer[1:] - odometer[:-1]
+    valid = same_vehicle & (distance > 0)
+
+    owner = vehicle_ids[1:][valid]
+    distance = distance[valid]
+    fuel = quantity[1:][valid]
+    spent = cost[1:][valid]
+    if not len(owner):
+        return {}
+
+    # owner is grouped by vehicle, so each group is one contiguous run
+    starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+    ends = np.r_[starts[1:], len(owner)]
+    total_distance = np.add.reduceat(distance, starts)
+    total_fuel = np.add.reduceat(fuel, starts)
+    total_cost = np.add.reduceat(spent, starts)
+
+    # Rolling window from cumulative sums: sum(x[a:b]) = c[b] - c[a]
+    distance_sums = np.r_[0.0, np.cumsum(distance)]
+    fuel_sums = np.r_[0.0, np.cumsum(fuel)]
+    window_starts = np.maximum(starts, ends - window)
+    rolling_distance = distance_sums[ends] - distance_sums[window_starts]
+    rolling_fuel = fuel_sums[ends] - fuel_sums[window_starts]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        km_per_litre = np.where(total_fuel > 0, total_distance / total_fuel, np.nan)
+        cost_per_km = total_cost / total_distance
+        rolling_km_per_litre = np.where(rolling_fuel > 0, rolling_distance / rolling_fuel, np.nan)
+
+    def figure(value):
+        return None if np.isnan(value) else round(float(value), 2)
+
+    return {
+        int(vehicle_id): {
+            'intervals': int(end - start),
+            'distance': round(float(total_distance[i]), 2),
+            'fuel_quantity': round(float(total_fuel[i]), 2),
+            'fuel_cost': round(float(total_cost[i]), 2),
+            'km_per_litre': figure(km_per_litre[i]),
+            'cost_per_km': figure(cost_per_km[i]),
+            'rolling_km_per_litre': figure(rolling_km_per_litre[i]),
+        }
+        for i, (vehicle_id, start, end) in enumerate(zip(owner[starts], starts, ends))
+    }
+
+
+def _store(figures):
+    VehicleEfficiency.objects.bulk_create(
+        [VehicleEfficiency(vehicle_id=vehicle_id, **values) for vehicle_id, values in figures.items()],
+        batch_size=1000, update_conflicts=True,
+        unique_fields=['vehicle'], update_fields=EFFICIENCY_FIELDS + ['updated_at'],
+    )
+
+
+def refresh_efficiency(vehicle_ids):
+    """
+    Recompute the stored efficiency of the given vehicles from their fuel
+    logs, removing rows of vehicles with nothing left to measure.
+    """
+    vehicle_ids = {vehicle_id for vehicle_id in vehicle_ids if vehicle_id is not None}
+    if not vehicle_ids:
+        return
+    figures = compute_efficiency(*load_fuel_history(vehicle_ids))
+    gone = vehicle_ids - set(figures)
+    if gone:
+        VehicleEfficiency.objects.filter(vehicle_id__in=gone).delete()
+    _store(figures)
+
+
+def rebuild_efficiency():
+    """
+    Recompute the efficiency of every vehicle; returns the rows stored.
+    """
+    figures = compute_efficiency(*load_fuel_history())
+    with transaction.atomic():
+        VehicleEfficiency.objects.all().delete()
+        _store(figures)
+    return len(figures)
+
+
+def fuel_efficiency(vehicle=None, limit=None):
+    """
+    Stored efficiency rows for one vehicle (or the whole fleet), worst
+    cost per km first and at most ``limit`` of them, plus fleet-wide
+    totals over every vehicle.
+    """
+    queryset = VehicleEfficiency.objects.order_by('-cost_per_km', 'vehicle_id')
+    if vehicle is not None:
+        queryset = queryset.filter(vehicle_id=vehicle)
+    rows = [
+        {'vehicle_id': vehicle_id, 'vehicle_number': vehicle_number, **dict(zip(EFFICIENCY_FIELDS, values))}
+        for vehicle_id, vehicle_number, *values in
+        queryset.values_list('vehicle_id', 'vehicle__vehicle_number', *EFFICIENCY_FIELDS)[:limit]
+    ]
+
+    if limit is not None and len(rows) == limit:
+        # Totals over the rows left out as well
+        totals = queryset.aggregate(distance=Sum('distance'), fuel=Sum('fuel_quantity'), spent=Sum('fuel_cost'))
+        distance, fuel, spent = (totals[key] or 0 for key in ('distance', 'fuel', 'spent'))
+    else:
+        distance = sum(row['distance'] for row in rows)
+        fuel = sum(row['fuel_quantity'] for row in rows)
+        spent = sum(row['fuel_cost'] for row in rows)
+    fleet = {
+        'distance': round(distance, 2),
+        'fuel_quantity': round(fuel, 2),
+        'fuel_cost': round(spent, 2),
+        'km_per_litre': round(distance / fuel, 2) if fuel else None,
+        'cost_per_km': round(spent / distance, 2) if distance else None,
+    }
+    return {'fleet': fleet, 'vehicles': rows}
@@ -0,0 +1,129 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Trip, FuelLog, MaintenanceLog
+
+
+# ============================================================
+# STREAMING EXPORTS
+# ============================================================
+# Rows are read with values_list() over a server-side iterator and
+# written out one chunk at a time, so memory use stays flat however
+# many rows are exported.
+
+CHUNK_SIZE = 2000
+
+# (model, date field used for range filters, [(column, lookup), ...]);
+# trips are filtered on when they start, not when they were entered
+EXPORTS = {
+    'trips': (Trip, 'start_date', [
+        ('id', 'id'),
+        ('vehicle_number', 'vehicle__vehicle_number'),
+        ('driver_name', 'driver__driver_name'),
+        ('start_location', 'start_location'),
+        ('end_location', 'end_location'),
+        ('distance', 'distance'),
+        ('status', 'status'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+        ('notes', 'notes'),
+        ('created_at', 'created_at'),
+    ]),
+    'fuel_logs': (FuelLog, 'date', [
+        ('id', 'id'),
+        ('vehicle_number', 'vehicle__vehicle_number'),
+        ('date', 'date'),
+        ('fuel_quantity', 'fuel_quantity'),
+        ('cost', 'cost'),
+        ('odometer_reading', 'odometer_reading'),
+        ('created_at', 'created_at'),
+    ]),
+    'maintenance_logs': (MaintenanceLog, 'date', [
+        ('id', 'id'),
+        ('vehicle_number', 'vehicle__vehicle_number'),
+        ('maintenance_type', 'maintenance_type'),
+        ('date', 'date'),
+        ('cost', 'cost'),
+        ('description', 'description'),
+        ('next_due_date', 'next_due_date'),
+        ('created_at', 'created_at'),
+    ]),
+}
+
+
+class Echo:
+    """
+    File-like object whose write() just returns the line, for csv.writer.
+    """
+    def write(self, value):
+        return value
+
+
+def export_queryset(name, start_date=None, end_date=None, vehicle=None):
+    """
+    values_list() queryset for an export, with the optional filters applied.
+    """
+    model, date_field, columns = EXPORTS[name]
+    queryset = model.objects.all()
+    if vehicle:
+        queryset = queryset.filter(vehicle_id=vehicle)
+    if date_field != 'date':
+        # Newest first on the filtered column, so its index serves both
+        queryset = queryset.order_by(f'-{date_field}', '-id')
+        # Compare DateTimeFields against day boundaries rather than with
+        # __date, which wraps the column in a function and defeats indexes
+        if start_date:
+            start_date = timezone.make_aware(datetime.combine(start_date, time.min))
+        if end_date:
+            end_date = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+            queryset = queryset.filter(**{f'{date_field}__lt': end_date})
+            end_date = None
+    if start_date:
+        queryset = queryset.filter(**{f'{date_field}__gte': start_date})
+    if end_date:
+        queryset = queryset.filter(**{f'{date_field}__lte': end_date})
+    return queryset.values_list(*[field for _, field in columns])
+
+
+def _format(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_rows(name, queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow([column for column, _ in EXPORTS[name][2]])
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        yield writer.writerow([_format(value) for value in row])
+
+
+def ndjson_rows(name, queryset):
+    columns = [column for column, _ in EXPORTS[name][2]]
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        record = {
+            column: None if value is None else _format(value)
+            for column, value in zip(columns, row)
+        }
+        yield json.dumps(record) + '\n'
+
+
+def export_response(name, export_format, queryset):
+    """
+    StreamingHttpResponse with a dated download filename.
+    """
+    stamp = timezone.now().strftime('%Y%m%d')
+    if export_format == 'ndjson':
+        response = StreamingHttpResponse(ndjson_rows(name, queryset), content_type='application/x-ndjson')
+        extension = 'ndjson'
+    else:
+        response = StreamingHttpResponse(csv_rows(name, queryset), content_type='text/csv')
+        extension = 'csv'
+    response['Content-Disposition'] = f'attachment; filename="{name}-{stamp}.{extension}"'
+    return response
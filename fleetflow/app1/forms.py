@@ -1,7 +1,53 @@
+import codecs
+
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog
+from .availability import conflicting_trips
+from .routes import route_service
+from .transitions import TRIP_TRANSITIONS, MAX_BULK_TRIPS, allowed_statuses, stamp_trip, stamped_dates, refresh_driver_availability
+
+
+# ============================================================
+# AUTOCOMPLETE WIDGET
+# ============================================================
+class AutocompleteSelect(forms.Select):
+    """
+    Select for a ModelChoiceField that renders only the empty choice and
+    the current value; static/js/fleetflow.js fetches the other options
+    from the autocomplete endpoint as the user types, so the form does
+    not grow with the size of the fleet.
+    """
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+    
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse('api_autocomplete', args=[self.source])
+        return context
+    
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        choices = []
+        if field.empty_label is not None:
+            choices.append(('', field.empty_label))
+        selected = [item for item in value if item]
+        if selected:
+            try:
+                instances = list(self.choices.queryset.filter(pk__in=selected))
+            except (ValueError, ValidationError):
+                instances = []
+            choices += [(instance.pk, field.label_from_instance(instance)) for instance in instances]
+        return [
+            (None, [self.create_option(name, option_value, label, str(option_value) in value, index, attrs=attrs)], index)
+            for index, (option_value, label) in enumerate(choices)
+        ]
 
 
 # ============================================================
@@ -114,7 +160,7 @@ class DriverForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Years of experience'
             }),
-            'assigned_vehicle': forms.Select(attrs={'class': 'form-select'}),
+            'assigned_vehicle': AutocompleteSelect('vehicles', attrs={'class': 'form-select'}),
             'is_available': forms.CheckboxInput(attrs={
                 'class': 'form-check-input'
             }),
@@ -130,10 +176,18 @@ class TripForm(forms.ModelForm):
     """
     class Meta:
         model = Trip
-        fields = ['vehicle', 'driver', 'start_location', 'end_location', 'distance', 'status', 'notes']
+        fields = ['vehicle', 'driver', 'start_date', 'end_date', 'start_location', 'end_location', 'distance', 'status', 'notes']
         widgets = {
-            'vehicle': forms.Select(attrs={'class': 'form-select'}),
-            'driver': forms.Select(attrs={'class': 'form-select'}),
+            'vehicle': AutocompleteSelect('vehicles', attrs={'class': 'form-select'}),
+            'driver': AutocompleteSelect('drivers', attrs={'class': 'form-select'}),
+            'start_date': forms.DateTimeInput(format='%Y-%m-%dT%H:%M', attrs={
+                'class': 'form-control',
+                'type': 'datetime-local'
+            }),
+            'end_date': forms.DateTimeInput(format='%Y-%m-%dT%H:%M', attrs={
+                'class': 'form-control',
+                'type': 'datetime-local'
+            }),
             'start_location': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Enter start location'
@@ -144,8 +198,9 @@ class TripForm(forms.ModelForm):
             }),
             'distance': forms.NumberInput(attrs={
                 'class': 'form-control',
-                'placeholder': 'Distance in km',
-                'step': '0.01'
+                'placeholder': 'Distance in km (blank: usual distance of this route)',
+                'step': '0.01',
+                'data-route-distance-url': reverse_lazy('api_route_distance')
             }),
             'status': forms.Select(attrs={'class': 'form-select'}),
             'notes': forms.Textarea(attrs={
@@ -154,6 +209,120 @@ class TripForm(forms.ModelForm):
                 'rows': 3
             }),
         }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Left blank, the distance is taken from the route service
+        self.fields['distance'].required = False
+    
+    def clean_start_location(self):
+        return ' '.join(self.cleaned_data['start_location'].split())
+    
+    def clean_end_location(self):
+        return ' '.join(self.cleaned_data['end_location'].split())
+    
+    def clean_distance(self):
+        distance = self.cleaned_data.get('distance')
+        if distance is not None:
+            return distance
+        start_location = self.cleaned_data.get('start_location')
+        end_location = self.cleaned_data.get('end_location')
+        if not start_location or not end_location:
+            return None
+        distance = route_service().distance(start_location, end_location)
+        if distance is None:
+            raise forms.ValidationError("Enter the distance; no earlier trip on this route is known.")
+        return distance
+    
+    def clean_status(self):
+        status = self.cleaned_data.get('status')
+        current = self.instance.status
+        if self.instance.pk is not None and status not in allowed_statuses(current):
+            labels = dict(Trip.STATUS_CHOICES)
+            raise forms.ValidationError(
+                f"A {labels[current].lower()} trip cannot be changed to {labels[status].lower()}."
+            )
+        return status
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and end_date <= start_date:
+            self.add_error('end_date', "End must be after start.")
+            return cleaned_data
+        status = cleaned_data.get('status')
+        if status == 'cancelled':
+            return cleaned_data
+        # A trip saved as started is booked from now when no start is given
+        self.checked_at = timezone.now()
+        start_date, end_date = stamped_dates(status, start_date, end_date, self.checked_at)
+        if not start_date or (end_date and end_date <= start_date):
+            return cleaned_data
+        
+        # Reject double-booking of the driver or the vehicle
+        for name in ('driver', 'vehicle'):
+            booked = cleaned_data.get(name)
+            if booked is None:
+                continue
+            clash = conflicting_trips(start_date, end_date, exclude=self.instance.pk, **{name: booked}).first()
+            if clash is not None:
+                label = booked.vehicle_number if name == 'vehicle' else booked.driver_name
+                self.add_error(name, f"{label} is already booked on trip #{clash.pk} at that time.")
+        return cleaned_data
+    
+    def save(self, commit=True):
+        trip = super().save(commit=False)
+        stamp_trip(trip, getattr(self, 'checked_at', None))
+        if commit:
+            trip.save()
+            if 'status' in self.changed_data or 'driver' in self.changed_data:
+                refresh_driver_availability({trip.driver_id, self.initial.get('driver')} - {None})
+        return trip
+    
+    def save_if_valid(self):
+        """
+        Validate and save in one transaction, so no other booking can slip
+        in between the double-booking check and the write (SQLite takes
+        the write lock when the transaction begins).  Returns the saved
+        trip, or None when the form is invalid.
+        """
+        with transaction.atomic():
+            if not self.is_valid():
+                return None
+            return self.save()
+
+
+# ============================================================
+# TRIP TRANSITION FORM
+# ============================================================
+class TripIdsField(forms.TypedMultipleChoiceField):
+    """
+    Trip ids ticked on the list.  Existence is not checked here: missing
+    trips are reported as skipped, like trips in the wrong status.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(coerce=int, **kwargs)
+    
+    def valid_value(self, value):
+        return str(value).isdigit()
+
+
+class TripTransitionForm(forms.Form):
+    """
+    Bulk status change for the trips ticked on the trip list.
+    """
+    action = forms.ChoiceField(
+        choices=[(name, spec['label']) for name, spec in TRIP_TRANSITIONS.items()],
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    trips = TripIdsField(error_messages={'required': "Select at least one trip."})
+    
+    def clean_trips(self):
+        trips = self.cleaned_data['trips']
+        if len(set(trips)) > MAX_BULK_TRIPS:
+            raise forms.ValidationError(f"Select at most {MAX_BULK_TRIPS} trips at once.")
+        return trips
 
 
 # ============================================================
@@ -167,7 +336,7 @@ class FuelLogForm(forms.ModelForm):
         model = FuelLog
         fields = ['vehicle', 'date', 'fuel_quantity', 'cost', 'odometer_reading']
         widgets = {
-            'vehicle': forms.Select(attrs={'class': 'form-select'}),
+            'vehicle': AutocompleteSelect('vehicles', attrs={'class': 'form-select'}),
             'date': forms.DateInput(attrs={
                 'class': 'form-control',
                 'type': 'date'
@@ -201,7 +370,7 @@ class MaintenanceLogForm(forms.ModelForm):
         model = MaintenanceLog
         fields = ['vehicle', 'maintenance_type', 'date', 'cost', 'description', 'next_due_date']
         widgets = {
-            'vehicle': forms.Select(attrs={'class': 'form-select'}),
+            'vehicle': AutocompleteSelect('vehicles', attrs={'class': 'form-select'}),
             'maintenance_type': forms.Select(attrs={'class': 'form-select'}),
             'date': forms.DateInput(attrs={
                 'class': 'form-control',
@@ -222,3 +391,117 @@ class MaintenanceLogForm(forms.ModelForm):
                 'type': 'date'
             }),
         }
+
+
+# ============================================================
+# EXPORT FILTER FORM
+# ============================================================
+class ExportFilterForm(forms.Form):
+    """
+    Query-string filters accepted by the export endpoints.  The date
+    range applies to the trip start date and the log date.
+    """
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+    ]
+    
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+    start_date = forms.DateField(required=False)
+    end_date = forms.DateField(required=False)
+    vehicle = forms.IntegerField(required=False, min_value=1, help_text="Vehicle id")
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise forms.ValidationError("Start date must be on or before end date.")
+        return cleaned_data
+
+
+# ============================================================
+# AVAILABILITY FORM
+# ============================================================
+class AvailabilityForm(forms.Form):
+    """
+    Query-string window for the availability endpoint; no end means
+    "from start onwards".
+    """
+    start = forms.DateTimeField()
+    end = forms.DateTimeField(required=False)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start')
+        end = cleaned_data.get('end')
+        if start and end and end <= start:
+            raise forms.ValidationError("End must be after start.")
+        return cleaned_data
+
+
+# ============================================================
+# CSV IMPORT FORM
+# ============================================================
+class ImportFileForm(forms.Form):
+    """
+    Form for uploading a CSV file to import.
+    """
+    ENCODING_CHECK_BYTES = 64 * 1024
+    
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv'
+        })
+    )
+    background = forms.BooleanField(
+        required=False,
+        label="Import in the background",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        # Catch the usual case (a file saved as Latin-1 / Windows-1252)
+        # up front; a bad byte further in is reported by the import
+        head = upload.read(self.ENCODING_CHECK_BYTES)
+        upload.seek(0)
+        try:
+            codecs.getincrementaldecoder('utf-8-sig')().decode(head)
+        except UnicodeDecodeError:
+            raise forms.ValidationError("The file is not UTF-8 encoded. Save it as \"CSV UTF-8\" and try again.")
+        return upload
+
+
+# ============================================================
+# REPORT RANGE FORM
+# ============================================================
+class ReportRangeForm(forms.Form):
+    """
+    Month range for the cost trends on the reports page.
+    """
+    start_month = forms.DateField(
+        required=False,
+        input_formats=['%Y-%m'],
+        widget=forms.DateInput(format='%Y-%m', attrs={
+            'class': 'form-control',
+            'type': 'month'
+        })
+    )
+    end_month = forms.DateField(
+        required=False,
+        input_formats=['%Y-%m'],
+        widget=forms.DateInput(format='%Y-%m', attrs={
+            'class': 'form-control',
+            'type': 'month'
+        })
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_month = cleaned_data.get('start_month')
+        end_month = cleaned_data.get('end_month')
+        if start_month and end_month and start_month > end_month:
+            raise forms.ValidationError("Start month must be on or before end month.")
+        return cleaned_data
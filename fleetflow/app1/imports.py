@@ -0,0 +1,232 @@
+import csv
+from itertools import chain, islice
+
+from django import forms
+from django.db import transaction
+
+from .availability import BookingCalendar
+from .models import Vehicle, Driver, Trip, FuelLog
+from .forms import FuelLogForm, TripForm
+from .signals import objects_created
+
+
+# ============================================================
+# BULK CSV IMPORT
+# ============================================================
+# Rows are read in fixed-size batches.  Each batch resolves its
+# vehicle numbers / license numbers with one lookup query per model,
+# validates every row with the same rules as the regular add form
+# (minus the foreign-key select), and inserts the valid rows with a
+# single bulk_create inside its own transaction.  Invalid rows are
+# reported back instead of failing the whole file.
+#
+# Trips are also checked for double-booking once their driver and
+# vehicle are resolved: against the stored trips (one query per batch)
+# and against the rows before them in the file.
+
+DEFAULT_BATCH_SIZE = 500
+
+# Forms reuse the add-form rules; foreign keys are resolved separately
+FuelLogImportForm = forms.modelform_factory(
+    FuelLog, form=FuelLogForm, fields=['date', 'fuel_quantity', 'cost', 'odometer_reading']
+)
+TripImportForm = forms.modelform_factory(
+    Trip, form=TripForm, fields=['start_date', 'end_date', 'start_location', 'end_location', 'distance', 'status', 'notes']
+)
+
+# kind -> (model, import form, {csv column: (model, lookup field, fk attribute)})
+IMPORTERS = {
+    'fuel': (FuelLog, FuelLogImportForm, {
+        'vehicle_number': (Vehicle, 'vehicle_number', 'vehicle_id'),
+    }),
+    'trips': (Trip, TripImportForm, {
+        'vehicle_number': (Vehicle, 'vehicle_number', 'vehicle_id'),
+        'license_number': (Driver, 'license_number', 'driver_id'),
+    }),
+}
+
+# Columns expected in each kind of CSV file
+IMPORT_COLUMNS = {
+    kind: list(lookups) + list(form_class.base_fields)
+    for kind, (_, form_class, lookups) in IMPORTERS.items()
+}
+
+
+class ImportResult:
+    """
+    Outcome of an import: number of rows created and rejected, and the
+    per-row errors.  A resumed import starts from the earlier counts.
+    """
+    def __init__(self, created=0, failed=0, errors=()):
+        self.created = created
+        self.failed = failed
+        self.errors = list(errors)
+
+    def add_error(self, line, messages):
+        self.failed += 1
+        self.errors.append({'line': line, 'errors': messages})
+
+
+def _form_errors(form):
+    return [
+        f"{field}: {message}" if field != '__all__' else message
+        for field, messages in form.errors.items()
+        for message in messages
+    ]
+
+
+def _drop_double_bookings(objects, calendar, result):
+    """
+    The (line, row, trip) entries whose driver and vehicle are free,
+    booking each in ``calendar``; the others are reported as errors.
+    """
+    free = []
+    for line, row, trip in objects:
+        if trip.status == 'cancelled' or trip.start_date is None:
+            free.append((line, row, trip))
+            continue
+        clashes = calendar.clashes(trip.driver_id, trip.vehicle_id, trip.start_date, trip.end_date)
+        if clashes:
+            result.add_error(line, [
+                f"{column}: '{row[column].strip()}' is already booked on {clashes[name]} at that time."
+                for column, name in (('license_number', 'driver'), ('vehicle_number', 'vehicle'))
+                if name in clashes
+            ])
+            continue
+        calendar.add(f"line {line}", trip.driver_id, trip.vehicle_id, trip.start_date, trip.end_date)
+        free.append((line, row, trip))
+    return free
+
+
+def _import_batch(kind, batch, result):
+    model, form_class, lookups = IMPORTERS[kind]
+
+    # One lookup map per foreign key for the whole batch
+    maps = {}
+    for column, (related_model, field, _) in lookups.items():
+        keys = {(row.get(column) or '').strip() for _, row in batch}
+        maps[column] = dict(
+            related_model.objects.filter(**{f'{field}__in': keys}).values_list(field, 'id')
+        )
+
+    objects = []
+    for line, row in batch:
+        errors = []
+        related_ids = {}
+        for column, (_, _, attribute) in lookups.items():
+            key = (row.get(column) or '').strip()
+            if not key:
+                errors.append(f"{column}: This field is required.")
+            elif key not in maps[column]:
+                errors.append(f"{column}: Unknown value '{key}'.")
+            else:
+                related_ids[attribute] = maps[column][key]
+
+        form = form_class(data={name: (value or '').strip() for name, value in row.items() if name})
+        if not form.is_valid():
+            errors.extend(_form_errors(form))
+        if errors:
+            result.add_error(line, errors)
+            continue
+
+        instance = form.save(commit=False)
+        for attribute, value in related_ids.items():
+            setattr(instance, attribute, value)
+        objects.append((line, row, instance))
+
+    if not objects:
+        return
+
+    with transaction.atomic():
+        if model is Trip:
+            starts = [trip.start_date for _, _, trip in objects if trip.start_date is not None]
+            if starts:
+                calendar = BookingCalendar(
+                    min(starts),
+                    drivers={trip.driver_id for _, _, trip in objects},
+                    vehicles={trip.vehicle_id for _, _, trip in objects},
+                )
+                objects = _drop_double_bookings(objects, calendar, result)
+                result.errors.sort(key=lambda error: error['line'])
+        objects = [instance for _, _, instance in objects]
+        if not objects:
+            return
+        model.objects.bulk_create(objects)
+        # bulk_create skips the save signals
+        objects_created(model, objects)
+    result.created += len(objects)
+
+
+def import_rows(kind, rows, batch_size=DEFAULT_BATCH_SIZE, progress=None, skip=0, result=None, checkpoint=None):
+    """
+    Import an iterable of dict rows (e.g. a csv.DictReader).
+    Line numbers in the error report count the header as line 1.
+    ``progress(rows_done)`` is called after every batch.
+
+    To resume an import, pass the rows already done as ``skip`` and
+    their ``result``.  ``checkpoint(rows_done, result)`` is called inside
+    each batch's transaction, so what it stores commits with the rows.
+    """
+    result = result or ImportResult()
+    numbered = islice(enumerate(rows, start=2), skip, None)
+    done = skip
+    while True:
+        batch = list(islice(numbered, batch_size))
+        if not batch:
+            break
+        done += len(batch)
+        if checkpoint is None:
+            _import_batch(kind, batch, result)
+        else:
+            with transaction.atomic():
+                _import_batch(kind, batch, result)
+                checkpoint(done, result)
+        if progress is not None:
+            progress(done)
+    return result
+
+
+class _Utf8Lines:
+    """
+    Decodes binary lines one at a time and stops at the first line that
+    is not UTF-8 (noted in ``stopped``) instead of raising midway through
+    a batch.  Multi-byte UTF-8 sequences never contain a newline
+    byte, so decoding line by line is safe.
+    """
+    def __init__(self, lines):
+        self.lines = lines
+        self.stopped = False
+
+    def __iter__(self):
+        encoding = 'utf-8-sig'
+        for line in self.lines:
+            try:
+                yield line.decode(encoding)
+            except UnicodeDecodeError:
+                self.stopped = True
+                return
+            encoding = 'utf-8'
+
+
+def import_csv(kind, file, batch_size=DEFAULT_BATCH_SIZE, progress=None, **resume):
+    """
+    Import a CSV file: an upload, or a file opened in binary or text mode.
+    A binary file that is not UTF-8 is imported up to the first bad line,
+    which is reported as a row error.  ``resume`` takes the skip, result
+    and checkpoint arguments of import_rows().
+    """
+    lines = iter(file)
+    first = next(lines, '')
+    lines = chain([first], lines)
+    decoded = None
+    if isinstance(first, bytes):
+        lines = decoded = _Utf8Lines(lines)
+    result = import_rows(kind, csv.DictReader(lines), batch_size=batch_size, progress=progress, **resume)
+    if decoded is not None and decoded.stopped:
+        # Numbered like the row errors: the record after the last one read
+        result.add_error(result.created + result.failed + 2, [
+            "This record is not UTF-8 encoded text; it and the rest of the file were not imported. "
+            "Error numbers count CSV records (the header is 1), not lines of the file.",
+        ])
+        result.errors.sort(key=lambda error: error['line'])
+    return result
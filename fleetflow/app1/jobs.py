@@ -0,0 +1,345 @@
+import csv
+import logging
+import os
+import threading
+import time
+import traceback
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_version
+from .counters import rebuild_counters
+from .efficiency import rebuild_efficiency
+from .exports import EXPORTS, export_queryset, csv_rows, ndjson_rows, CHUNK_SIZE
+from .imports import ImportResult, import_csv
+from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog, MaintenanceSchedule, Job
+from .rollups import rebuild_rollups
+from .scheduler import rebuild_schedule
+from .search import ensure_search_index, search_supported
+
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# BACKGROUND JOBS
+# ============================================================
+# Jobs live in the Job table of the normal database; there is no
+# broker.  Views enqueue() a job and answer at once with its id;
+# `manage.py run_workers` processes poll the table and run them.
+#
+#   * claiming is a compare-and-set UPDATE (status queued -> running),
+#     so two workers never run the same job, on any database,
+#   * a failed attempt is retried after RETRY_DELAY * 2**(attempt - 1)
+#     until max_attempts is reached, unless the handler declared the
+#     error final (retrying cannot help, e.g. a file that is not UTF-8),
+#   * handlers that write as they go keep a job.checkpoint, so a retry
+#     resumes where the last attempt stopped instead of redoing it,
+#   * a running job writes a heartbeat every HEARTBEAT_SECONDS; jobs
+#     whose worker died (no heartbeat for STALE_SECONDS) are requeued
+#     or failed by the next idle worker,
+#   * handlers report progress(done, total, message), which the job
+#     page polls through /api/jobs/<id>/.
+
+DEFAULT_POLL_SECONDS = 2
+HEARTBEAT_SECONDS = 15
+STALE_SECONDS = 120
+RETRY_DELAY = timedelta(seconds=30)
+# Progress is written at most this often (the final step always is)
+PROGRESS_INTERVAL = 1.0
+CLAIM_ATTEMPTS = 5
+# Import errors kept in the job result
+MAX_REPORTED_ERRORS = 200
+
+# kind -> handler(job, progress) returning a JSON-serialisable result
+JOB_HANDLERS = {}
+# kind -> exception types that fail the job at once instead of retrying
+FINAL_ERRORS = {}
+
+
+def job_handler(kind, final_errors=()):
+    """
+    Register a function as the handler of a job kind.
+    """
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        FINAL_ERRORS[kind] = tuple(final_errors)
+        return func
+    return register
+
+
+def files_dir():
+    """
+    Directory holding job uploads and results (created on demand).
+    """
+    path = os.fspath(getattr(settings, 'FLEETFLOW_JOB_FILES_DIR', os.path.join(settings.MEDIA_ROOT, 'jobs')))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def enqueue(kind, params=None, user=None, max_attempts=None):
+    """
+    Queue a job of a registered kind; returns the Job.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    job = Job(kind=kind, params=params or {}, created_by=user)
+    if max_attempts is not None:
+        job.max_attempts = max_attempts
+    job.save()
+    return job
+
+
+class JobProgress:
+    """
+    Callable handed to handlers: progress(done, total=None, message='').
+    """
+    def __init__(self, job):
+        self.job = job
+        self.last_write = 0.0
+
+    def __call__(self, done, total=None, message=''):
+        now = time.monotonic()
+        final = total is not None and done >= total
+        if not final and now - self.last_write < PROGRESS_INTERVAL:
+            return
+        self.last_write = now
+        self.job.progress_done = done
+        self.job.progress_total = total
+        self.job.progress_message = message[:200]
+        Job.objects.filter(pk=self.job.pk).update(
+            progress_done=done, progress_total=total, progress_message=self.job.progress_message,
+            heartbeat_at=timezone.now(),
+        )
+
+
+class Heartbeat:
+    """
+    Background thread touching heartbeat_at while a job runs, so long
+    steps without progress reports are not mistaken for a dead worker.
+    """
+    def __init__(self, job_id, interval=HEARTBEAT_SECONDS):
+        self.job_id = job_id
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                Job.objects.filter(pk=self.job_id, status='running').update(heartbeat_at=timezone.now())
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def claim_job(worker):
+    """
+    Move the next due job to running for ``worker``; None when idle.
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        now = timezone.now()
+        candidate = (
+            Job.objects.filter(status='queued', run_after__lte=now)
+            .order_by('run_after', 'id').values_list('pk', flat=True).first()
+        )
+        if candidate is None:
+            return None
+        claimed = Job.objects.filter(pk=candidate, status='queued').update(
+            status='running', worker=worker, attempts=F('attempts') + 1,
+            started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=candidate)
+    return None
+
+
+def retry_delay(attempts):
+    return RETRY_DELAY * 2 ** max(attempts - 1, 0)
+
+
+def run_job(job):
+    """
+    Run a claimed job and record its outcome.
+    """
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind '{job.kind}'.")
+        with Heartbeat(job.pk):
+            result = handler(job, JobProgress(job))
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed on attempt %s", job.pk, job.kind, job.attempts)
+        now = timezone.now()
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts and not isinstance(exc, FINAL_ERRORS.get(job.kind, ())):
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', run_after=now + retry_delay(job.attempts), worker='', error=error,
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(status='failed', finished_at=now, error=error)
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status='succeeded', result=result, error='', finished_at=timezone.now(),
+        )
+    job.refresh_from_db()
+    return job
+
+
+def requeue_stale(timeout=STALE_SECONDS):
+    """
+    Requeue (or fail, when out of attempts) running jobs whose worker
+    stopped sending heartbeats.  Returns how many jobs were affected.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', heartbeat_at__lt=now - timedelta(seconds=timeout))
+    error = "The worker running this job stopped responding."
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status='queued', run_after=now, worker='', error=error,
+    )
+    failed = stale.update(status='failed', finished_at=now, error=error)
+    return requeued + failed
+
+
+def work(worker, poll=DEFAULT_POLL_SECONDS, once=False, stop=None):
+    """
+    Worker loop: run due jobs until ``stop`` is set, or with ``once``
+    until the queue is empty.  Returns the number of jobs run.
+    """
+    ran = 0
+    while stop is None or not stop.is_set():
+        job = claim_job(worker)
+        if job is not None:
+            run_job(job)
+            ran += 1
+            continue
+        requeue_stale()
+        if once:
+            break
+        if stop is not None:
+            stop.wait(poll)
+        else:
+            time.sleep(poll)
+    return ran
+
+
+# ============================================================
+# JOB HANDLERS
+# ============================================================
+
+@job_handler('export')
+def export_job(job, progress):
+    """
+    Write an export (params as accepted by export_queryset, plus format)
+    to a file that /jobs/<id>/download/ serves.
+    """
+    params = job.params
+    name = params['name']
+    export_format = params.get('format') or 'csv'
+    queryset = export_queryset(
+        name,
+        start_date=date.fromisoformat(params['start_date']) if params.get('start_date') else None,
+        end_date=date.fromisoformat(params['end_date']) if params.get('end_date') else None,
+        vehicle=params.get('vehicle'),
+    )
+    total = queryset.count()
+    rows = csv_rows(name, queryset) if export_format == 'csv' else ndjson_rows(name, queryset)
+    filename = f"{name}-{timezone.now():%Y%m%d}-job{job.pk}.{export_format}"
+    written = 0
+    progress(0, total, "Exporting")
+    with open(os.path.join(files_dir(), filename), 'w', encoding='utf-8', newline='') as handle:
+        if export_format == 'csv':
+            handle.write(next(rows))
+        for line in rows:
+            handle.write(line)
+            written += 1
+            if written % CHUNK_SIZE == 0:
+                progress(written, total, "Exporting")
+    progress(written, written, "Exported")
+    return {
+        'file': filename,
+        'rows': written,
+        'content_type': 'text/csv' if export_format == 'csv' else 'application/x-ndjson',
+    }
+
+
+@job_handler('import', final_errors=(UnicodeDecodeError, csv.Error, FileNotFoundError))
+def import_job(job, progress):
+    """
+    Import a CSV upload saved by the import view; the file is removed
+    once the import has run or has failed for good.  Each batch commits
+    together with a checkpoint of the rows done, so a retry skips them.
+    """
+    checkpoint = job.checkpoint or {}
+
+    def save_checkpoint(rows, result):
+        job.checkpoint = {
+            'rows': rows,
+            'created': result.created,
+            'failed': result.failed,
+            'errors': result.errors[:MAX_REPORTED_ERRORS],
+        }
+        Job.objects.filter(pk=job.pk).update(checkpoint=job.checkpoint)
+
+    path = os.path.join(files_dir(), job.params['file'])
+    try:
+        with open(path, 'rb') as handle:
+            result = import_csv(
+                job.params['kind'], handle,
+                progress=lambda done: progress(done, None, f"{done} row(s) processed"),
+                skip=checkpoint.get('rows', 0),
+                result=ImportResult(checkpoint.get('created', 0), checkpoint.get('failed', 0), checkpoint.get('errors', ())),
+                checkpoint=save_checkpoint,
+            )
+    except FINAL_ERRORS['import']:
+        # The job fails without a retry, so nothing reads the upload again
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    os.remove(path)
+    rows = result.created + result.failed
+    progress(rows, rows, "Imported")
+    return {
+        'created': result.created,
+        'failed': result.failed,
+        'errors': result.errors[:MAX_REPORTED_ERRORS],
+    }
+
+
+# name -> (label, function)
+REBUILD_TARGETS = {
+    'counters': ("Dashboard counters", rebuild_counters),
+    'rollups': ("Monthly cost rollups", rebuild_rollups),
+    'efficiency': ("Fuel efficiency", rebuild_efficiency),
+    'schedule': ("Maintenance schedule", rebuild_schedule),
+    'search': ("Search indexes", lambda: ensure_search_index(rebuild=True) if search_supported() else None),
+}
+
+
+@job_handler('rebuild')
+def rebuild_job(job, progress):
+    """
+    Recompute derived tables from the fleet tables (params: targets,
+    default all of REBUILD_TARGETS).
+    """
+    targets = job.params.get('targets') or list(REBUILD_TARGETS)
+    for done, target in enumerate(targets):
+        label, rebuild = REBUILD_TARGETS[target]
+        progress(done, len(targets), f"Rebuilding {label.lower()}")
+        with transaction.atomic():
+            rebuild()
+    for model in (Vehicle, Driver, Trip, FuelLog, MaintenanceLog, MaintenanceSchedule):
+        bump_version(model)
+    progress(len(targets), len(targets), "Rebuilt")
+    return {'rebuilt': targets}
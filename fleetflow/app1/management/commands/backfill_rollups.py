@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from app1.cache import bump_version
+from app1.models import FuelLog, MaintenanceLog
+from app1.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly fuel/maintenance cost rollup table from the raw logs."
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups()
+        # Cached reports embed the versions of the rolled-up logs
+        bump_version(FuelLog)
+        bump_version(MaintenanceLog)
+        self.stdout.write(self.style.SUCCESS(f"Rollups rebuilt: {rows} row(s)."))
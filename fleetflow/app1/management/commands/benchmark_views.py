@@ -0,0 +1,151 @@
+import json
+import platform
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app1.cache import get_cache
+from app1.concurrency import query_threads
+from app1.metrics import registry
+from app1.models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog
+
+
+BENCH_USERNAME = 'benchmark'
+
+# (label, url name, model whose first row is passed as pk or None)
+VIEWS = [
+    ('dashboard', 'dashboard', None),
+    ('reports', 'reports', None),
+    ('vehicle_list', 'vehicle_list', None),
+    ('driver_list', 'driver_list', None),
+    ('trip_list', 'trip_list', None),
+    ('fuel_list', 'fuel_list', None),
+    ('maintenance_list', 'maintenance_list', None),
+    ('vehicle_add', 'vehicle_add', None),
+    ('driver_add', 'driver_add', None),
+    ('trip_add', 'trip_add', None),
+    ('fuel_add', 'fuel_add', None),
+    ('maintenance_add', 'maintenance_add', None),
+    ('vehicle_edit', 'vehicle_edit', Vehicle),
+    ('driver_edit', 'driver_edit', Driver),
+    ('trip_edit', 'trip_edit', Trip),
+    ('fuel_edit', 'fuel_edit', FuelLog),
+    ('maintenance_edit', 'maintenance_edit', MaintenanceLog),
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Time the main views through the Django test client and report p50/p95 latency and query counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--cold', action='store_true', help="Clear the page cache before every request.")
+        parser.add_argument('--only', nargs='*', help="Only run these view labels.")
+        parser.add_argument('--query-threads', type=int, help="Override FLEETFLOW_QUERY_THREADS (1 runs dashboard/reports query groups sequentially).")
+        parser.add_argument('--output', help="Write results to this JSON file.")
+        parser.add_argument('--compare', help="Compare against a previous JSON results file.")
+
+    def handle(self, *args, **options):
+        if options['query_threads'] is not None:
+            with override_settings(FLEETFLOW_QUERY_THREADS=options['query_threads']):
+                return self.run(options)
+        return self.run(options)
+
+    def run(self, options):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        client = Client()
+        client.force_login(user)
+        cache = get_cache()
+
+        views = [view for view in VIEWS if not options['only'] or view[0] in options['only']]
+        results = {}
+        for label, url_name, model in views:
+            args = []
+            if model is not None:
+                pk = model.objects.order_by().values_list('pk', flat=True).first()
+                if pk is None:
+                    self.stdout.write(f"{label:<18} skipped (no {model._meta.verbose_name} rows)")
+                    continue
+                args = [pk]
+            url = reverse(url_name, args=args)
+
+            timings, queries = [], []
+            for iteration in range(options['warmup'] + options['iterations']):
+                if options['cold']:
+                    cache.clear()
+                # Query counts come from the metrics middleware, which also
+                # sees queries run on the parallel query threads
+                before = registry.snapshot().get(url_name, {}).get('queries', 0)
+                start = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - start
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+                if iteration >= options['warmup']:
+                    timings.append(elapsed * 1000)
+                    queries.append(registry.snapshot()[url_name]['queries'] - before)
+
+            results[label] = {
+                'url': url,
+                'p50_ms': round(percentile(timings, 0.50), 3),
+                'p95_ms': round(percentile(timings, 0.95), 3),
+                'mean_ms': round(statistics.mean(timings), 3),
+                'queries': max(queries),
+            }
+            self.stdout.write(
+                f"{label:<18} p50 {results[label]['p50_ms']:>9.2f} ms   "
+                f"p95 {results[label]['p95_ms']:>9.2f} ms   queries {results[label]['queries']:>3}"
+            )
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'cold_cache': options['cold'],
+            'query_threads': query_threads(),
+            'rows': {model._meta.model_name: model.objects.count() for model in (Vehicle, Driver, Trip, FuelLog, MaintenanceLog)},
+            'views': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def compare(self, path, results):
+        try:
+            with open(path) as file:
+                baseline = json.load(file)['views']
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Cannot read baseline {path}: {exc}")
+
+        self.stdout.write(f"\nCompared with {path}:")
+        for label, current in results.items():
+            previous = baseline.get(label)
+            if not previous:
+                continue
+            change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+            line = (
+                f"{label:<18} p95 {previous['p95_ms']:>9.2f} -> {current['p95_ms']:>9.2f} ms ({change:+.1f}%)   "
+                f"queries {previous['queries']} -> {current['queries']}"
+            )
+            if change > 10 or current['queries'] > previous['queries']:
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
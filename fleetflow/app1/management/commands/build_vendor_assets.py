@@ -0,0 +1,83 @@
+import os
+import re
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app1.assets import purge_css, used_words
+
+
+SOURCE_FILES = ['bootstrap.min.css', 'bootstrap-icons.min.css', 'bootstrap-icons.woff2']
+SCANNED_SUFFIXES = {'.html', '.js', '.py'}
+SKIPPED_DIRS = {'vendor', 'staticfiles', 'migrations', '__pycache__', 'media', 'logs', 'cache'}
+ICON_CODEPOINT_RE = re.compile(r'content:\s*"\\([0-9a-fA-F]+)"')
+FONT_SRC_RE = re.compile(r'src:url\([^;}]*')
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild static/vendor from upstream Bootstrap and Bootstrap Icons "
+        "dist files, keeping only the CSS rules and icon glyphs that the "
+        "templates and code use. Run it again after using new classes or icons."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source',
+            help=f"Directory holding the upstream {', '.join(SOURCE_FILES)}.",
+        )
+
+    def handle(self, *args, **options):
+        source = Path(options['source'])
+        missing = [name for name in SOURCE_FILES if not (source / name).exists()]
+        if missing:
+            raise CommandError(f"Missing in {source}: {', '.join(missing)}")
+
+        base_dir = Path(settings.BASE_DIR)
+        vendor = Path(settings.STATICFILES_DIRS[0]) / 'vendor'
+        words, prefixes = used_words(self.scanned_files(base_dir))
+
+        bootstrap = purge_css((source / 'bootstrap.min.css').read_text(encoding='utf-8'), words, prefixes)
+        self.write(vendor / 'bootstrap' / 'bootstrap.min.css', bootstrap, source / 'bootstrap.min.css')
+
+        icons = purge_css((source / 'bootstrap-icons.min.css').read_text(encoding='utf-8'), words, prefixes)
+        # Every supported browser reads woff2; the hashed name replaces ?v=
+        icons = FONT_SRC_RE.sub('src:url("fonts/bootstrap-icons.woff2") format("woff2")', icons, count=1)
+        self.write(vendor / 'bootstrap-icons' / 'bootstrap-icons.min.css', icons, source / 'bootstrap-icons.min.css')
+
+        font = vendor / 'bootstrap-icons' / 'fonts' / 'bootstrap-icons.woff2'
+        codepoints = [int(value, 16) for value in ICON_CODEPOINT_RE.findall(icons)]
+        self.subset_font(source / 'bootstrap-icons.woff2', font, codepoints)
+
+    def scanned_files(self, base_dir):
+        for directory, dirs, files in os.walk(base_dir):
+            dirs[:] = [name for name in dirs if name not in SKIPPED_DIRS and not name.startswith('.')]
+            for name in files:
+                if os.path.splitext(name)[1] in SCANNED_SUFFIXES:
+                    yield os.path.join(directory, name)
+
+    def write(self, path, text, original):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+        self.stdout.write(f"{path.name}: {original.stat().st_size:,} -> {path.stat().st_size:,} bytes")
+
+    def subset_font(self, original, path, codepoints):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            from fontTools import subset
+        except ImportError:
+            shutil.copyfile(original, path)
+            self.stdout.write(self.style.WARNING("fontTools is not installed; copied the full icon font."))
+            return
+        options = subset.Options()
+        options.flavor = 'woff2'
+        font = subset.load_font(str(original), options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font)
+        subset.save_font(font, str(path), options)
+        self.stdout.write(
+            f"{path.name}: {original.stat().st_size:,} -> {path.stat().st_size:,} bytes ({len(codepoints)} icons)"
+        )
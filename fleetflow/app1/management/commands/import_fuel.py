@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app1.imports import import_csv, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Import fuel logs from a CSV file (vehicle_number, date, fuel_quantity, cost, odometer_reading)."
+    kind = 'fuel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the CSV file.")
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Rows validated and inserted per transaction (default {DEFAULT_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_csv(self.kind, file, batch_size=options['batch_size'])
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {'; '.join(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(f"{result.created} row(s) imported, {result.failed} rejected."))
@@ -0,0 +1,6 @@
+from .import_fuel import Command as ImportFuelCommand
+
+
+class Command(ImportFuelCommand):
+    help = "Import trips from a CSV file (vehicle_number, license_number, start_location, end_location, distance, status, notes)."
+    kind = 'trips'
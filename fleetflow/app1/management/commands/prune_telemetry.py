@@ -0,0 +1,26 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app1.telemetry import prune_days
+
+
+class Command(BaseCommand):
+    help = "Delete GPS telemetry older than the retention window, one day at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Days of pings to keep (default FLEETFLOW_TELEMETRY_RETENTION_DAYS).")
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.FLEETFLOW_TELEMETRY_RETENTION_DAYS
+        if days < 1:
+            raise CommandError("--days must be at least 1.")
+        before = timezone.now().astimezone(datetime.timezone.utc).date() - datetime.timedelta(days=days - 1)
+        deleted = prune_days(before)
+        for day, rows in deleted.items():
+            self.stdout.write(f"{day}: {rows} ping(s) deleted")
+        self.stdout.write(self.style.SUCCESS(
+            f"Telemetry pruned: {len(deleted)} day(s), {sum(deleted.values())} ping(s); kept pings from {before} on."
+        ))
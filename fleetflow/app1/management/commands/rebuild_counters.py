@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from app1.cache import bump_version
+from app1.counters import compute_counters, get_counters, rebuild_counters
+from app1.models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard counters from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only report counters that have drifted; do not write anything.",
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stored = get_counters()
+            drifted = 0
+            for name, value in compute_counters().items():
+                if stored[name] != value:
+                    drifted += 1
+                    self.stdout.write(f"{name}: stored {stored[name]}, actual {value}")
+            if drifted:
+                self.stdout.write(self.style.WARNING(f"{drifted} counter(s) out of date."))
+            else:
+                self.stdout.write(self.style.SUCCESS("All counters are up to date."))
+            return
+
+        for name, (old, new) in rebuild_counters().items():
+            marker = '' if old == new else '  (fixed)'
+            self.stdout.write(f"{name}: {new}{marker}")
+        # Cached dashboards embed the versions of the counted tables
+        for model in (Vehicle, Driver, Trip, FuelLog, MaintenanceLog):
+            bump_version(model)
+        self.stdout.write(self.style.SUCCESS("Counters rebuilt."))
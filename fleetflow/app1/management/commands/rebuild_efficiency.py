@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from app1.cache import bump_version
+from app1.efficiency import rebuild_efficiency
+from app1.models import FuelLog
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored per-vehicle fuel efficiency from the fuel logs."
+
+    def handle(self, *args, **options):
+        rows = rebuild_efficiency()
+        # Cached reports embed the FuelLog version
+        bump_version(FuelLog)
+        self.stdout.write(self.style.SUCCESS(f"Fuel efficiency rebuilt: {rows} vehicle(s)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app1.search import ensure_search_index, search_supported
+
+
+class Command(BaseCommand):
+    help = "Recreate the full-text search tables and triggers and reindex trips and maintenance logs."
+
+    def handle(self, *args, **options):
+        if not search_supported():
+            raise CommandError("Full-text search indexes are only used on SQLite.")
+        rebuilt = ensure_search_index(rebuild=True)
+        self.stdout.write(self.style.SUCCESS(f"Search indexes rebuilt: {', '.join(rebuilt) or 'none'}."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app1.cache import bump_version
+from app1.models import MaintenanceSchedule
+from app1.scheduler import rebuild_schedule, maintenance_alerts, due_days
+
+
+class Command(BaseCommand):
+    help = "Rebuild the maintenance schedule and list overdue and due-soon maintenance."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Due-soon window in days (default FLEETFLOW_MAINTENANCE_DUE_DAYS).")
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else due_days()
+        rows = rebuild_schedule()
+        bump_version(MaintenanceSchedule)
+
+        today = timezone.now().date()
+        alerts = maintenance_alerts(today, days)
+        for alert in alerts:
+            line = (
+                f"{alert.level.upper():<8} {alert.vehicle.vehicle_number:<20} "
+                f"{alert.get_maintenance_type_display():<16} due {alert.next_due_date}"
+            )
+            self.stdout.write(self.style.ERROR(line) if alert.level == 'overdue' else self.style.WARNING(line))
+
+        overdue = sum(1 for alert in alerts if alert.level == 'overdue')
+        self.stdout.write(self.style.SUCCESS(
+            f"Schedule rebuilt: {rows} row(s); {overdue} overdue, {len(alerts) - overdue} due within {days} days."
+        ))
@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import signal
+import socket
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from app1.jobs import DEFAULT_POLL_SECONDS, work
+
+
+def worker_main(name, poll, once, stop):
+    """
+    Entry point of a forked worker process.
+    """
+    # The parent handles Ctrl+C and tells the workers through ``stop``
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        work(name, poll=poll, once=once, stop=stop)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the jobs table in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None, help="Worker processes (default FLEETFLOW_JOB_WORKERS).")
+        parser.add_argument('--poll', type=float, default=None, help="Seconds an idle worker waits before polling again (default FLEETFLOW_JOB_POLL_SECONDS).")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty instead of waiting for new jobs.")
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes is None:
+            processes = getattr(settings, 'FLEETFLOW_JOB_WORKERS', 1)
+        poll = options['poll']
+        if poll is None:
+            poll = getattr(settings, 'FLEETFLOW_JOB_POLL_SECONDS', DEFAULT_POLL_SECONDS)
+        if processes < 1:
+            raise CommandError("--processes must be at least 1.")
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        if processes == 1:
+            # No pool: run in this process (also what tests use)
+            ran = 0
+            try:
+                ran = work(f"{prefix}:0", poll=poll, once=options['once'])
+            except KeyboardInterrupt:
+                pass
+            self.stdout.write(self.style.SUCCESS(f"Worker stopped after {ran} job(s)."))
+            return
+
+        # Forked children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        workers = [
+            context.Process(target=worker_main, args=(f"{prefix}:{index}", poll, options['once'], stop), daemon=True)
+            for index in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {processes} worker process(es); Ctrl+C to stop.")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping workers after their current job...")
+            stop.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
@@ -0,0 +1,232 @@
+import random
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from app1.cache import bump_version
+from app1.counters import rebuild_counters
+from app1.efficiency import rebuild_efficiency
+from app1.models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog, MonthlyCostRollup, MaintenanceSchedule, VehicleEfficiency, RouteDistance, TelemetryPing, VehiclePosition
+from app1.rollups import rebuild_rollups
+from app1.scheduler import rebuild_schedule
+from app1.transitions import refresh_driver_availability
+
+
+# Seeded history ends on this day unless --anchor says otherwise, so the
+# same seed always produces the same rows
+DEFAULT_ANCHOR = date(2026, 1, 1)
+
+# Tables emptied by --clear, children before the tables they reference
+CLEAR_ORDER = [TelemetryPing, VehiclePosition, RouteDistance, MonthlyCostRollup, MaintenanceSchedule, VehicleEfficiency, FuelLog, MaintenanceLog, Trip, Driver, Vehicle]
+
+LOCATIONS = [
+    'North Depot', 'South Depot', 'East Depot', 'West Depot', 'Central Hub',
+    'Airport Cargo', 'Harbour Terminal', 'Rail Yard', 'Industrial Park', 'City Market',
+    'Distribution Center A', 'Distribution Center B', 'Cold Storage', 'Warehouse 7', 'Border Checkpoint',
+]
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn']
+LAST_NAMES = ['Sharma', 'Singh', 'Patel', 'Garcia', 'Smith', 'Khan', 'Nguyen', 'Okafor', 'Müller', 'Rossi']
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic fleet with bulk inserts and a fixed random seed (for benchmarks)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicles', type=int, default=1000)
+        parser.add_argument('--drivers', type=int, default=None, help="Defaults to the number of vehicles.")
+        parser.add_argument('--trips', type=int, default=100000)
+        parser.add_argument('--fuel-logs', type=int, default=200000)
+        parser.add_argument('--maintenance-logs', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=365, help="History length in days.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--anchor', type=date.fromisoformat, default=DEFAULT_ANCHOR,
+            help=f"Last day of the generated history, YYYY-MM-DD (default {DEFAULT_ANCHOR}).",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--clear', action='store_true', help="Delete existing fleet data first.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = datetime.combine(options['anchor'], datetime.min.time(), tzinfo=dt_timezone.utc)
+        self.days = options['days']
+        drivers = options['drivers'] if options['drivers'] is not None else options['vehicles']
+
+        if options['clear']:
+            self.stdout.write("Deleting existing fleet data...")
+            # Plain DELETEs skip the per-row delete signals (derived tables
+            # are rebuilt below); children go first
+            with transaction.atomic(), connection.cursor() as cursor:
+                for model in CLEAR_ORDER:
+                    cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+        elif Vehicle.objects.exists():
+            raise CommandError("Fleet data already exists; use --clear to replace it.")
+
+        started = time.perf_counter()
+        vehicle_ids = self.seed_vehicles(options['vehicles'])
+        driver_ids = self.seed_drivers(drivers, vehicle_ids)
+        if not vehicle_ids or not driver_ids:
+            raise CommandError("At least one vehicle and one driver are required.")
+        self.seed_trips(options['trips'], vehicle_ids, driver_ids)
+        # Drivers start out available; the ones on the road are not
+        refresh_driver_availability(driver_ids, self.now)
+        self.seed_fuel_logs(options['fuel_logs'], vehicle_ids)
+        self.seed_maintenance_logs(options['maintenance_logs'], vehicle_ids)
+
+        # bulk_create skips the save signals; rebuild derived data once at the end
+        self.stdout.write("Rebuilding counters, rollups, fuel efficiency and the maintenance schedule...")
+        rebuild_counters()
+        rebuild_rollups()
+        rebuild_efficiency()
+        rebuild_schedule()
+        for model in (Vehicle, Driver, Trip, FuelLog, MaintenanceLog, MaintenanceSchedule):
+            bump_version(model)
+
+        self.stdout.write(self.style.SUCCESS(f"Fleet seeded in {time.perf_counter() - started:.1f}s."))
+
+    # ------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------
+
+    def insert(self, model, total, make_row):
+        """
+        Insert ``total`` rows built by ``make_row(index)`` in batches.
+        """
+        done = 0
+        while done < total:
+            count = min(self.batch_size, total - done)
+            with transaction.atomic():
+                model.objects.bulk_create([make_row(done + i) for i in range(count)])
+            done += count
+            self.stdout.write(f"  {model._meta.verbose_name_plural}: {done}/{total}", ending='\r')
+        self.stdout.write('')
+
+    def random_day(self):
+        return (self.now - timedelta(days=self.rng.randrange(self.days))).date()
+
+    def money(self, low, high):
+        return Decimal(self.rng.uniform(low, high)).quantize(Decimal('0.01'))
+
+    # ------------------------------------------------------------
+    # Tables
+    # ------------------------------------------------------------
+
+    def seed_vehicles(self, total):
+        types = [code for code, _ in Vehicle.VEHICLE_TYPES]
+        statuses = ['active'] * 8 + ['inactive', 'maintenance']
+
+        def make_row(index):
+            vehicle_type = self.rng.choice(types)
+            return Vehicle(
+                vehicle_number=f"{vehicle_type[:3].upper()}-{index + 1:06d}",
+                vehicle_type=vehicle_type,
+                capacity=self.money(1, 40),
+                purchase_date=self.random_day() - timedelta(days=self.rng.randrange(3650)),
+                status=self.rng.choice(statuses),
+            )
+
+        self.insert(Vehicle, total, make_row)
+        return list(Vehicle.objects.order_by('id').values_list('id', flat=True))
+
+    def seed_drivers(self, total, vehicle_ids):
+        # Every other driver is assigned a vehicle of their own
+        assignable = iter(vehicle_ids)
+
+        def make_row(index):
+            assigned = next(assignable, None) if index % 2 == 0 else None
+            return Driver(
+                driver_name=f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                phone=f"+91{self.rng.randrange(10**9, 10**10)}",
+                license_number=f"DL-{index + 1:08d}",
+                experience=self.rng.randrange(1, 30),
+                assigned_vehicle_id=assigned,
+            )
+
+        self.insert(Driver, total, make_row)
+        return list(Driver.objects.order_by('id').values_list('id', flat=True))
+
+    def seed_trips(self, total, vehicle_ids, driver_ids):
+        # Trips are laid out in start order and each waits until its
+        # driver and vehicle are free, so no two bookings of either
+        # overlap.  Only a trip still running at the anchor is in
+        # progress (with no end), so each driver and vehicle has at most
+        # one; a trip that cannot start before the anchor stays pending.
+        kinds = ['booked'] * 8 + ['pending', 'cancelled']
+        planned = sorted(self.rng.randrange(self.days * 24 * 60) for _ in range(total))
+        free_at = {}
+        rows = []
+        for minutes in planned:
+            start, end = self.rng.sample(LOCATIONS, 2)
+            kind = self.rng.choice(kinds)
+            vehicle_id = self.rng.choice(vehicle_ids)
+            driver_id = self.rng.choice(driver_ids)
+            start_date = self.now - timedelta(minutes=self.days * 24 * 60 - minutes)
+            duration = timedelta(hours=self.rng.uniform(0.5, 30))
+            end_date = start_date + duration
+            status = kind
+            if kind == 'booked':
+                owners = [('driver', driver_id), ('vehicle', vehicle_id)]
+                start_date = max([start_date] + [free_at[owner] for owner in owners if owner in free_at])
+                end_date = start_date + duration
+                if start_date >= self.now:
+                    status = 'pending'
+                else:
+                    free_at.update(dict.fromkeys(owners, end_date))
+                    status = 'completed' if end_date <= self.now else 'in_progress'
+            rows.append(Trip(
+                vehicle_id=vehicle_id,
+                driver_id=driver_id,
+                start_location=start,
+                end_location=end,
+                distance=self.money(5, 900),
+                status=status,
+                start_date=start_date if status != 'pending' else None,
+                end_date=end_date if status in ('completed', 'cancelled') else None,
+                notes='' if self.rng.random() < 0.8 else f"Load ref {self.rng.randrange(10**6)}",
+            ))
+
+        self.insert(Trip, total, rows.__getitem__)
+
+    def seed_fuel_logs(self, total, vehicle_ids):
+        # Odometers grow with the date at a per-vehicle daily distance, so
+        # readings stay monotonic per vehicle whatever order rows are made in
+        start = (self.now - timedelta(days=self.days)).date()
+        odometers = {
+            vehicle_id: (self.rng.uniform(1000, 200000), self.rng.uniform(50, 600))
+            for vehicle_id in vehicle_ids
+        }
+
+        def make_row(index):
+            vehicle_id = self.rng.choice(vehicle_ids)
+            day = self.random_day()
+            base, daily_km = odometers[vehicle_id]
+            quantity = self.money(10, 400)
+            return FuelLog(
+                vehicle_id=vehicle_id,
+                date=day,
+                fuel_quantity=quantity,
+                cost=(quantity * self.money(0.9, 1.8)).quantize(Decimal('0.01')),
+                odometer_reading=Decimal(base + (day - start).days * daily_km).quantize(Decimal('0.01')),
+            )
+
+        self.insert(FuelLog, total, make_row)
+
+    def seed_maintenance_logs(self, total, vehicle_ids):
+        types = [code for code, _ in MaintenanceLog.MAINTENANCE_TYPES]
+
+        def make_row(index):
+            day = self.random_day()
+            return MaintenanceLog(
+                vehicle_id=self.rng.choice(vehicle_ids),
+                maintenance_type=self.rng.choice(types),
+                date=day,
+                cost=self.money(20, 3000),
+                description='' if self.rng.random() < 0.5 else "Routine service",
+                next_due_date=day + timedelta(days=self.rng.choice([30, 90, 180])) if self.rng.random() < 0.7 else None,
+            )
+
+        self.insert(MaintenanceLog, total, make_row)
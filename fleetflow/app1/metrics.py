@@ -0,0 +1,105 @@
+import threading
+from collections import defaultdict
+
+
+# ============================================================
+# REQUEST METRICS REGISTRY
+# ============================================================
+# In-process totals per url_name, filled by RequestMetricsMiddleware and
+# rendered in Prometheus text format by the /metrics view.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised (in strict mode) when a view issues more SQL queries than its budget.
+    """
+
+
+class RequestMetrics:
+    """
+    Thread-safe per-view request totals.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.views = defaultdict(lambda: {
+                'requests': 0,
+                'errors': 0,
+                'duration': 0.0,
+                'queries': 0,
+                'sql_time': 0.0,
+                'template_time': 0.0,
+                'budget_exceeded': 0,
+                'buckets': [0] * len(DURATION_BUCKETS),
+            })
+
+    def record(self, url_name, status, duration, queries, sql_time, template_time, over_budget=False):
+        with self._lock:
+            view = self.views[url_name]
+            view['requests'] += 1
+            view['errors'] += 1 if status >= 500 else 0
+            view['duration'] += duration
+            view['queries'] += queries
+            view['sql_time'] += sql_time
+            view['template_time'] += template_time
+            view['budget_exceeded'] += 1 if over_budget else 0
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    view['buckets'][index] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {**values, 'buckets': list(values['buckets'])}
+                for name, values in self.views.items()
+            }
+
+
+registry = RequestMetrics()
+
+
+def _line(name, labels, value):
+    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    return f'{name}{{{label_text}}} {value}'
+
+
+def prometheus_text(extra=None):
+    """
+    Render the registry (plus ``extra`` {metric: value} gauges) in the
+    Prometheus text exposition format.
+    """
+    snapshot = registry.snapshot()
+    counters = [
+        ('fleetflow_requests_total', 'requests', 'Requests handled.'),
+        ('fleetflow_request_errors_total', 'errors', 'Requests that returned a 5xx status.'),
+        ('fleetflow_sql_queries_total', 'queries', 'SQL queries issued.'),
+        ('fleetflow_sql_seconds_total', 'sql_time', 'Time spent executing SQL.'),
+        ('fleetflow_template_seconds_total', 'template_time', 'Time spent rendering templates.'),
+        ('fleetflow_query_budget_exceeded_total', 'budget_exceeded', 'Requests over their query budget.'),
+    ]
+    lines = []
+    for metric, key, help_text in counters:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        for view, values in sorted(snapshot.items()):
+            lines.append(_line(metric, {'view': view}, round(values[key], 6)))
+
+    metric = 'fleetflow_request_duration_seconds'
+    lines.append(f'# HELP {metric} Wall time per request.')
+    lines.append(f'# TYPE {metric} histogram')
+    for view, values in sorted(snapshot.items()):
+        for bound, count in zip(DURATION_BUCKETS, values['buckets']):
+            lines.append(_line(f'{metric}_bucket', {'view': view, 'le': bound}, count))
+        lines.append(_line(f'{metric}_bucket', {'view': view, 'le': '+Inf'}, values['requests']))
+        lines.append(_line(f'{metric}_sum', {'view': view}, round(values['duration'], 6)))
+        lines.append(_line(f'{metric}_count', {'view': view}, values['requests']))
+
+    for metric, value in (extra or {}).items():
+        lines.append(f'# TYPE {metric} gauge')
+        lines.append(f'{metric} {value}')
+    return '\n'.join(lines) + '\n'
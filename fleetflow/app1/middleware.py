@@ -0,0 +1,176 @@
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.base import Template
+from django.utils import timezone
+
+from .metrics import registry, QueryBudgetExceeded
+
+
+logger = logging.getLogger('app1.metrics')
+
+# Stats of the request being handled.  A context variable rather than a
+# thread-local so queries run by async views (in sync_to_async threads)
+# and by the parallel query pool are still counted for their request.
+_current = ContextVar('fleetflow_request_stats', default=None)
+
+
+class RequestStats:
+    """
+    Query and render totals for one request; safe to update from the
+    threads that run its queries in parallel.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.render_depth = 0
+
+    def add_query(self, elapsed):
+        with self.lock:
+            self.queries += 1
+            self.sql_time += elapsed
+
+
+# ============================================================
+# SQL TIMING
+# ============================================================
+# The wrapper is attached to every database connection when it is opened
+# (in whichever thread) and only records while a request is active.
+
+def _timed_execute(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(time.perf_counter() - start)
+
+
+def _install_sql_timer(connection):
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+@receiver(connection_created)
+def _time_new_connection(sender, connection, **kwargs):
+    _install_sql_timer(connection)
+
+
+# ============================================================
+# TEMPLATE RENDER TIMING
+# ============================================================
+# Template._render is wrapped once so the outermost render of each
+# request is timed; nested includes/extends are part of that total.
+
+def _install_template_timer():
+    if getattr(Template, '_fleetflow_timed', False):
+        return
+    original = Template._render
+
+    def timed_render(self, context):
+        stats = _current.get()
+        if stats is None or stats.render_depth:
+            return original(self, context)
+        stats.render_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            stats.template_time += time.perf_counter() - start
+            stats.render_depth -= 1
+
+    Template._render = timed_render
+    Template._fleetflow_timed = True
+
+
+# ============================================================
+# REQUEST METRICS MIDDLEWARE
+# ============================================================
+
+class RequestMetricsMiddleware:
+    """
+    Records url_name, wall time, SQL query count, SQL time and template
+    render time for every request, writes them to the 'app1.metrics'
+    log as one JSON object per line and adds them to the /metrics registry.
+
+    Views listed in FLEETFLOW_QUERY_BUDGETS that issue more queries than
+    allowed log a warning, or raise QueryBudgetExceeded when
+    FLEETFLOW_QUERY_BUDGET_STRICT is on (as it is under tests).
+
+    Works in both sync (WSGI) and async (ASGI) stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        _install_template_timer()
+        # Connections opened before the middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            _install_sql_timer(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - start)
+
+    def finish(self, request, response, stats, duration):
+        match = getattr(request, 'resolver_match', None)
+        url_name = (match.url_name if match else None) or 'unresolved'
+        budget = getattr(settings, 'FLEETFLOW_QUERY_BUDGETS', {}).get(url_name)
+        over_budget = budget is not None and stats.queries > budget
+
+        registry.record(
+            url_name, response.status_code, duration,
+            stats.queries, stats.sql_time, stats.template_time, over_budget,
+        )
+        logger.info(json.dumps({
+            'time': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'queries': stats.queries,
+            'sql_ms': round(stats.sql_time * 1000, 3),
+            'template_ms': round(stats.template_time * 1000, 3),
+        }))
+
+        if over_budget:
+            message = f"{url_name} issued {stats.queries} queries (budget {budget})"
+            if getattr(settings, 'FLEETFLOW_QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:26
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def seed_counters(apps, schema_editor):
+    Vehicle = apps.get_model('app1', 'Vehicle')
+    Driver = apps.get_model('app1', 'Driver')
+    Trip = apps.get_model('app1', 'Trip')
+    FuelLog = apps.get_model('app1', 'FuelLog')
+    MaintenanceLog = apps.get_model('app1', 'MaintenanceLog')
+    FleetCounter = apps.get_model('app1', 'FleetCounter')
+
+    vehicles = Vehicle.objects.aggregate(total=Count('id'), active=Count('id', filter=Q(status='active')))
+    drivers = Driver.objects.aggregate(total=Count('id'), available=Count('id', filter=Q(is_available=True)))
+    trips = Trip.objects.aggregate(total=Count('id'), completed=Count('id', filter=Q(status='completed')))
+    values = {
+        'total_vehicles': vehicles['total'],
+        'active_vehicles': vehicles['active'],
+        'total_drivers': drivers['total'],
+        'available_drivers': drivers['available'],
+        'total_trips': trips['total'],
+        'completed_trips': trips['completed'],
+        'total_fuel_cost': FuelLog.objects.aggregate(total=Sum('cost'))['total'] or 0,
+        'total_maintenance_cost': MaintenanceLog.objects.aggregate(total=Sum('cost'))['total'] or 0,
+    }
+    FleetCounter.objects.bulk_create(
+        [FleetCounter(name=name, value=value) for name, value in values.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FleetCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Fleet Counters',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
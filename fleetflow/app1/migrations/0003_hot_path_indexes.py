@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0002_fleetcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['is_available'], name='driver_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['-created_at', '-id'], name='driver_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fuellog',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='fuellog_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fuellog',
+            index=models.Index(fields=['vehicle', '-date', '-created_at'], name='fuellog_vehicle_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='maint_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['vehicle', '-date', '-created_at'], name='maint_vehicle_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(condition=models.Q(('next_due_date__isnull', False)), fields=['next_due_date'], name='maint_next_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['status'], name='trip_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['-created_at', '-id'], name='trip_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['vehicle', '-created_at'], name='trip_vehicle_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['status'], name='vehicle_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['-created_at', '-id'], name='vehicle_created_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    MonthlyCostRollup = apps.get_model('app1', 'MonthlyCostRollup')
+    sources = [
+        ('fuel', apps.get_model('app1', 'FuelLog'), True),
+        ('maintenance', apps.get_model('app1', 'MaintenanceLog'), False),
+    ]
+    rows = []
+    for category, model, has_quantity in sources:
+        totals = {'total_cost': Sum('cost'), 'entries': Count('id')}
+        if has_quantity:
+            totals['total_quantity'] = Sum('fuel_quantity')
+        grouped = model.objects.annotate(month=TruncMonth('date')).values('vehicle_id', 'month').annotate(**totals).order_by()
+        for row in grouped:
+            rows.append(MonthlyCostRollup(
+                vehicle_id=row['vehicle_id'], month=row['month'], category=category,
+                total_cost=row['total_cost'] or 0, total_quantity=row.get('total_quantity') or 0,
+                entries=row['entries'],
+            ))
+    MonthlyCostRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCostRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('category', models.CharField(choices=[('fuel', 'Fuel'), ('maintenance', 'Maintenance')], max_length=20)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_quantity', models.DecimalField(decimal_places=2, default=0, help_text='Fuel liters; 0 for maintenance', max_digits=14)),
+                ('entries', models.IntegerField(default=0)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_costs', to='app1.vehicle')),
+            ],
+            options={
+                'verbose_name_plural': 'Monthly Cost Rollups',
+                'ordering': ['-month', 'category'],
+                'indexes': [models.Index(fields=['month', 'category'], name='rollup_month_category_idx')],
+                'constraints': [models.UniqueConstraint(fields=('vehicle', 'month', 'category'), name='unique_monthly_cost_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
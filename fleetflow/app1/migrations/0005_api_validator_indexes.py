@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0004_monthlycostrollup'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='driver_available_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trip',
+            name='trip_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='vehicle',
+            name='vehicle_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['is_available', 'updated_at'], name='driver_available_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['status', 'updated_at'], name='trip_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['status', 'updated_at'], name='vehicle_status_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_schedule(apps, schema_editor):
+    MaintenanceLog = apps.get_model('app1', 'MaintenanceLog')
+    MaintenanceSchedule = apps.get_model('app1', 'MaintenanceSchedule')
+    rows = []
+    previous = None
+    logs = MaintenanceLog.objects.order_by('vehicle_id', 'maintenance_type', '-date', '-created_at', '-id').values_list(
+        'id', 'vehicle_id', 'maintenance_type', 'date', 'next_due_date',
+    )
+    for log_id, vehicle_id, maintenance_type, log_date, next_due_date in logs.iterator():
+        if (vehicle_id, maintenance_type) == previous:
+            continue
+        previous = (vehicle_id, maintenance_type)
+        rows.append(MaintenanceSchedule(
+            vehicle_id=vehicle_id, maintenance_type=maintenance_type, log_id=log_id,
+            last_service_date=log_date, next_due_date=next_due_date,
+        ))
+    MaintenanceSchedule.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0005_api_validator_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('maintenance_type', models.CharField(choices=[('oil_change', 'Oil Change'), ('tire_rotation', 'Tire Rotation'), ('brake_service', 'Brake Service'), ('engine_service', 'Engine Service'), ('general_checkup', 'General Checkup'), ('other', 'Other')], max_length=50)),
+                ('last_service_date', models.DateField()),
+                ('next_due_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Maintenance Schedule',
+                'ordering': ['next_due_date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['vehicle', 'maintenance_type', '-date', '-created_at', '-id'], name='maint_vehicle_type_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='maintenanceschedule',
+            name='log',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='schedule', to='app1.maintenancelog'),
+        ),
+        migrations.AddField(
+            model_name='maintenanceschedule',
+            name='vehicle',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='maintenance_schedule', to='app1.vehicle'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceschedule',
+            index=models.Index(condition=models.Q(('next_due_date__isnull', False)), fields=['next_due_date'], name='schedule_next_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='maintenanceschedule',
+            constraint=models.UniqueConstraint(fields=('vehicle', 'maintenance_type'), name='unique_maintenance_schedule'),
+        ),
+        migrations.RunPython(backfill_schedule, migrations.RunPython.noop),
+    ]
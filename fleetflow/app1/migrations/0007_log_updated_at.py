@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    for name in ['FuelLog', 'MaintenanceLog']:
+        apps.get_model('app1', name).objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0006_maintenanceschedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fuellog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='maintenancelog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:09
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0007_log_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(django.db.models.functions.text.Upper('driver_name'), name='driver_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(django.db.models.functions.text.Upper('license_number'), name='driver_license_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(django.db.models.functions.text.Upper('vehicle_number'), name='vehicle_number_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0008_autocomplete_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['driver', 'end_date', 'start_date'], name='trip_driver_window_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['vehicle', 'end_date', 'start_date'], name='trip_vehicle_window_idx'),
+        ),
+    ]
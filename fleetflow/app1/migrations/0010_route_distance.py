@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:25
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0009_trip_window_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteDistance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin', models.CharField(max_length=200)),
+                ('destination', models.CharField(max_length=200)),
+                ('distance', models.DecimalField(decimal_places=2, help_text='Distance in km', max_digits=10)),
+                ('source', models.CharField(help_text='Backend that supplied the distance', max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Route Distances',
+                'ordering': ['origin', 'destination'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(django.db.models.functions.text.Upper('start_location'), django.db.models.functions.text.Upper('end_location'), models.OrderBy(models.F('created_at'), descending=True), name='trip_lane_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='routedistance',
+            constraint=models.UniqueConstraint(fields=('origin', 'destination'), name='unique_route_distance'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0010_route_distance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehiclePosition',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='position', serialize=False, to='app1.vehicle')),
+                ('recorded_at', models.DateTimeField()),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('speed', models.FloatField(blank=True, help_text='Speed in km/h', null=True)),
+                ('heading', models.FloatField(blank=True, help_text='Degrees clockwise from north', null=True)),
+                ('trip', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='app1.trip')),
+            ],
+            options={
+                'verbose_name_plural': 'Vehicle Positions',
+                'ordering': ['vehicle_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TelemetryPing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='UTC date of recorded_at')),
+                ('recorded_at', models.DateTimeField()),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('speed', models.FloatField(blank=True, help_text='Speed in km/h', null=True)),
+                ('heading', models.FloatField(blank=True, help_text='Degrees clockwise from north', null=True)),
+                ('trip', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pings', to='app1.trip')),
+                ('vehicle', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='pings', to='app1.vehicle')),
+            ],
+            options={
+                'verbose_name_plural': 'Telemetry Pings',
+                'ordering': ['-recorded_at'],
+                'indexes': [models.Index(fields=['vehicle', 'recorded_at'], name='ping_vehicle_recorded_idx'), models.Index(fields=['day'], name='ping_day_idx')],
+            },
+        ),
+    ]
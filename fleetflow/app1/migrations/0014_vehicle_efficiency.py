@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:38
+
+import django.db.models.deletion
+import numpy as np
+from django.db import migrations, models
+
+
+def backfill_efficiency(apps, schema_editor):
+    from app1.efficiency import compute_efficiency
+
+    FuelLog = apps.get_model('app1', 'FuelLog')
+    VehicleEfficiency = apps.get_model('app1', 'VehicleEfficiency')
+    rows = list(
+        FuelLog.objects.filter(odometer_reading__isnull=False)
+        .order_by('vehicle_id', 'date', 'created_at')
+        .values_list('vehicle_id', 'odometer_reading', 'fuel_quantity', 'cost')
+    )
+    if not rows:
+        return
+    vehicle_ids, odometer, quantity, cost = (np.array(column, dtype=float) for column in zip(*rows))
+    figures = compute_efficiency(vehicle_ids.astype(np.int64), odometer, quantity, cost)
+    VehicleEfficiency.objects.bulk_create(
+        [VehicleEfficiency(vehicle_id=vehicle_id, **values) for vehicle_id, values in figures.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0013_trip_start_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleEfficiency',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='efficiency', serialize=False, to='app1.vehicle')),
+                ('intervals', models.PositiveIntegerField(help_text='Fill-to-fill intervals counted')),
+                ('distance', models.FloatField(help_text='Distance in km')),
+                ('fuel_quantity', models.FloatField()),
+                ('fuel_cost', models.FloatField()),
+                ('km_per_litre', models.FloatField(blank=True, null=True)),
+                ('cost_per_km', models.FloatField(blank=True, null=True)),
+                ('rolling_km_per_litre', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Vehicle Efficiency',
+                'ordering': ['-cost_per_km', 'vehicle_id'],
+                'indexes': [models.Index(fields=['-cost_per_km', 'vehicle'], name='efficiency_cost_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_efficiency, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:52
+
+import app1.models
+from django.db import migrations, models
+
+
+def backfill_lanes(apps, schema_editor):
+    # One UPDATE per distinct location: lanes repeat far more than trips
+    Trip = apps.get_model('app1', 'Trip')
+    for source, target in (('start_location', 'lane_origin'), ('end_location', 'lane_destination')):
+        for location in Trip.objects.order_by().values_list(source, flat=True).distinct():
+            Trip.objects.filter(**{source: location}).update(**{target: app1.models.normalize_location(location)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0015_replica_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='trip',
+            name='trip_lane_idx',
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='lane_destination',
+            field=app1.models.NormalizedLocationField(default='', max_length=200, source='end_location'),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='lane_origin',
+            field=app1.models.NormalizedLocationField(default='', max_length=200, source='start_location'),
+        ),
+        migrations.RunPython(backfill_lanes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['lane_origin', 'lane_destination', '-created_at'], name='trip_lane_idx'),
+        ),
+    ]
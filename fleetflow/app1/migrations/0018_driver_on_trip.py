@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:05
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def mark_drivers_on_trip(apps, schema_editor):
+    # Unavailable drivers with a trip in progress were made so by the trip
+    # state machine, as far as can be told now
+    Driver = apps.get_model('app1', 'Driver')
+    Trip = apps.get_model('app1', 'Trip')
+    in_progress = Exists(Trip.objects.filter(driver=OuterRef('pk'), status='in_progress'))
+    Driver.objects.filter(in_progress, is_available=False).update(on_trip=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0017_job_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driver',
+            name='on_trip',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_drivers_on_trip, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:06
+
+import app1.models
+from django.db import migrations, models
+
+
+SEARCH_KEYS = {
+    'Vehicle': {'vehicle_number_key': 'vehicle_number'},
+    'Driver': {'driver_name_key': 'driver_name', 'license_number_key': 'license_number'},
+}
+
+
+def backfill_search_keys(apps, schema_editor):
+    # Vehicles and drivers are few next to trips; a bulk_update will do
+    for model_name, keys in SEARCH_KEYS.items():
+        model = apps.get_model('app1', model_name)
+        rows = list(model.objects.only('pk', *keys.values()))
+        for row in rows:
+            for key, source in keys.items():
+                setattr(row, key, app1.models.normalize_search_key(getattr(row, source)))
+        model.objects.bulk_update(rows, list(keys), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0018_driver_on_trip'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='driver_name_upper_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='driver_license_upper_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='vehicle',
+            name='vehicle_number_upper_idx',
+        ),
+        migrations.AddField(
+            model_name='driver',
+            name='driver_name_key',
+            field=app1.models.SearchKeyField(default='', max_length=200, source='driver_name'),
+        ),
+        migrations.AddField(
+            model_name='driver',
+            name='license_number_key',
+            field=app1.models.SearchKeyField(default='', max_length=50, source='license_number'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='vehicle_number_key',
+            field=app1.models.SearchKeyField(default='', max_length=50, source='vehicle_number'),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['driver_name_key'], name='driver_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['license_number_key'], name='driver_license_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['vehicle_number_key'], name='vehicle_number_key_idx'),
+        ),
+    ]
@@ -1,5 +1,56 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+def normalize_location(text):
+    """
+    A location with spacing collapsed and upper-cased, so "north depot "
+    and "North  Depot" (or "zürich" and "ZÜRICH") are the same place.
+    """
+    return ' '.join((text or '').split()).upper()
+
+
+def normalize_search_key(text):
+    """
+    Text upper-cased with Python's full Unicode case mapping, so "müller"
+    and "MÜLLER" share a prefix-search key.
+    """
+    return (text or '').upper()
+
+
+class NormalizedLocationField(models.CharField):
+    """
+    Read-only copy of another field of the row passed through
+    normalize_location().  Like auto_now it is filled in Python on every
+    save() and bulk_create(), so it matches lookups normalized the same
+    way; SQL UPPER() (ASCII only on SQLite) is never involved.
+    """
+    normalize = staticmethod(normalize_location)
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs['editable'] = False
+        super().__init__(*args, **kwargs)
+    
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        del kwargs['editable']
+        return name, path, args, kwargs
+    
+    def pre_save(self, model_instance, add):
+        value = self.normalize(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class SearchKeyField(NormalizedLocationField):
+    """
+    Read-only copy of another field passed through normalize_search_key(),
+    indexed for case-insensitive prefix search (autocomplete, admin).
+    """
+    normalize = staticmethod(normalize_search_key)
 
 
 # ============================================================
@@ -26,6 +77,7 @@ class Vehicle(models.Model):
     ]
     
     vehicle_number = models.CharField(max_length=50, unique=True, help_text="Unique vehicle identifier")
+    vehicle_number_key = SearchKeyField(max_length=50, source='vehicle_number', default='')
     vehicle_type = models.CharField(max_length=20, choices=VEHICLE_TYPES, default='truck')
     capacity = models.DecimalField(max_digits=10, decimal_places=2, help_text="Capacity in tons or liters")
     purchase_date = models.DateField(null=True, blank=True)
@@ -36,6 +88,12 @@ class Vehicle(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Vehicles"
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='vehicle_status_updated_idx'),
+            models.Index(fields=['-created_at', '-id'], name='vehicle_created_idx'),
+            # Case-insensitive prefix search (autocomplete)
+            models.Index(fields=['vehicle_number_key'], name='vehicle_number_key_idx'),
+        ]
     
     def __str__(self):
         return f"{self.vehicle_number} - {self.get_vehicle_type_display()}"
@@ -55,15 +113,27 @@ class Driver(models.Model):
     driver_name = models.CharField(max_length=200, help_text="Full name of the driver")
     phone = models.CharField(max_length=20, help_text="Phone number")
     license_number = models.CharField(max_length=50, unique=True, help_text="Driver's license number")
+    # Prefix-search keys of the name and licence
+    driver_name_key = SearchKeyField(max_length=200, source='driver_name', default='')
+    license_number_key = SearchKeyField(max_length=50, source='license_number', default='')
     experience = models.IntegerField(help_text="Years of driving experience")
     assigned_vehicle = models.OneToOneField(Vehicle, on_delete=models.SET_NULL, null=True, blank=True, related_name='driver')
     is_available = models.BooleanField(default=True)
+    # Set while a trip in progress, not a manager, made the driver unavailable
+    on_trip = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Drivers"
+        indexes = [
+            models.Index(fields=['is_available', 'updated_at'], name='driver_available_updated_idx'),
+            models.Index(fields=['-created_at', '-id'], name='driver_created_idx'),
+            # Case-insensitive prefix search (autocomplete)
+            models.Index(fields=['driver_name_key'], name='driver_name_key_idx'),
+            models.Index(fields=['license_number_key'], name='driver_license_key_idx'),
+        ]
     
     def __str__(self):
         return self.driver_name
@@ -88,6 +158,9 @@ class Trip(models.Model):
     driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='trips')
     start_location = models.CharField(max_length=200)
     end_location = models.CharField(max_length=200)
+    # The lane the route service looks distances up by
+    lane_origin = NormalizedLocationField(max_length=200, source='start_location', default='')
+    lane_destination = NormalizedLocationField(max_length=200, source='end_location', default='')
     distance = models.DecimalField(max_digits=10, decimal_places=2, help_text="Distance in km")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     start_date = models.DateTimeField(null=True, blank=True)
@@ -99,6 +172,16 @@ class Trip(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Trips"
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='trip_status_updated_idx'),
+            models.Index(fields=['-created_at', '-id'], name='trip_created_idx'),
+            models.Index(fields=['vehicle', '-created_at'], name='trip_vehicle_created_idx'),
+            models.Index(fields=['-start_date', '-id'], name='trip_start_idx'),
+            models.Index(fields=['vehicle', '-start_date', '-id'], name='trip_vehicle_start_idx'),
+            models.Index(fields=['driver', 'end_date', 'start_date'], name='trip_driver_window_idx'),
+            models.Index(fields=['vehicle', 'end_date', 'start_date'], name='trip_vehicle_window_idx'),
+            models.Index(fields=['lane_origin', 'lane_destination', '-created_at'], name='trip_lane_idx'),
+        ]
     
     def __str__(self):
         return f"Trip #{self.id} - {self.start_location} to {self.end_location}"
@@ -117,10 +200,15 @@ class FuelLog(models.Model):
     cost = models.DecimalField(max_digits=10, decimal_places=2, help_text="Total cost")
     odometer_reading = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Odometer reading in km")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date', '-created_at']
         verbose_name_plural = "Fuel Logs"
+        indexes = [
+            models.Index(fields=['-date', '-created_at', '-id'], name='fuellog_date_idx'),
+            models.Index(fields=['vehicle', '-date', '-created_at'], name='fuellog_vehicle_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.vehicle.vehicle_number} - {self.date} - ${self.cost}"
@@ -150,10 +238,21 @@ class MaintenanceLog(models.Model):
     description = models.TextField(blank=True, null=True)
     next_due_date = models.DateField(null=True, blank=True, help_text="Next maintenance due date")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date', '-created_at']
         verbose_name_plural = "Maintenance Logs"
+        indexes = [
+            models.Index(fields=['-date', '-created_at', '-id'], name='maint_date_idx'),
+            models.Index(fields=['vehicle', '-date', '-created_at'], name='maint_vehicle_date_idx'),
+            models.Index(fields=['vehicle', 'maintenance_type', '-date', '-created_at', '-id'], name='maint_vehicle_type_date_idx'),
+            models.Index(
+                fields=['next_due_date'],
+                name='maint_next_due_idx',
+                condition=models.Q(next_due_date__isnull=False),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.vehicle.vehicle_number} - {self.get_maintenance_type_display()} - {self.date}"
@@ -164,3 +263,285 @@ class MaintenanceLog(models.Model):
         if self.next_due_date:
             return self.next_due_date <= timezone.now().date()
         return False
+
+
+# ============================================================
+# FLEET COUNTER MODEL
+# ============================================================
+class FleetCounter(models.Model):
+    """
+    Running dashboard totals, one row per counter, kept up to date by
+    the signal handlers in signals.py.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = "Fleet Counters"
+    
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+# ============================================================
+# MONTHLY COST ROLLUP MODEL
+# ============================================================
+class MonthlyCostRollup(models.Model):
+    """
+    Fuel and maintenance totals per vehicle per month, kept up to date
+    by the signal handlers in signals.py.
+    """
+    CATEGORY_CHOICES = [
+        ('fuel', 'Fuel'),
+        ('maintenance', 'Maintenance'),
+    ]
+    
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='monthly_costs')
+    month = models.DateField(help_text="First day of the month")
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_quantity = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Fuel liters; 0 for maintenance")
+    entries = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-month', 'category']
+        verbose_name_plural = "Monthly Cost Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=['vehicle', 'month', 'category'], name='unique_monthly_cost_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'category'], name='rollup_month_category_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.vehicle_id} - {self.month:%Y-%m} - {self.category}"
+
+
+# ============================================================
+# MAINTENANCE SCHEDULE MODEL
+# ============================================================
+class MaintenanceSchedule(models.Model):
+    """
+    The current (most recent) maintenance log for each vehicle and
+    maintenance type; older logs of the same type are superseded.  Kept
+    up to date by the signal handlers in signals.py and rebuilt by
+    ``manage.py run_maintenance_scan``.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='maintenance_schedule')
+    maintenance_type = models.CharField(max_length=50, choices=MaintenanceLog.MAINTENANCE_TYPES)
+    log = models.OneToOneField(MaintenanceLog, on_delete=models.CASCADE, related_name='schedule')
+    last_service_date = models.DateField()
+    next_due_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['next_due_date']
+        verbose_name_plural = "Maintenance Schedule"
+        constraints = [
+            models.UniqueConstraint(fields=['vehicle', 'maintenance_type'], name='unique_maintenance_schedule'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['next_due_date'],
+                name='schedule_next_due_idx',
+                condition=models.Q(next_due_date__isnull=False),
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.vehicle_id} - {self.get_maintenance_type_display()} - due {self.next_due_date}"
+
+
+# ============================================================
+# VEHICLE EFFICIENCY MODEL
+# ============================================================
+class VehicleEfficiency(models.Model):
+    """
+    Fuel efficiency of one vehicle over its whole fuel history, as
+    computed by efficiency.py.  Refreshed for the affected vehicles by
+    the signal handlers in signals.py whenever fuel logs change, so
+    reports read one row per vehicle instead of the fuel history.
+    """
+    vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE, primary_key=True, related_name='efficiency')
+    intervals = models.PositiveIntegerField(help_text="Fill-to-fill intervals counted")
+    distance = models.FloatField(help_text="Distance in km")
+    fuel_quantity = models.FloatField()
+    fuel_cost = models.FloatField()
+    km_per_litre = models.FloatField(null=True, blank=True)
+    cost_per_km = models.FloatField(null=True, blank=True)
+    rolling_km_per_litre = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-cost_per_km', 'vehicle_id']
+        verbose_name_plural = "Vehicle Efficiency"
+        indexes = [
+            models.Index(fields=['-cost_per_km', 'vehicle'], name='efficiency_cost_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.vehicle_id}: {self.km_per_litre} km/L"
+
+
+# ============================================================
+# ROUTE DISTANCE MODEL
+# ============================================================
+class RouteDistance(models.Model):
+    """
+    Known distance of a lane (normalized start and end location), filled
+    in by the route service in routes.py and cleared by the signal
+    handlers in signals.py when trips on the lane change.
+    """
+    origin = models.CharField(max_length=200)
+    destination = models.CharField(max_length=200)
+    distance = models.DecimalField(max_digits=10, decimal_places=2, help_text="Distance in km")
+    source = models.CharField(max_length=50, help_text="Backend that supplied the distance")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['origin', 'destination']
+        verbose_name_plural = "Route Distances"
+        constraints = [
+            models.UniqueConstraint(fields=['origin', 'destination'], name='unique_route_distance'),
+        ]
+    
+    def __str__(self):
+        return f"{self.origin} -> {self.destination}: {self.distance} km"
+
+
+# ============================================================
+# TELEMETRY MODELS
+# ============================================================
+class TelemetryPing(models.Model):
+    """
+    One GPS fix reported by a vehicle tracker.  Rows are only ever
+    inserted (in batches, by telemetry.py) and removed a whole day at a
+    time by prune_telemetry; ``day`` is the partition key.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='pings', db_index=False)
+    trip = models.ForeignKey(Trip, on_delete=models.SET_NULL, null=True, blank=True, related_name='pings')
+    day = models.DateField(help_text="UTC date of recorded_at")
+    recorded_at = models.DateTimeField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    speed = models.FloatField(null=True, blank=True, help_text="Speed in km/h")
+    heading = models.FloatField(null=True, blank=True, help_text="Degrees clockwise from north")
+    
+    class Meta:
+        ordering = ['-recorded_at']
+        verbose_name_plural = "Telemetry Pings"
+        indexes = [
+            # Also serves the vehicle foreign key (cascading deletes)
+            models.Index(fields=['vehicle', 'recorded_at'], name='ping_vehicle_recorded_idx'),
+            models.Index(fields=['day'], name='ping_day_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.vehicle_id} @ {self.recorded_at}: {self.latitude}, {self.longitude}"
+
+
+class VehiclePosition(models.Model):
+    """
+    Newest telemetry fix of each vehicle, upserted with every ingested
+    batch so "where is everyone" reads one row per vehicle.
+    """
+    vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE, primary_key=True, related_name='position')
+    trip = models.ForeignKey(Trip, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    recorded_at = models.DateTimeField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    speed = models.FloatField(null=True, blank=True, help_text="Speed in km/h")
+    heading = models.FloatField(null=True, blank=True, help_text="Degrees clockwise from north")
+    
+    class Meta:
+        ordering = ['vehicle_id']
+        verbose_name_plural = "Vehicle Positions"
+    
+    def __str__(self):
+        return f"{self.vehicle_id} @ {self.recorded_at}: {self.latitude}, {self.longitude}"
+
+
+# ============================================================
+# BACKGROUND JOB MODEL
+# ============================================================
+class Job(models.Model):
+    """
+    A unit of background work, queued by the views and run by
+    `manage.py run_workers` (see jobs.py).
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=50, help_text="Name of a JOB_HANDLERS entry")
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time")
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    progress_message = models.CharField(max_length=200, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    checkpoint = models.JSONField(null=True, blank=True, help_text="Handler state kept across attempts, e.g. how far an import got")
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = "Jobs"
+        indexes = [
+            # Claiming the next job and finding stalled ones
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Job #{self.id} - {self.kind} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+    
+    @property
+    def error_summary(self):
+        """
+        Last line of the stored traceback (the exception itself).
+        """
+        lines = self.error.strip().splitlines()
+        return lines[-1] if lines else ''
+    
+    @property
+    def percent(self):
+        if self.status == 'succeeded':
+            return 100
+        if not self.progress_total:
+            return None
+        return min(100, self.progress_done * 100 // self.progress_total)
+
+
+# ============================================================
+# REPLICA HEARTBEAT MODEL
+# ============================================================
+class ReplicaHeartbeat(models.Model):
+    """
+    Single row stamped on the primary by `manage.py sync_replica` just
+    before each copy.  Read back on the replica, it tells how far the
+    replica trails the primary (see routers.py).
+    """
+    beat_at = models.DateTimeField()
+    
+    class Meta:
+        verbose_name_plural = "Replica Heartbeat"
+    
+    def __str__(self):
+        return f"Replica heartbeat @ {self.beat_at}"
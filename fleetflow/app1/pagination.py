@@ -0,0 +1,217 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# ============================================================
+# KEYSET (CURSOR) PAGINATION
+# ============================================================
+# Pages are located by the ordering values of the last (or first) row
+# shown, e.g. "created_at < X OR (created_at = X AND id < Y)", so every
+# page costs one indexed range query no matter how deep it is.  The
+# ordering fields must be non-nullable; the primary key is appended as
+# a tie-breaker so the order is total.
+
+DEFAULT_PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    """
+    One page of results plus the cursors needed to move either way.
+    """
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def get_ordering(queryset):
+    """
+    The queryset's ordering as [(field_name, descending), ...] with the
+    primary key appended as a tie-breaker.
+    """
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    pk_name = queryset.model._meta.pk.name
+    fields = []
+    for item in ordering:
+        if not isinstance(item, str):
+            raise ValueError("Keyset pagination only supports plain field orderings.")
+        descending = item.startswith('-')
+        name = item.lstrip('-')
+        if name == 'pk':
+            name = pk_name
+        fields.append((name, descending))
+    if pk_name not in [name for name, _ in fields]:
+        last_descending = fields[-1][1] if fields else False
+        fields.append((pk_name, last_descending))
+    return fields
+
+
+def encode_cursor(obj, ordering):
+    values = []
+    for name, _ in ordering:
+        value = getattr(obj, name)
+        values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError
+        return [
+            model._meta.get_field(name).to_python(value)
+            for (name, _), value in zip(ordering, values)
+        ]
+    except Exception as exc:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from exc
+
+
+def _after(ordering, values):
+    """
+    Q matching rows that come strictly after ``values`` in ``ordering``.
+    """
+    condition = Q()
+    equal = Q()
+    for (name, descending), value in zip(ordering, values):
+        lookup = 'lt' if descending else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    # Redundant bound on the leading column lets the database turn the
+    # OR chain into an index range search instead of a filtered scan
+    name, descending = ordering[0]
+    bound = Q(**{f"{name}__{'lte' if descending else 'gte'}": values[0]})
+    return bound & condition
+
+
+def paginate(queryset, after=None, before=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return the page following ``after`` or preceding ``before``
+    (the first page when neither is given).
+    """
+    ordering = get_ordering(queryset)
+    order_by = [f"-{name}" if descending else name for name, descending in ordering]
+
+    if before:
+        values = decode_cursor(before, queryset.model, ordering)
+        reversed_ordering = [(name, not descending) for name, descending in ordering]
+        reversed_order_by = [f"-{name}" if descending else name for name, descending in reversed_ordering]
+        rows = list(
+            queryset.filter(_after(reversed_ordering, values))
+            .order_by(*reversed_order_by)[:page_size + 1]
+        )
+        has_previous = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_next = True
+    else:
+        if after:
+            values = decode_cursor(after, queryset.model, ordering)
+            queryset = queryset.filter(_after(ordering, values))
+        rows = list(queryset.order_by(*order_by)[:page_size + 1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_previous = bool(after)
+
+    return KeysetPage(
+        rows,
+        has_next=has_next and bool(rows),
+        has_previous=has_previous and bool(rows),
+        next_cursor=encode_cursor(rows[-1], ordering) if rows else None,
+        previous_cursor=encode_cursor(rows[0], ordering) if rows else None,
+    )
+
+
+def paginate_request(request, queryset, page_size=None):
+    """
+    Paginate using the ``after``/``before`` query parameters.
+    An invalid cursor falls back to the first page.
+    """
+    if page_size is None:
+        page_size = getattr(settings, 'FLEETFLOW_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    try:
+        return paginate(
+            queryset,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            page_size=page_size,
+        )
+    except InvalidCursor:
+        return paginate(queryset, page_size=page_size)
+
+
+# ============================================================
+# ESTIMATED COUNTS
+# ============================================================
+# Numbered pagination (the admin changelists) needs a total, and an
+# exact COUNT(*) reads every matching row.  Counting stops after
+# COUNT_LIMIT rows instead: smaller results are counted exactly, an
+# unfiltered table past the limit reports the database's own row
+# estimate, and a filtered result past the limit is shown as
+# COUNT_LIMIT rows, so its pages end there and the user narrows the
+# filter or search.
+
+COUNT_LIMIT = 10_000
+
+
+def estimated_row_count(model, using='default'):
+    """
+    The database's estimate of how many rows ``model`` has, read without
+    scanning the table, or None when there is no cheap estimate.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == 'sqlite':
+            # Integer primary keys are rowids, so both ends come straight
+            # from the table b-tree; deleted rows make this an overestimate
+            table = connection.ops.quote_name(table)
+            cursor.execute(f"SELECT (SELECT MAX(rowid) FROM {table}) - (SELECT MIN(rowid) FROM {table}) + 1")
+        else:
+            return None
+        row = cursor.fetchone()
+    # reltuples is -1 until PostgreSQL has analyzed the table
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose count reads at most COUNT_LIMIT + 1 rows.
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        count = queryset.order_by()[:COUNT_LIMIT + 1].count()
+        if count <= COUNT_LIMIT:
+            return count
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None:
+                return max(estimate, count)
+        return COUNT_LIMIT
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction, IntegrityError
+from django.db.models import Sum, Count, F, Value, DecimalField
+from django.db.models.functions import TruncMonth
+
+from .models import FuelLog, MaintenanceLog, MonthlyCostRollup
+from .stats import round_total
+
+
+# ============================================================
+# MONTHLY COST ROLLUPS
+# ============================================================
+# Each fuel or maintenance log adds its cost (and fuel quantity) to one
+# (vehicle, month, category) row.  Saves, edits and deletes apply the
+# difference to the affected rows, so reports read monthly trends from
+# this small table instead of grouping the raw logs.
+
+CATEGORY_MODELS = {
+    'fuel': FuelLog,
+    'maintenance': MaintenanceLog,
+}
+
+
+def _decimal(value):
+    return Decimal(str(value or 0))
+
+
+def rollup_entries(instance):
+    """
+    {(vehicle_id, month, category): (cost, quantity, entries)} for one log.
+    """
+    if isinstance(instance, FuelLog):
+        category, quantity = 'fuel', _decimal(instance.fuel_quantity)
+    elif isinstance(instance, MaintenanceLog):
+        category, quantity = 'maintenance', Decimal('0')
+    else:
+        return {}
+    # The instance may hold the value it was created with, e.g. a string
+    log_date = instance._meta.get_field('date').to_python(instance.date)
+    if log_date is None or instance.vehicle_id is None:
+        return {}
+    month = log_date.replace(day=1)
+    return {(instance.vehicle_id, month, category): (_decimal(instance.cost), quantity, 1)}
+
+
+def rollup_diff(old, new):
+    """
+    Per-row difference between two rollup_entries() results (or sums of them).
+    """
+    deltas = {}
+    for key in set(old) | set(new):
+        old_cost, old_quantity, old_entries = old.get(key, (0, 0, 0))
+        new_cost, new_quantity, new_entries = new.get(key, (0, 0, 0))
+        delta = (new_cost - old_cost, new_quantity - old_quantity, new_entries - old_entries)
+        if any(delta):
+            deltas[key] = delta
+    return deltas
+
+
+def sum_entries(instances):
+    """
+    Combined rollup_entries() for many logs, e.g. a bulk_create batch.
+    """
+    totals = defaultdict(lambda: (Decimal('0'), Decimal('0'), 0))
+    for instance in instances:
+        for key, (cost, quantity, entries) in rollup_entries(instance).items():
+            total_cost, total_quantity, total_entries = totals[key]
+            totals[key] = (total_cost + cost, total_quantity + quantity, total_entries + entries)
+    return dict(totals)
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Add the given deltas to their rollup rows in one transaction,
+    creating rows as needed and dropping rows that become empty.
+    """
+    if not deltas:
+        return
+    with transaction.atomic():
+        for (vehicle_id, month, category), (cost, quantity, entries) in deltas.items():
+            rows = MonthlyCostRollup.objects.filter(vehicle_id=vehicle_id, month=month, category=category)
+            updated = rows.update(
+                total_cost=F('total_cost') + cost,
+                total_quantity=F('total_quantity') + quantity,
+                entries=F('entries') + entries,
+            )
+            if not updated and entries > 0:
+                try:
+                    with transaction.atomic():
+                        MonthlyCostRollup.objects.create(
+                            vehicle_id=vehicle_id, month=month, category=category,
+                            total_cost=cost, total_quantity=quantity, entries=entries,
+                        )
+                except IntegrityError:
+                    # Another writer created the row first
+                    rows.update(
+                        total_cost=F('total_cost') + cost,
+                        total_quantity=F('total_quantity') + quantity,
+                        entries=F('entries') + entries,
+                    )
+            elif entries < 0:
+                rows.filter(entries__lte=0).delete()
+
+
+def rebuild_rollups():
+    """
+    Recompute the whole rollup table from the fuel and maintenance logs.
+    Returns the number of rollup rows written.
+    """
+    rows = []
+    for category, model in CATEGORY_MODELS.items():
+        quantity = Sum('fuel_quantity') if model is FuelLog else Value(0, output_field=DecimalField())
+        grouped = model.objects.annotate(month=TruncMonth('date')).values('vehicle_id', 'month').annotate(
+            total_cost=Sum('cost'),
+            total_quantity=quantity,
+            entries=Count('id'),
+        ).order_by()
+        rows.extend(
+            MonthlyCostRollup(
+                vehicle_id=row['vehicle_id'], month=row['month'], category=category,
+                total_cost=row['total_cost'] or 0, total_quantity=row['total_quantity'] or 0,
+                entries=row['entries'],
+            )
+            for row in grouped.iterator()
+        )
+    with transaction.atomic():
+        MonthlyCostRollup.objects.all().delete()
+        MonthlyCostRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def monthly_trends(start_month=None, end_month=None, vehicle=None):
+    """
+    Fleet-wide (or one vehicle's) cost per month and category between two
+    months inclusive, newest first:
+    [{'month': date, 'fuel_cost': ..., 'fuel_quantity': ..., 'maintenance_cost': ..., 'total_cost': ...}, ...]
+    """
+    rollups = MonthlyCostRollup.objects.all()
+    if vehicle:
+        rollups = rollups.filter(vehicle_id=vehicle)
+    if start_month:
+        rollups = rollups.filter(month__gte=start_month.replace(day=1))
+    if end_month:
+        rollups = rollups.filter(month__lte=end_month.replace(day=1))
+    grouped = rollups.values('month', 'category').annotate(
+        cost=Sum('total_cost'),
+        quantity=Sum('total_quantity'),
+    ).order_by('month', 'category')
+
+    months = {}
+    for row in grouped:
+        month = months.setdefault(row['month'], {
+            'month': row['month'],
+            'fuel_cost': 0,
+            'fuel_quantity': 0,
+            'maintenance_cost': 0,
+        })
+        if row['category'] == 'fuel':
+            month['fuel_cost'] = round_total(row['cost'])
+            month['fuel_quantity'] = round_total(row['quantity'])
+        else:
+            month['maintenance_cost'] = round_total(row['cost'])
+    for month in months.values():
+        month['total_cost'] = month['fuel_cost'] + month['maintenance_cost']
+    return sorted(months.values(), key=lambda month: month['month'], reverse=True)
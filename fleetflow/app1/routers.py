@@ -0,0 +1,224 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections, DatabaseError, DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from .models import ReplicaHeartbeat
+
+
+# ============================================================
+# PRIMARY / REPLICA ROUTING
+# ============================================================
+# Every write, and every read by default, goes to the primary.  When
+# FLEETFLOW_REPLICA_ALIAS is set (it is off unless configured), views
+# wrapped in @replica_reads (reports, exports, the JSON API) read from
+# that database instead, so their heavy queries stay off the connection
+# that serves the add/edit forms.
+#
+# A replica lags the primary, so reads stay on the primary:
+#   * when the replica's heartbeat (ReplicaHeartbeat, stamped on the
+#     primary by sync_replica and copied over with the data) is missing
+#     or older than FLEETFLOW_REPLICA_MAX_LAG_SECONDS; checked once as
+#     the view starts,
+#   * once the request itself has written anything,
+#   * while a transaction is open on the primary,
+#   * for FLEETFLOW_REPLICA_PIN_SECONDS after a request that wrote,
+#     through a cookie set by ReplicaRoutingMiddleware, so a user who
+#     just saved a form sees their own change on the next page.
+# Page contexts built from the replica may miss other users' latest
+# writes, so they are cached for at most the lag allowance (see
+# cache.py) instead of until the next version bump, and API ETags mix
+# in the replica's heartbeat (replica_snapshot()), so a body read from
+# a lagging replica is not revalidated as current once it catches up.
+
+DEFAULT_PIN_SECONDS = 5
+DEFAULT_MAX_LAG_SECONDS = 60
+PIN_COOKIE = 'fleetflow_primary'
+
+
+class RoutingState:
+    """
+    Per-request routing flags shared by the threads serving the request.
+    """
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = False
+        # Heartbeat of the replica snapshot this request reads
+        self.snapshot = None
+
+
+_state = ContextVar('fleetflow_routing_state', default=None)
+
+
+def replica_alias():
+    """
+    The configured replica alias, or None when reads stay on the primary.
+    """
+    alias = getattr(settings, 'FLEETFLOW_REPLICA_ALIAS', None)
+    return alias if alias and alias in connections else None
+
+
+def pin_seconds():
+    return getattr(settings, 'FLEETFLOW_REPLICA_PIN_SECONDS', DEFAULT_PIN_SECONDS)
+
+
+def max_lag_seconds():
+    return getattr(settings, 'FLEETFLOW_REPLICA_MAX_LAG_SECONDS', DEFAULT_MAX_LAG_SECONDS)
+
+
+def replica_heartbeat():
+    """
+    The replica's heartbeat when a replica is configured and recent
+    enough to read from, else None.  A replica without the table or the
+    row is stale.
+    """
+    alias = replica_alias()
+    if alias is None:
+        return None
+    try:
+        beat_at = ReplicaHeartbeat.objects.using(alias).values_list('beat_at', flat=True).first()
+    except DatabaseError:
+        return None
+    if beat_at is None or timezone.now() - beat_at > timedelta(seconds=max_lag_seconds()):
+        return None
+    return beat_at
+
+
+def replica_is_fresh():
+    return replica_heartbeat() is not None
+
+
+def replica_snapshot():
+    """
+    Heartbeat of the replica the current reads go to, or None when they
+    go to the primary.
+    """
+    return _state.get().snapshot if reads_from_replica() else None
+
+
+def reads_from_replica():
+    """
+    Whether reads made now are routed to the replica.
+    """
+    state = _state.get()
+    return state is not None and _route(state) != DEFAULT_DB_ALIAS
+
+
+def _route(state):
+    if not state.replica or state.pinned or state.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return replica_alias() or DEFAULT_DB_ALIAS
+
+
+def _replica_wanted():
+    # A pinned client reads from the primary anyway: skip the heartbeat
+    state = _state.get()
+    return replica_alias() is not None and not (state is not None and state.pinned)
+
+
+@contextmanager
+def _reading_from_replica(heartbeat):
+    state = _state.get()
+    token = None
+    if state is None:
+        # Outside ReplicaRoutingMiddleware (commands, direct calls)
+        state = RoutingState()
+        token = _state.set(state)
+    previous = state.replica, state.snapshot
+    state.replica, state.snapshot = heartbeat is not None, heartbeat
+    try:
+        yield
+    finally:
+        state.replica, state.snapshot = previous
+        if token is not None:
+            _state.reset(token)
+
+
+def replica_reads(view):
+    """
+    Let a read-only view's queries go to the replica.
+    """
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            heartbeat = await sync_to_async(replica_heartbeat)() if _replica_wanted() else None
+            with _reading_from_replica(heartbeat):
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with _reading_from_replica(replica_heartbeat() if _replica_wanted() else None):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Database router for DATABASE_ROUTERS; see the notes above.
+    """
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica:
+            return None
+        return _route(state)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary, never from migrate
+        return db != replica_alias()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Tracks writes per request and keeps a client that just wrote on the
+    primary for FLEETFLOW_REPLICA_PIN_SECONDS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
+
+    def finish(self, response, state):
+        if state.wrote and replica_alias() is not None:
+            response.set_cookie(PIN_COOKIE, '1', max_age=pin_seconds(), httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,186 @@
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Q
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils.module_loading import import_string
+
+from .models import Trip, RouteDistance, normalize_location
+
+
+# ============================================================
+# ROUTE DISTANCES
+# ============================================================
+# Distances are looked up per lane: the (start, end) locations with
+# case and spacing normalized, so "north depot " and "North  Depot" are
+# the same place.  Trips store their lane (lane_origin, lane_destination)
+# normalized by the same Python function, so non-ASCII names match too.
+# Lookups go through three layers:
+#   * an in-process LRU (ROUTE_CACHE_SIZE lanes, ROUTE_CACHE_SECONDS
+#     each), so a hit costs no database round trip,
+#   * the RouteDistance table, shared by every process,
+#   * the FLEETFLOW_ROUTE_BACKEND, by default the median distance of
+#     the last HISTORY_SAMPLE trips on the lane.
+# Saving trips deletes their lanes' RouteDistance rows (see signals.py)
+# and this process's LRU entries; other processes pick up the new
+# distance once their entry expires.
+
+ROUTE_CACHE_SIZE = 1024
+ROUTE_CACHE_SECONDS = 600
+HISTORY_SAMPLE = 25
+DEFAULT_BACKEND = 'app1.routes.TripHistoryBackend'
+CENT = Decimal('0.01')
+
+
+def lane_key(start_location, end_location):
+    """
+    (origin, destination) as stored in RouteDistance, or None when
+    either end is blank.
+    """
+    origin, destination = normalize_location(start_location), normalize_location(end_location)
+    if not origin or not destination:
+        return None
+    return origin, destination
+
+
+class TripHistoryBackend:
+    """
+    Median distance of the most recent trips on the lane, read through
+    the trip_lane_idx index.
+    """
+    def __init__(self, sample=HISTORY_SAMPLE):
+        self.sample = sample
+
+    def distance(self, origin, destination):
+        distances = list(
+            Trip.objects.filter(
+                lane_origin=origin, lane_destination=destination, distance__gt=0,
+            ).order_by('-created_at').values_list('distance', flat=True)[:self.sample]
+        )
+        if not distances:
+            return None
+        return Decimal(statistics.median(distances)).quantize(CENT)
+
+
+class StaticRouteBackend:
+    """
+    Distances from a fixed list of (start, end, km) routes, e.g. a depot
+    distance table, or a stand-in for a routing service in tests.
+    """
+    def __init__(self, routes=()):
+        self.routes = {}
+        for start, end, km in routes:
+            key = lane_key(start, end)
+            if key:
+                self.routes[key] = Decimal(str(km)).quantize(CENT)
+
+    def distance(self, origin, destination):
+        return self.routes.get((origin, destination))
+
+
+class RouteDistanceService:
+    """
+    Memoized lane distances; see the notes above.
+    """
+    def __init__(self, backend, maxsize=ROUTE_CACHE_SIZE, ttl=ROUTE_CACHE_SECONDS):
+        self.backend = backend
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def distance(self, start_location, end_location):
+        """
+        Distance in km for the lane, or None when nothing is known.
+        """
+        key = lane_key(start_location, end_location)
+        if key is None:
+            return None
+        found, value = self._cached(key)
+        if found:
+            return value
+
+        origin, destination = key
+        value = RouteDistance.objects.filter(origin=origin, destination=destination).values_list('distance', flat=True).first()
+        if value is None:
+            value = self.backend.distance(origin, destination)
+            if value is not None:
+                RouteDistance.objects.bulk_create(
+                    [RouteDistance(origin=origin, destination=destination, distance=value, source=type(self.backend).__name__)],
+                    update_conflicts=True, unique_fields=['origin', 'destination'], update_fields=['distance', 'source', 'updated_at'],
+                )
+        self._remember(key, value)
+        return value
+
+    def forget(self, lanes):
+        """
+        Drop the stored and cached distances of the given (start, end)
+        location pairs.
+        """
+        keys = {key for key in (lane_key(start, end) for start, end in lanes) if key}
+        if not keys:
+            return
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        condition = Q()
+        for origin, destination in keys:
+            condition |= Q(origin=origin, destination=destination)
+        RouteDistance.objects.filter(condition).delete()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def route_service():
+    """
+    The process-wide service for the configured backend.
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                backend_class = import_string(getattr(settings, 'FLEETFLOW_ROUTE_BACKEND', DEFAULT_BACKEND))
+                backend = backend_class(**getattr(settings, 'FLEETFLOW_ROUTE_BACKEND_OPTIONS', {}))
+                _service = RouteDistanceService(backend)
+    return _service
+
+
+@receiver(setting_changed)
+def reset_route_service(setting, **kwargs):
+    """
+    Rebuild the service when the backend settings change (tests).
+    """
+    global _service
+    if setting.startswith('FLEETFLOW_ROUTE_BACKEND'):
+        with _service_lock:
+            _service = None
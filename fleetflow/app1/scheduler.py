@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import MaintenanceLog, MaintenanceSchedule
+
+
+# ============================================================
+# MAINTENANCE SCHEDULE
+# ============================================================
+# One schedule row per (vehicle, maintenance_type) points at the newest
+# log of that type, so its next_due_date is the only one that matters.
+# Saves and deletes refresh the affected pairs; run_maintenance_scan
+# rebuilds the table in a single pass over maint_vehicle_type_date_idx.
+
+DEFAULT_DUE_DAYS = 7
+
+CURRENT_ORDER = ['vehicle_id', 'maintenance_type', '-date', '-created_at', '-id']
+
+
+def due_days():
+    return getattr(settings, 'FLEETFLOW_MAINTENANCE_DUE_DAYS', DEFAULT_DUE_DAYS)
+
+
+def schedule_key(log):
+    """
+    The (vehicle_id, maintenance_type) pair a log is scheduled under.
+    """
+    return (log.vehicle_id, log.maintenance_type)
+
+
+def refresh_schedule(keys):
+    """
+    Point each (vehicle_id, maintenance_type) schedule row at the newest
+    log of that type, or remove it when no log is left.
+    """
+    for vehicle_id, maintenance_type in set(keys):
+        if vehicle_id is None:
+            continue
+        current = MaintenanceLog.objects.filter(
+            vehicle_id=vehicle_id, maintenance_type=maintenance_type,
+        ).order_by(*CURRENT_ORDER[2:]).first()
+        if current is None:
+            MaintenanceSchedule.objects.filter(vehicle_id=vehicle_id, maintenance_type=maintenance_type).delete()
+            continue
+        MaintenanceSchedule.objects.update_or_create(
+            vehicle_id=vehicle_id,
+            maintenance_type=maintenance_type,
+            defaults={
+                'log': current,
+                'last_service_date': current.date,
+                'next_due_date': current.next_due_date,
+            },
+        )
+
+
+def rebuild_schedule():
+    """
+    Recompute the whole schedule from the maintenance logs, reading them
+    once in index order and keeping the first log of every pair.
+    Returns the number of schedule rows written.
+    """
+    rows = []
+    previous = None
+    logs = MaintenanceLog.objects.order_by(*CURRENT_ORDER).values_list(
+        'id', 'vehicle_id', 'maintenance_type', 'date', 'next_due_date',
+    )
+    for log_id, vehicle_id, maintenance_type, log_date, next_due_date in logs.iterator(chunk_size=5000):
+        if (vehicle_id, maintenance_type) == previous:
+            continue
+        previous = (vehicle_id, maintenance_type)
+        rows.append(MaintenanceSchedule(
+            vehicle_id=vehicle_id, maintenance_type=maintenance_type, log_id=log_id,
+            last_service_date=log_date, next_due_date=next_due_date,
+        ))
+    with transaction.atomic():
+        MaintenanceSchedule.objects.all().delete()
+        MaintenanceSchedule.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def alert_counts(today, days=None):
+    """
+    {'due': rows overdue or due within ``days`` of ``today``, 'overdue':
+    rows already overdue}, from one conditional aggregate.
+    """
+    if days is None:
+        days = due_days()
+    return MaintenanceSchedule.objects.filter(next_due_date__lte=today + timedelta(days=days)).aggregate(
+        due=Count('pk'),
+        overdue=Count('pk', filter=Q(next_due_date__lt=today)),
+    )
+
+
+def maintenance_alerts(today, days=None, limit=None):
+    """
+    Schedule rows that are overdue or due within ``days`` of ``today``,
+    soonest first (at most ``limit``), each with ``level`` set to
+    'overdue' or 'due'.
+    """
+    if days is None:
+        days = due_days()
+    alerts = list(
+        MaintenanceSchedule.objects.select_related('vehicle')
+        .filter(next_due_date__lte=today + timedelta(days=days))
+        .order_by('next_due_date')[:limit]
+    )
+    for alert in alerts:
+        alert.level = 'overdue' if alert.next_due_date < today else 'due'
+    return alerts
@@ -0,0 +1,153 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Trip, MaintenanceLog
+
+
+# ============================================================
+# FULL-TEXT SEARCH
+# ============================================================
+# On SQLite, trips and maintenance logs are indexed by external-content
+# FTS5 tables: the index stores only tokens, the text stays in the app1
+# tables, and triggers keep the two in step for every write path
+# (save(), bulk_create(), raw deletes, imports).
+#
+# The tables and triggers are created by ensure_search_index() after
+# every migrate rather than by a migration, because SQLite rebuilds a
+# table for many schema changes and drops its triggers when it does.
+# Other databases fall back to case-insensitive LIKE filters.
+
+SEARCH_INDEXES = {
+    'trips': {
+        'model': Trip,
+        'table': 'app1_trip_fts',
+        'columns': ['start_location', 'end_location', 'notes'],
+        # bm25 weight per column: locations matter more than free notes
+        'weights': [2.0, 2.0, 1.0],
+        'related': ['vehicle', 'driver'],
+    },
+    'maintenance': {
+        'model': MaintenanceLog,
+        'table': 'app1_maintenancelog_fts',
+        'columns': ['description'],
+        'weights': [1.0],
+        'related': ['vehicle'],
+    },
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_supported():
+    return connection.vendor == 'sqlite'
+
+
+def _index_sql(spec):
+    source = spec['model']._meta.db_table
+    table = spec['table']
+    columns = ', '.join(spec['columns'])
+    old = ', '.join(f'old.{column}' for column in spec['columns'])
+    new = ', '.join(f'new.{column}' for column in spec['columns'])
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        f"{columns}, content='{source}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old}); END",
+        # Only edits to the indexed text touch the index
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {columns} ON {source} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new}); END",
+    ]
+
+
+def ensure_search_index(using=None, rebuild=False):
+    """
+    Create any missing FTS tables and triggers.  An index whose table or
+    triggers had to be (re)created is rebuilt from its source table, so
+    rows written while a trigger was missing are picked up.
+    Returns the names of the rebuilt indexes.
+    """
+    db = connections[using or 'default']
+    if db.vendor != 'sqlite':
+        return []
+    rebuilt = []
+    with db.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        for name, spec in SEARCH_INDEXES.items():
+            table = spec['table']
+            if spec['model']._meta.db_table not in existing:
+                continue
+            complete = {table, f'{table}_ai', f'{table}_ad', f'{table}_au'} <= existing
+            for statement in _index_sql(spec):
+                cursor.execute(statement)
+            if rebuild or not complete:
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+                rebuilt.append(name)
+    return rebuilt
+
+
+def match_expression(query):
+    """
+    FTS5 MATCH expression for free text: every word must appear, each as
+    a prefix ("brak pad" finds "brake pads").  None when there is no word.
+    """
+    tokens = TOKEN_RE.findall(query or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def full_text_search(name, query, limit=20):
+    """
+    Up to ``limit`` rows of one index matching ``query``, best match first.
+    """
+    spec = SEARCH_INDEXES[name]
+    model = spec['model']
+    expression = match_expression(query)
+    if expression is None:
+        return []
+
+    if not search_supported():
+        condition = Q()
+        for token in TOKEN_RE.findall(query):
+            condition &= Q(*[Q(**{f'{column}__icontains': token}) for column in spec['columns']], _connector=Q.OR)
+        return list(model.objects.select_related(*spec['related']).filter(condition)[:limit])
+
+    table = spec['table']
+    weights = ', '.join(str(weight) for weight in spec['weights'])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY bm25({table}, {weights}) LIMIT %s",
+            [expression, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    objects = model.objects.select_related(*spec['related']).in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def search_filter(name, query):
+    """
+    Q restricting a queryset of one index's model to the rows matching
+    ``query``, for callers that filter and order the rows themselves
+    (the admin changelists).  None when there is no word to match.
+    """
+    spec = SEARCH_INDEXES[name]
+    expression = match_expression(query)
+    if expression is None:
+        return None
+
+    if not search_supported():
+        condition = Q()
+        for token in TOKEN_RE.findall(query):
+            condition &= Q(*[Q(**{f'{column}__icontains': token}) for column in spec['columns']], _connector=Q.OR)
+        return condition
+
+    table = spec['table']
+    return Q(pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [expression]))
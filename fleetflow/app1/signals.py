@@ -0,0 +1,113 @@
+from collections import Counter
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog
+from .counters import contributions, diff, apply_deltas
+from .cache import bump_version_on_commit
+from .efficiency import refresh_efficiency
+from .rollups import rollup_entries, rollup_diff, sum_entries, apply_rollup_deltas
+from .scheduler import schedule_key, refresh_schedule
+from .search import ensure_search_index
+from .routes import route_service
+from .transitions import refresh_driver_availability
+
+
+TRACKED_MODELS = (Vehicle, Driver, Trip, FuelLog, MaintenanceLog)
+
+
+# ============================================================
+# DERIVED DATA MAINTENANCE
+# ============================================================
+# Counters, monthly rollups, the maintenance schedule, vehicle fuel
+# efficiency, route distances and cache versions are all derived from
+# the five fleet tables.  Saves apply the difference between the stored
+# row (remembered in pre_save) and the new one; deletes subtract the row.
+
+def lane(trip):
+    return trip.start_location, trip.end_location
+
+
+def lane_changed(previous, trip):
+    """
+    Whether saving ``trip`` can change a lane's median distance.
+    """
+    return previous is None or lane(previous) != lane(trip) or previous.distance != trip.distance
+
+
+@receiver(pre_save)
+def remember_previous_state(sender, instance, **kwargs):
+    """
+    Before an update, remember the stored row so post_save can compute deltas.
+    """
+    if sender not in TRACKED_MODELS:
+        return
+    previous = None
+    if instance.pk is not None and not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).first()
+    instance._previous_state = previous
+    if sender is Driver and previous is not None and previous.is_available != instance.is_available:
+        # A manager set the availability by hand; trips ending must not undo it
+        instance.on_trip = False
+
+
+@receiver(post_save)
+def update_derived_data_on_save(sender, instance, **kwargs):
+    if sender not in TRACKED_MODELS:
+        return
+    previous = getattr(instance, '_previous_state', None)
+    apply_deltas(diff(contributions(previous) if previous else {}, contributions(instance)))
+    apply_rollup_deltas(rollup_diff(rollup_entries(previous) if previous else {}, rollup_entries(instance)))
+    if sender is MaintenanceLog:
+        refresh_schedule([schedule_key(instance)] + ([schedule_key(previous)] if previous else []))
+    if sender is FuelLog:
+        refresh_efficiency({instance.vehicle_id, previous.vehicle_id if previous else None})
+    if sender is Trip and lane_changed(previous, instance):
+        route_service().forget([lane(instance)] + ([lane(previous)] if previous else []))
+    bump_version_on_commit(sender)
+    instance._previous_state = None
+
+
+@receiver(post_delete)
+def update_derived_data_on_delete(sender, instance, **kwargs):
+    if sender not in TRACKED_MODELS:
+        return
+    apply_deltas(diff(contributions(instance), {}))
+    apply_rollup_deltas(rollup_diff(rollup_entries(instance), {}))
+    if sender is MaintenanceLog:
+        refresh_schedule([schedule_key(instance)])
+    if sender is FuelLog:
+        refresh_efficiency({instance.vehicle_id})
+    if sender is Trip:
+        route_service().forget([lane(instance)])
+    bump_version_on_commit(sender)
+
+
+def objects_created(model, objects):
+    """
+    Apply the post_save bookkeeping for rows inserted with bulk_create,
+    which does not send save signals.
+    """
+    deltas = Counter()
+    for instance in objects:
+        deltas.update(contributions(instance))
+    apply_deltas(dict(deltas))
+    apply_rollup_deltas(rollup_diff({}, sum_entries(objects)))
+    if model is MaintenanceLog:
+        refresh_schedule(schedule_key(instance) for instance in objects)
+    if model is FuelLog:
+        refresh_efficiency({instance.vehicle_id for instance in objects})
+    if model is Trip:
+        route_service().forget({lane(instance) for instance in objects})
+        # Drivers of trips created in progress are now on the road
+        refresh_driver_availability({instance.driver_id for instance in objects if instance.status == 'in_progress'})
+    bump_version_on_commit(model)
+
+
+def ensure_search_tables(sender, using, **kwargs):
+    """
+    Recreate the full-text search tables and triggers after migrate
+    (connected in App1Config.ready()).
+    """
+    ensure_search_index(using)
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.db.models import Sum, Count, Q
+
+from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog
+
+
+# ============================================================
+# FLEET STATISTICS
+# ============================================================
+# Each helper below collects one model's breakdown with a single
+# conditional-aggregation query instead of one count()/Sum() per figure.
+
+def round_total(value):
+    """
+    Round a Sum() result to the 2 decimal places of the summed fields
+    (SQLite sums decimals as floating point) and treat NULL as 0.
+    """
+    return Decimal(str(value or 0)).quantize(Decimal('0.01'))
+
+
+def vehicle_stats():
+    """
+    Vehicle counts by status.
+    """
+    return Vehicle.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        inactive=Count('id', filter=Q(status='inactive')),
+        maintenance=Count('id', filter=Q(status='maintenance')),
+    )
+
+
+def driver_stats():
+    """
+    Driver counts by availability.
+    """
+    return Driver.objects.aggregate(
+        total=Count('id'),
+        available=Count('id', filter=Q(is_available=True)),
+        assigned=Count('id', filter=Q(is_available=False)),
+    )
+
+
+def trip_stats():
+    """
+    Trip counts by status and total distance.
+    """
+    stats = Trip.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        completed=Count('id', filter=Q(status='completed')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+        total_distance=Sum('distance'),
+    )
+    stats['total_distance'] = round_total(stats['total_distance'])
+    return stats
+
+
+def fuel_stats():
+    """
+    Fuel log entry count, total cost and total quantity.
+    """
+    stats = FuelLog.objects.aggregate(
+        total_entries=Count('id'),
+        total_cost=Sum('cost'),
+        total_quantity=Sum('fuel_quantity'),
+    )
+    stats['total_cost'] = round_total(stats['total_cost'])
+    stats['total_quantity'] = round_total(stats['total_quantity'])
+    return stats
+
+
+def maintenance_stats():
+    """
+    Maintenance log entry count and total cost.
+    """
+    stats = MaintenanceLog.objects.aggregate(
+        total_entries=Count('id'),
+        total_cost=Sum('cost'),
+    )
+    stats['total_cost'] = round_total(stats['total_cost'])
+    return stats
+
+
+def fleet_stats():
+    """
+    All report statistics, keyed the way the reports template expects.
+    """
+    return {
+        'vehicle_stats': vehicle_stats(),
+        'driver_stats': driver_stats(),
+        'trip_stats': trip_stats(),
+        'fuel_stats': fuel_stats(),
+        'maintenance_stats': maintenance_stats(),
+    }
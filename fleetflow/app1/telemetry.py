@@ -0,0 +1,292 @@
+import datetime
+import json
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Vehicle, Trip, TelemetryPing, VehiclePosition
+
+
+# ============================================================
+# GPS TELEMETRY
+# ============================================================
+# Trackers post pings in batches (a JSON array, {"pings": [...]} or
+# NDJSON).  Pings are validated without forms, buffered, and written
+# BATCH_SIZE at a time: one vehicle lookup and one in-progress trip
+# lookup per batch, then a single bulk_create plus an upsert of the
+# vehicles' newest positions inside one transaction.
+#
+# TelemetryPing is append-only and partitioned by ``day``: nothing
+# updates a ping, and retention drops whole days (prune_days), each in
+# its own short DELETE, much like dropping a per-day table.  SQLite has
+# no declarative partitioning, so the partitions share one table and
+# the day index.
+
+BATCH_SIZE = 5000
+MAX_PINGS_PER_REQUEST = 50000
+# Room for MAX_PINGS_PER_REQUEST pings of up to ~200 bytes.  The view
+# reads the body itself under this limit instead of request.body, which
+# DATA_UPLOAD_MAX_MEMORY_SIZE (2.5 MB) would cut at ~20000 pings.
+MAX_REQUEST_BYTES = 10 * 1024 * 1024
+# Pings stamped further ahead than this are tracker clock errors
+MAX_CLOCK_SKEW = datetime.timedelta(minutes=5)
+
+POSITION_FIELDS = ['trip', 'recorded_at', 'latitude', 'longitude', 'speed', 'heading']
+
+
+class IngestResult:
+    """
+    Outcome of an ingest: pings stored and per-ping errors (0-based
+    position in the payload).
+    """
+    def __init__(self):
+        self.accepted = 0
+        self.errors = []
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+    def add_error(self, index, messages):
+        self.errors.append({'index': index, 'errors': messages})
+
+
+def parse_payload(body, content_type=''):
+    """
+    The list of raw pings in a request body.  Raises ValueError when the
+    body is not a JSON array, {"pings": [...]} or NDJSON.
+    """
+    text = body.decode('utf-8') if isinstance(body, bytes) else body
+    if 'ndjson' in content_type or 'jsonl' in content_type:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('pings')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of pings or {"pings": [...]}.')
+    return data
+
+
+def _parse_time(value):
+    """
+    The UTC datetime of an ISO 8601 string or Unix seconds, or None when
+    it is not one (including NaN, out-of-range seconds and impossible
+    dates such as 2026-02-30).
+    """
+    try:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed is None:
+            return None
+        if timezone.is_naive(parsed):
+            return timezone.make_aware(parsed, datetime.timezone.utc)
+        return parsed.astimezone(datetime.timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _parse_number(raw, name, low, high, errors, required=True):
+    value = raw.get(name)
+    if value is None or value == '':
+        if required:
+            errors.append(f"{name}: This field is required.")
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        errors.append(f"{name}: Enter a number.")
+        return None
+    if not low <= value <= high:
+        errors.append(f"{name}: Must be between {low} and {high}.")
+        return None
+    return value
+
+
+def parse_ping(raw, vehicle_ids, now):
+    """
+    (TelemetryPing without trip, []) for a valid raw ping, else
+    (None, error messages).
+    """
+    if not isinstance(raw, dict):
+        return None, ["Expected an object."]
+    errors = []
+
+    number = str(raw.get('vehicle') or '').strip()
+    if not number:
+        errors.append("vehicle: This field is required.")
+    elif number not in vehicle_ids:
+        errors.append(f"vehicle: Unknown value '{number}'.")
+
+    recorded_at = _parse_time(raw.get('timestamp'))
+    if recorded_at is None:
+        errors.append("timestamp: Enter an ISO 8601 datetime or Unix seconds.")
+    elif recorded_at > now + MAX_CLOCK_SKEW:
+        errors.append("timestamp: Is in the future.")
+
+    latitude = _parse_number(raw, 'lat', -90, 90, errors)
+    longitude = _parse_number(raw, 'lon', -180, 180, errors)
+    speed = _parse_number(raw, 'speed', 0, 1000, errors, required=False)
+    heading = _parse_number(raw, 'heading', 0, 360, errors, required=False)
+    if errors:
+        return None, errors
+
+    return TelemetryPing(
+        vehicle_id=vehicle_ids[number],
+        day=recorded_at.date(),
+        recorded_at=recorded_at,
+        latitude=latitude,
+        longitude=longitude,
+        speed=speed,
+        heading=heading,
+    ), []
+
+
+def _active_trips(vehicle_ids):
+    """
+    {vehicle id: ([start_date, ...], [trip id, ...])} of the trips in
+    progress, oldest start first (unstarted ones count as always on).
+    """
+    trips = defaultdict(lambda: ([], []))
+    rows = (
+        Trip.objects.filter(vehicle_id__in=vehicle_ids, status='in_progress')
+        .order_by().values_list('vehicle_id', 'id', 'start_date')
+    )
+    epoch = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+    for vehicle_id, trip_id, start_date in sorted(rows, key=lambda row: (row[0], row[2] or epoch)):
+        starts, ids = trips[vehicle_id]
+        starts.append(start_date or epoch)
+        ids.append(trip_id)
+    return trips
+
+
+def update_positions(pings):
+    """
+    Upsert VehiclePosition for every vehicle whose newest ping in
+    ``pings`` is newer than its stored position.
+    """
+    newest = {}
+    for ping in pings:
+        current = newest.get(ping.vehicle_id)
+        if current is None or ping.recorded_at > current.recorded_at:
+            newest[ping.vehicle_id] = ping
+    stored = dict(VehiclePosition.objects.filter(vehicle_id__in=newest).order_by().values_list('vehicle_id', 'recorded_at'))
+    positions = [
+        VehiclePosition(
+            vehicle_id=vehicle_id, trip_id=ping.trip_id, recorded_at=ping.recorded_at,
+            latitude=ping.latitude, longitude=ping.longitude, speed=ping.speed, heading=ping.heading,
+        )
+        for vehicle_id, ping in newest.items()
+        if vehicle_id not in stored or ping.recorded_at > stored[vehicle_id]
+    ]
+    if positions:
+        VehiclePosition.objects.bulk_create(
+            positions, update_conflicts=True, unique_fields=['vehicle'], update_fields=POSITION_FIELDS,
+        )
+    return len(positions)
+
+
+def write_batch(batch, result):
+    """
+    Validate and store a list of (index, raw ping) in one transaction.
+    """
+    numbers = {str(raw.get('vehicle') or '').strip() for _, raw in batch if isinstance(raw, dict)}
+    vehicle_ids = dict(Vehicle.objects.filter(vehicle_number__in=numbers).order_by().values_list('vehicle_number', 'id'))
+    now = timezone.now()
+
+    pings = []
+    for index, raw in batch:
+        ping, errors = parse_ping(raw, vehicle_ids, now)
+        if errors:
+            result.add_error(index, errors)
+        else:
+            pings.append(ping)
+    if not pings:
+        return
+
+    trips = _active_trips({ping.vehicle_id for ping in pings})
+    for ping in pings:
+        if ping.vehicle_id in trips:
+            starts, ids = trips[ping.vehicle_id]
+            position = bisect_right(starts, ping.recorded_at)
+            if position:
+                ping.trip_id = ids[position - 1]
+
+    with transaction.atomic():
+        TelemetryPing.objects.bulk_create(pings)
+        update_positions(pings)
+    result.accepted += len(pings)
+
+
+class TelemetryBuffer:
+    """
+    Collects raw pings and writes them BATCH_SIZE at a time; leaving the
+    ``with`` block writes the remainder.
+    """
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.pending = []
+        self.result = IngestResult()
+        self.count = 0
+
+    def add(self, raw):
+        self.pending.append((self.count, raw))
+        self.count += 1
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            write_batch(self.pending, self.result)
+            self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+
+def ingest(pings, batch_size=BATCH_SIZE):
+    """
+    Store an iterable of raw pings; returns an IngestResult.
+    """
+    with TelemetryBuffer(batch_size) as buffer:
+        for raw in pings:
+            buffer.add(raw)
+    return buffer.result
+
+
+def latest_positions(vehicle=None):
+    """
+    Newest known position of every vehicle (or of one vehicle id).
+    """
+    positions = VehiclePosition.objects.select_related('vehicle')
+    if vehicle is not None:
+        positions = positions.filter(vehicle_id=vehicle)
+    return positions
+
+
+def prune_days(before):
+    """
+    Delete the pings of every day before ``before``, one day per
+    statement.  Returns {day: pings deleted}.
+    """
+    days = (
+        TelemetryPing.objects.filter(day__lt=before)
+        .order_by('day').values_list('day', flat=True).distinct()
+    )
+    table = connection.ops.quote_name(TelemetryPing._meta.db_table)
+    column = connection.ops.quote_name(TelemetryPing._meta.get_field('day').column)
+    deleted = {}
+    for day in list(days):
+        # A plain DELETE: the ORM's delete() would load every row to send
+        # delete signals, and nothing references a ping
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE {column} = %s', [day])
+            deleted[day] = cursor.rowcount
+    return deleted
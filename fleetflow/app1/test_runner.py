@@ -0,0 +1,29 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class FleetFlowTestRunner(DiscoverRunner):
+    """
+    Test runner that switches on the settings the test suite relies on,
+    rather than settings.py guessing from sys.argv whether tests run.
+    """
+    TEST_SETTINGS = {
+        # Going over a view's query budget fails the test
+        'FLEETFLOW_QUERY_BUDGET_STRICT': True,
+        # Analytics reads stay on the test database
+        'FLEETFLOW_REPLICA_ALIAS': None,
+        # Templates render without running collectstatic first
+        'STORAGES': {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        },
+    }
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(**self.TEST_SETTINGS)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,210 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .availability import BookingCalendar
+from .cache import bump_version_on_commit
+from .counters import apply_deltas, contributions, diff
+from .models import Driver, Trip
+
+
+# ============================================================
+# TRIP STATE MACHINE
+# ============================================================
+# pending -> in_progress -> completed, and pending/in_progress ->
+# cancelled.  completed and cancelled are final.
+#
+# Moving into in_progress stamps start_date, moving into completed or
+# cancelled stamps end_date (a trip completed without being started
+# gets both).  A stamp already set is kept.
+#
+# A driver with a trip in progress is unavailable; once their last
+# trip in progress ends they are available again.
+#
+# Starting a trip books its driver and vehicle from its start_date (now
+# when unset), so trips whose driver or vehicle is already booked then
+# are not started; they are reported as clashing.
+
+TRIP_TRANSITIONS = {
+    'start': {
+        'label': 'Start',
+        'done': 'started',
+        'sources': ['pending'],
+        'target': 'in_progress',
+    },
+    'complete': {
+        'label': 'Complete',
+        'done': 'completed',
+        'sources': ['in_progress'],
+        'target': 'completed',
+    },
+    'cancel': {
+        'label': 'Cancel',
+        'done': 'cancelled',
+        'sources': ['pending', 'in_progress'],
+        'target': 'cancelled',
+    },
+}
+
+STARTED_STATUSES = {'in_progress', 'completed'}
+ENDED_STATUSES = {'completed', 'cancelled'}
+MAX_BULK_TRIPS = 1000
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+class TransitionResult:
+    """
+    Outcome of a bulk transition: trips asked for, trips moved, trips
+    left alone because they would be double-booked, and drivers whose
+    availability changed.
+    """
+    def __init__(self, action, requested):
+        self.action = action
+        self.requested = requested
+        self.changed = 0
+        self.clashing = []
+        self.drivers_updated = 0
+
+    @property
+    def skipped(self):
+        # Missing trips and trips not in a source status
+        return self.requested - self.changed - len(self.clashing)
+
+
+def allowed_statuses(status):
+    """
+    Statuses a trip currently in ``status`` may be saved with.
+    """
+    allowed = {status}
+    for spec in TRIP_TRANSITIONS.values():
+        if status in spec['sources']:
+            allowed.add(spec['target'])
+    return allowed
+
+
+def stamped_dates(status, start_date, end_date, now=None):
+    """
+    (start_date, end_date) with the stamps implied by ``status`` filled in.
+    """
+    now = now or timezone.now()
+    if status in STARTED_STATUSES and start_date is None:
+        start_date = now
+    if status in ENDED_STATUSES and end_date is None:
+        end_date = now
+    return start_date, end_date
+
+
+def stamp_trip(trip, now=None):
+    """
+    Fill in the start/end dates implied by ``trip.status``.
+    """
+    trip.start_date, trip.end_date = stamped_dates(trip.status, trip.start_date, trip.end_date, now)
+
+
+def _stamp_updates(target, now):
+    updates = {}
+    if target in STARTED_STATUSES:
+        updates['start_date'] = Coalesce('start_date', Value(now))
+    if target in ENDED_STATUSES:
+        updates['end_date'] = Coalesce('end_date', Value(now))
+    return updates
+
+
+def refresh_driver_availability(driver_ids, now=None):
+    """
+    Make the given drivers unavailable while they have a trip in
+    progress, and available again once it ends, with one UPDATE each
+    way.  Only drivers this made unavailable (``on_trip``) are freed, so
+    a driver a manager marked unavailable stays so.  Returns the number
+    of drivers changed.
+    """
+    driver_ids = set(driver_ids)
+    if not driver_ids:
+        return 0
+    now = now or timezone.now()
+    in_progress = Exists(Trip.objects.filter(driver=OuterRef('pk'), status='in_progress'))
+    drivers = Driver.objects.filter(pk__in=driver_ids)
+    with transaction.atomic():
+        busy = drivers.filter(in_progress, is_available=True).update(is_available=False, on_trip=True, updated_at=now)
+        free = drivers.filter(~in_progress, on_trip=True).update(is_available=True, on_trip=False, updated_at=now)
+        if busy or free:
+            apply_deltas({'available_drivers': free - busy})
+            bump_version_on_commit(Driver)
+    return busy + free
+
+
+def double_booked(trip_ids, sources, now):
+    """
+    Ids of the trips (in ``sources`` statuses) that starting now would
+    double-book, checked in start order against the other trips of
+    their drivers and vehicles and against the ones started before them.
+    """
+    trips = list(
+        Trip.objects.filter(pk__in=trip_ids, status__in=sources)
+        .values_list('pk', 'driver_id', 'vehicle_id', 'start_date', 'end_date')
+    )
+    if not trips:
+        return []
+    trips = [(pk, driver_id, vehicle_id, start_date or now, end_date) for pk, driver_id, vehicle_id, start_date, end_date in trips]
+    trips.sort(key=lambda trip: (trip[3], trip[0]))
+    calendar = BookingCalendar(
+        trips[0][3],
+        drivers={trip[1] for trip in trips}, vehicles={trip[2] for trip in trips},
+        exclude=[trip[0] for trip in trips],
+    )
+    clashing = []
+    for pk, driver_id, vehicle_id, start, end in trips:
+        if calendar.clashes(driver_id, vehicle_id, start, end):
+            clashing.append(pk)
+        else:
+            calendar.add(f"trip #{pk}", driver_id, vehicle_id, start, end)
+    return clashing
+
+
+def transition_trips(trip_ids, action, now=None):
+    """
+    Apply ``action`` to every listed trip whose status allows it, with a
+    single UPDATE, then refresh the availability of their drivers.
+    Trips in any other status are left alone and counted as skipped;
+    trips that starting would double-book are listed in ``clashing``.
+    """
+    if action not in TRIP_TRANSITIONS:
+        raise InvalidTransition(f"Unknown trip action '{action}'.")
+    spec = TRIP_TRANSITIONS[action]
+    trip_ids = set(trip_ids)
+    if len(trip_ids) > MAX_BULK_TRIPS:
+        raise InvalidTransition(f"At most {MAX_BULK_TRIPS} trips can be changed at once.")
+    result = TransitionResult(action, len(trip_ids))
+    if not trip_ids:
+        return result
+
+    # Stored datetimes have microsecond precision, so the rows this call
+    # changed are exactly those now carrying this updated_at
+    now = now or timezone.now()
+    with transaction.atomic():
+        if spec['target'] == 'in_progress':
+            result.clashing = double_booked(trip_ids, spec['sources'], now)
+            trip_ids -= set(result.clashing)
+        result.changed = Trip.objects.filter(pk__in=trip_ids, status__in=spec['sources']).update(
+            status=spec['target'], updated_at=now, **_stamp_updates(spec['target'], now),
+        )
+        if not result.changed:
+            return result
+        driver_ids = Trip.objects.filter(
+            pk__in=trip_ids, status=spec['target'], updated_at=now,
+        ).values_list('driver_id', flat=True).distinct()
+
+        # Final statuses are never sources, so every source status
+        # counts the same towards the counters
+        per_trip = diff(
+            contributions(Trip(status=spec['sources'][0])),
+            contributions(Trip(status=spec['target'])),
+        )
+        apply_deltas({name: delta * result.changed for name, delta in per_trip.items()})
+        bump_version_on_commit(Trip)
+        result.drivers_updated = refresh_driver_availability(driver_ids, now)
+    return result
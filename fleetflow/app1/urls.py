@@ -24,22 +24,52 @@ urlpatterns = [
     
     # Trip URLs
     path('trips/', views.trip_list, name='trip_list'),
+    path('trips/export/', views.trip_export, name='trip_export'),
+    path('trips/import/', views.trip_import, name='trip_import'),
     path('trips/add/', views.trip_add, name='trip_add'),
     path('trips/edit/<int:pk>/', views.trip_edit, name='trip_edit'),
+    path('trips/transition/', views.trip_transition, name='trip_transition'),
     path('trips/delete/<int:pk>/', views.trip_delete, name='trip_delete'),
     
     # Fuel Log URLs
     path('fuel/', views.fuel_list, name='fuel_list'),
+    path('fuel/export/', views.fuel_export, name='fuel_export'),
+    path('fuel/import/', views.fuel_import, name='fuel_import'),
     path('fuel/add/', views.fuel_add, name='fuel_add'),
     path('fuel/edit/<int:pk>/', views.fuel_edit, name='fuel_edit'),
     path('fuel/delete/<int:pk>/', views.fuel_delete, name='fuel_delete'),
     
     # Maintenance Log URLs
     path('maintenance/', views.maintenance_list, name='maintenance_list'),
+    path('maintenance/export/', views.maintenance_export, name='maintenance_export'),
     path('maintenance/add/', views.maintenance_add, name='maintenance_add'),
     path('maintenance/edit/<int:pk>/', views.maintenance_edit, name='maintenance_edit'),
     path('maintenance/delete/<int:pk>/', views.maintenance_delete, name='maintenance_delete'),
     
+    # Background jobs
+    path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
+    path('jobs/export/<str:name>/', views.export_job, name='export_job'),
+    path('jobs/rebuild/', views.rebuild_job, name='rebuild_job'),
+    
     # Reports
     path('reports/', views.reports, name='reports'),
+    
+    # Search
+    path('search/', views.search, name='search'),
+    
+    # JSON API
+    path('api/fuel-efficiency/', views.api_fuel_efficiency, name='api_fuel_efficiency'),
+    path('api/autocomplete/<str:source>/', views.api_autocomplete, name='api_autocomplete'),
+    path('api/route-distance/', views.api_route_distance, name='api_route_distance'),
+    path('api/jobs/<int:pk>/', views.api_job, name='api_job'),
+    path('api/telemetry/', views.api_telemetry, name='api_telemetry'),
+    path('api/telemetry/latest/', views.api_vehicle_positions, name='api_vehicle_positions'),
+    path('api/availability/', views.api_availability, name='api_availability'),
+    path('api/trips/transition/', views.api_trip_transition, name='api_trip_transition'),
+    path('api/<str:resource>/', views.api_list, name='api_list'),
+    
+    # Monitoring
+    path('metrics/', views.metrics, name='metrics'),
+    path('metrics/cache/', views.cache_metrics, name='cache_metrics'),
 ]
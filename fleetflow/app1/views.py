@@ -1,17 +1,51 @@
+import hmac
+import os
+import uuid
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotAllowed, FileResponse, Http404
 from django.contrib.auth import login, logout, authenticate
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.core.exceptions import ValidationError
+from django.views.decorators.csrf import csrf_exempt
 from datetime import timedelta
 
-from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog
+from .models import Vehicle, Driver, Trip, FuelLog, MaintenanceLog, MaintenanceSchedule, Job
 from .forms import (
     UserRegisterForm, VehicleForm, DriverForm, 
-    TripForm, FuelLogForm, MaintenanceLogForm
+    TripForm, TripTransitionForm, FuelLogForm, MaintenanceLogForm, ExportFilterForm, ImportFileForm, ReportRangeForm,
+    AvailabilityForm,
 )
+from .stats import vehicle_stats, driver_stats, trip_stats, fuel_stats, maintenance_stats
+from .counters import get_counters
+from .cache import acached_context, cache_stats, render_rows
+from .concurrency import gather_queries
+from .pagination import paginate_request, paginate, InvalidCursor
+from .exports import EXPORTS, export_queryset, export_response
+from .imports import import_csv, IMPORT_COLUMNS
+from .rollups import monthly_trends
+from .metrics import prometheus_text
+from .efficiency import fuel_efficiency
+from .scheduler import alert_counts, maintenance_alerts, due_days
+from .search import full_text_search
+from .api import RESOURCES, MAX_PAGE_SIZE, filter_queryset, list_etag, serialize
+from .routers import replica_reads
+from .autocomplete import AUTOCOMPLETE_SOURCES, MAX_PAGE, autocomplete
+from .transitions import TRIP_TRANSITIONS, transition_trips
+from .availability import free_drivers, free_vehicles
+from .routes import route_service
+from .telemetry import MAX_PINGS_PER_REQUEST, MAX_REQUEST_BYTES, ingest, latest_positions, parse_payload
+from .jobs import REBUILD_TARGETS, enqueue, files_dir
 
 
 # ============================================================
@@ -76,53 +110,69 @@ def user_logout(request):
     return redirect('login')
 
 
+async def _arender(request, template_name, context):
+    """
+    render() for async views.  The user loaded by login_required is reused
+    so the auth context processor does not query it a second time.
+    """
+    request.user = await request.auser()
+    return await sync_to_async(render)(request, template_name, context)
+
+
 # ============================================================
 # DASHBOARD VIEW
 # ============================================================
 
+DASHBOARD_MODELS = [Vehicle, Driver, Trip, FuelLog, MaintenanceLog, MaintenanceSchedule]
+
+
+async def _dashboard_context(today):
+    """
+    Build the dashboard context. The independent query groups run
+    concurrently and querysets are evaluated so the result can be cached.
+    """
+    results = await gather_queries({
+        # Summary counters, maintained incrementally by signals
+        'counters': get_counters,
+        # Maintenance overdue or due soon, read from the precomputed schedule:
+        # the counts in one aggregate, then only the rows shown
+        'alert_counts': lambda: alert_counts(today),
+        'alerts': lambda: maintenance_alerts(today, limit=10),
+        # Recent activities
+        'recent_trips': lambda: list(Trip.objects.select_related('vehicle', 'driver').order_by('-created_at')[:5]),
+        'recent_fuel_logs': lambda: list(FuelLog.objects.select_related('vehicle').order_by('-date')[:5]),
+    })
+    counters = results['counters']
+    alert_totals = results['alert_counts']
+    
+    return {
+        'active_vehicles': counters['active_vehicles'],
+        'active_drivers': counters['available_drivers'],
+        'maintenance_due': alert_totals['due'],
+        'maintenance_overdue': alert_totals['overdue'],
+        'maintenance_alerts': results['alerts'],
+        'maintenance_due_days': due_days(),
+        'total_vehicles': counters['total_vehicles'],
+        'total_drivers': counters['total_drivers'],
+        'total_trips': counters['total_trips'],
+        'completed_trips': counters['completed_trips'],
+        'total_fuel_cost': counters['total_fuel_cost'],
+        'total_maintenance_cost': counters['total_maintenance_cost'],
+        'recent_trips': results['recent_trips'],
+        'recent_fuel_logs': results['recent_fuel_logs'],
+    }
+
+
 @login_required
-def dashboard(request):
+async def dashboard(request):
     """
     Dashboard view showing summary statistics.
     """
-    # Get counts for summary cards
-    active_vehicles = Vehicle.objects.filter(status='active').count()
-    active_drivers = Driver.objects.filter(is_available=True).count()
-    
-    # Maintenance due (within next 7 days or overdue)
     today = timezone.now().date()
-    maintenance_due = MaintenanceLog.objects.filter(
-        next_due_date__lte=today + timedelta(days=7),
-        next_due_date__gte=today
-    ).count()
-    
-    # Additional stats
-    total_vehicles = Vehicle.objects.count()
-    total_drivers = Driver.objects.count()
-    total_trips = Trip.objects.count()
-    completed_trips = Trip.objects.filter(status='completed').count()
-    total_fuel_cost = FuelLog.objects.aggregate(Sum('cost'))['cost__sum'] or 0
-    total_maintenance_cost = MaintenanceLog.objects.aggregate(Sum('cost'))['cost__sum'] or 0
-    
-    # Recent activities
-    recent_trips = Trip.objects.select_related('vehicle', 'driver').order_by('-created_at')[:5]
-    recent_fuel_logs = FuelLog.objects.select_related('vehicle').order_by('-date')[:5]
-    
-    context = {
-        'active_vehicles': active_vehicles,
-        'active_drivers': active_drivers,
-        'maintenance_due': maintenance_due,
-        'total_vehicles': total_vehicles,
-        'total_drivers': total_drivers,
-        'total_trips': total_trips,
-        'completed_trips': completed_trips,
-        'total_fuel_cost': total_fuel_cost,
-        'total_maintenance_cost': total_maintenance_cost,
-        'recent_trips': recent_trips,
-        'recent_fuel_logs': recent_fuel_logs,
-    }
-    
-    return render(request, 'dashboard.html', context)
+    context = await acached_context(
+        'dashboard', DASHBOARD_MODELS, lambda: _dashboard_context(today), extra=today.isoformat()
+    )
+    return await _arender(request, 'dashboard.html', context)
 
 
 # ============================================================
@@ -134,8 +184,8 @@ def vehicle_list(request):
     """
     List all vehicles.
     """
-    vehicles = Vehicle.objects.all()
-    return render(request, 'vehicles/list.html', {'vehicles': vehicles})
+    vehicles = paginate_request(request, Vehicle.objects.all())
+    return render(request, 'vehicles/list.html', {'vehicles': vehicles, 'page': vehicles})
 
 
 @login_required
@@ -198,8 +248,8 @@ def driver_list(request):
     """
     List all drivers.
     """
-    drivers = Driver.objects.select_related('assigned_vehicle').all()
-    return render(request, 'drivers/list.html', {'drivers': drivers})
+    drivers = paginate_request(request, Driver.objects.select_related('assigned_vehicle').all())
+    return render(request, 'drivers/list.html', {'drivers': drivers, 'page': drivers})
 
 
 @login_required
@@ -262,8 +312,14 @@ def trip_list(request):
     """
     List all trips.
     """
-    trips = Trip.objects.select_related('vehicle', 'driver').all()
-    return render(request, 'trips/list.html', {'trips': trips})
+    trips = paginate_request(request, Trip.objects.select_related('vehicle', 'driver').all())
+    context = {
+        'trips': trips,
+        'page': trips,
+        'rows': render_rows('trips', trips),
+        'transition_form': TripTransitionForm(),
+    }
+    return render(request, 'trips/list.html', context)
 
 
 @login_required
@@ -273,8 +329,7 @@ def trip_add(request):
     """
     if request.method == 'POST':
         form = TripForm(request.POST)
-        if form.is_valid():
-            form.save()
+        if form.save_if_valid():
             messages.success(request, "Trip created successfully!")
             return redirect('trip_list')
     else:
@@ -292,8 +347,7 @@ def trip_edit(request, pk):
     
     if request.method == 'POST':
         form = TripForm(request.POST, instance=trip)
-        if form.is_valid():
-            form.save()
+        if form.save_if_valid():
             messages.success(request, "Trip updated successfully!")
             return redirect('trip_list')
     else:
@@ -302,6 +356,35 @@ def trip_edit(request, pk):
     return render(request, 'trips/form.html', {'form': form, 'action': 'Edit', 'trip': trip})
 
 
+@login_required
+def trip_transition(request):
+    """
+    Apply one status change to every trip ticked on the trip list.
+    """
+    if request.method != 'POST':
+        return redirect('trip_list')
+    
+    form = TripTransitionForm(request.POST)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+        return redirect('trip_list')
+    
+    action = form.cleaned_data['action']
+    result = transition_trips(form.cleaned_data['trips'], action)
+    summary = f"{result.changed} trip{'s' if result.changed != 1 else ''} {TRIP_TRANSITIONS[action]['done']}"
+    if result.skipped:
+        summary += f", {result.skipped} skipped (not in a status that allows it)"
+    if result.clashing:
+        trips = ', '.join(f'#{pk}' for pk in sorted(result.clashing))
+        summary += f", {len(result.clashing)} not started (driver or vehicle already booked): {trips}"
+    if result.drivers_updated:
+        summary += f"; {result.drivers_updated} driver availability update{'s' if result.drivers_updated != 1 else ''}"
+    (messages.success if result.changed else messages.warning)(request, summary + ".")
+    return redirect('trip_list')
+
+
 @login_required
 def trip_delete(request, pk):
     """
@@ -326,14 +409,18 @@ def fuel_list(request):
     """
     List all fuel logs.
     """
-    fuel_logs = FuelLog.objects.select_related('vehicle').all()
-    total_cost = fuel_logs.aggregate(Sum('cost'))['cost__sum'] or 0
-    total_quantity = fuel_logs.aggregate(Sum('fuel_quantity'))['fuel_quantity__sum'] or 0
+    fuel_logs = paginate_request(request, FuelLog.objects.select_related('vehicle').all())
+    
+    # Totals for the whole table in a single aggregate query
+    totals = fuel_stats()
     
     context = {
         'fuel_logs': fuel_logs,
-        'total_cost': total_cost,
-        'total_quantity': total_quantity,
+        'page': fuel_logs,
+        'rows': render_rows('fuel_logs', fuel_logs),
+        'total_cost': totals['total_cost'],
+        'total_quantity': totals['total_quantity'],
+        'total_entries': totals['total_entries'],
     }
     return render(request, 'fuel/list.html', context)
 
@@ -399,15 +486,22 @@ def maintenance_list(request):
     List all maintenance logs.
     """
     maintenance_logs = MaintenanceLog.objects.select_related('vehicle').all()
-    total_cost = maintenance_logs.aggregate(Sum('cost'))['cost__sum'] or 0
+    
+    # Totals for the whole table in a single aggregate query
+    totals = maintenance_stats()
     
     # Get upcoming maintenance
     today = timezone.now().date()
     upcoming = maintenance_logs.filter(next_due_date__gte=today).order_by('next_due_date')[:5]
     
+    page = paginate_request(request, maintenance_logs)
+    
     context = {
-        'maintenance_logs': maintenance_logs,
-        'total_cost': total_cost,
+        'maintenance_logs': page,
+        'page': page,
+        'rows': render_rows('maintenance_logs', page),
+        'total_cost': totals['total_cost'],
+        'total_entries': totals['total_entries'],
         'upcoming': upcoming,
     }
     return render(request, 'maintenance/list.html', context)
@@ -468,73 +562,550 @@ def maintenance_delete(request, pk):
 # REPORTS VIEW
 # ============================================================
 
+REPORTS_MODELS = [Vehicle, Driver, Trip, FuelLog, MaintenanceLog]
+
+
+async def _reports_context(start_month, end_month):
+    """
+    Build the reports context. The independent query groups run
+    concurrently and querysets are evaluated so the result can be cached.
+    """
+    results = await gather_queries({
+        # Per-model statistics, one aggregate query each
+        'vehicle_stats': vehicle_stats,
+        'driver_stats': driver_stats,
+        'trip_stats': trip_stats,
+        'fuel_stats': fuel_stats,
+        'maintenance_stats': maintenance_stats,
+        # Monthly fuel and maintenance costs, read from the rollup table
+        'monthly_costs': lambda: monthly_trends(start_month, end_month),
+        # Fuel efficiency, precomputed per vehicle; costliest vehicles first
+        'efficiency': lambda: fuel_efficiency(limit=10),
+        # Recent vehicles
+        'recent_vehicles': lambda: list(Vehicle.objects.order_by('-created_at')[:5]),
+        # Recent trips
+        'recent_trips': lambda: list(Trip.objects.select_related('vehicle', 'driver').order_by('-created_at')[:5]),
+    })
+    efficiency = results.pop('efficiency')
+    
+    return {
+        **results,
+        'fleet_efficiency': efficiency['fleet'],
+        'vehicle_efficiency': efficiency['vehicles'],
+    }
+
+
 @login_required
-def reports(request):
+@replica_reads
+async def reports(request):
     """
     Reports view showing analytics and statistics.
     """
-    # Vehicle statistics
-    vehicle_stats = {
-        'total': Vehicle.objects.count(),
-        'active': Vehicle.objects.filter(status='active').count(),
-        'inactive': Vehicle.objects.filter(status='inactive').count(),
-        'maintenance': Vehicle.objects.filter(status='maintenance').count(),
-    }
+    # Month range for the cost trends (defaults to the last 6 months)
+    range_form = ReportRangeForm(request.GET or None)
+    today = timezone.now().date()
+    start_month = (today.replace(day=1) - timedelta(days=150)).replace(day=1)
+    end_month = today.replace(day=1)
+    if range_form.is_valid():
+        start_month = range_form.cleaned_data['start_month'] or start_month
+        end_month = range_form.cleaned_data['end_month'] or end_month
     
-    # Driver statistics
-    driver_stats = {
-        'total': Driver.objects.count(),
-        'available': Driver.objects.filter(is_available=True).count(),
-        'assigned': Driver.objects.filter(is_available=False).count(),
+    context = await acached_context(
+        'reports', REPORTS_MODELS, lambda: _reports_context(start_month, end_month),
+        extra=f'{start_month:%Y%m}-{end_month:%Y%m}',
+    )
+    context = {**context, 'range_form': range_form, 'start_month': start_month, 'end_month': end_month}
+    return await _arender(request, 'reports.html', context)
+
+
+# ============================================================
+# SEARCH VIEW
+# ============================================================
+
+@login_required
+def search(request):
+    """
+    Ranked prefix search over trip locations/notes and maintenance descriptions.
+    """
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'trips': full_text_search('trips', query) if query else [],
+        'maintenance_logs': full_text_search('maintenance', query) if query else [],
     }
+    return render(request, 'search.html', context)
+
+
+# ============================================================
+# EXPORT VIEWS
+# ============================================================
+
+def _export(request, name):
+    """
+    Stream an export as CSV (default) or NDJSON.
+    Accepts ?format=, ?start_date=, ?end_date= and ?vehicle= filters.
+    """
+    form = ExportFilterForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
     
-    # Trip statistics
-    trip_stats = {
-        'total': Trip.objects.count(),
-        'pending': Trip.objects.filter(status='pending').count(),
-        'in_progress': Trip.objects.filter(status='in_progress').count(),
-        'completed': Trip.objects.filter(status='completed').count(),
-        'cancelled': Trip.objects.filter(status='cancelled').count(),
-        'total_distance': Trip.objects.aggregate(Sum('distance'))['distance__sum'] or 0,
-    }
+    queryset = export_queryset(
+        name,
+        start_date=form.cleaned_data['start_date'],
+        end_date=form.cleaned_data['end_date'],
+        vehicle=form.cleaned_data['vehicle'],
+    )
+    # The rows are streamed after the view returns, so choose the
+    # database (the replica, when configured) while still inside it
+    queryset = queryset.using(queryset.db)
+    return export_response(name, form.cleaned_data['format'] or 'csv', queryset)
+
+
+@login_required
+@replica_reads
+def trip_export(request):
+    """
+    Export trips.
+    """
+    return _export(request, 'trips')
+
+
+@login_required
+@replica_reads
+def fuel_export(request):
+    """
+    Export fuel logs.
+    """
+    return _export(request, 'fuel_logs')
+
+
+@login_required
+@replica_reads
+def maintenance_export(request):
+    """
+    Export maintenance logs.
+    """
+    return _export(request, 'maintenance_logs')
+
+
+@login_required
+def export_job(request, name):
+    """
+    Queue an export (POST, same filters as the streaming export) to be
+    written to a file in the background.
+    """
+    if name not in EXPORTS:
+        raise Http404("Unknown export")
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
     
-    # Fuel statistics
-    fuel_stats = {
-        'total_entries': FuelLog.objects.count(),
-        'total_cost': FuelLog.objects.aggregate(Sum('cost'))['cost__sum'] or 0,
-        'total_quantity': FuelLog.objects.aggregate(Sum('fuel_quantity'))['fuel_quantity__sum'] or 0,
-    }
+    form = ExportFilterForm(request.POST)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
     
-    # Maintenance statistics
-    maintenance_stats = {
-        'total_entries': MaintenanceLog.objects.count(),
-        'total_cost': MaintenanceLog.objects.aggregate(Sum('cost'))['cost__sum'] or 0,
+    data = form.cleaned_data
+    job = enqueue('export', {
+        'name': name,
+        'title': str(EXPORTS[name][0]._meta.verbose_name_plural),
+        'format': data['format'] or 'csv',
+        'start_date': data['start_date'].isoformat() if data['start_date'] else None,
+        'end_date': data['end_date'].isoformat() if data['end_date'] else None,
+        'vehicle': data['vehicle'],
+    }, user=request.user)
+    return _job_response(request, job)
+
+
+# ============================================================
+# IMPORT VIEWS
+# ============================================================
+
+def _import(request, kind, title, list_url):
+    """
+    Upload a CSV file and show the per-row import report.
+    """
+    result = None
+    if request.method == 'POST':
+        form = ImportFileForm(request.POST, request.FILES)
+        if form.is_valid() and form.cleaned_data['background']:
+            filename = f"upload-{uuid.uuid4().hex}.csv"
+            with open(os.path.join(files_dir(), filename), 'wb') as handle:
+                for chunk in request.FILES['file'].chunks():
+                    handle.write(chunk)
+            job = enqueue('import', {'kind': kind, 'file': filename, 'title': title}, user=request.user)
+            return _job_response(request, job)
+        if form.is_valid():
+            result = import_csv(kind, request.FILES['file'])
+            if result.created:
+                messages.success(request, f"{result.created} {title.lower()} imported successfully!")
+            if result.failed:
+                messages.warning(request, f"{result.failed} row(s) were rejected. See the report below.")
+    else:
+        form = ImportFileForm()
+    
+    context = {
+        'form': form,
+        'result': result,
+        'title': title,
+        'columns': IMPORT_COLUMNS[kind],
+        'list_url': list_url,
+    }
+    return render(request, 'import.html', context)
+
+
+@login_required
+def trip_import(request):
+    """
+    Import trips from a CSV file.
+    """
+    return _import(request, 'trips', 'Trips', 'trip_list')
+
+
+@login_required
+def fuel_import(request):
+    """
+    Import fuel logs from a CSV file.
+    """
+    return _import(request, 'fuel', 'Fuel Logs', 'fuel_list')
+
+
+# ============================================================
+# BACKGROUND JOB VIEWS
+# ============================================================
+
+def _job_response(request, job):
+    """
+    202 with the job id and status URL for JSON clients, otherwise a
+    redirect to the job page.
+    """
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({
+            'id': job.pk,
+            'status': job.status,
+            'url': reverse('api_job', args=[job.pk]),
+        }, status=202)
+    messages.info(request, f"Job #{job.pk} queued; this page updates as it runs.")
+    return redirect('job_detail', pk=job.pk)
+
+
+def _user_job(request, pk):
+    """
+    The job, if the user started it (staff see every job).
+    """
+    job = get_object_or_404(Job, pk=pk)
+    if job.created_by_id != request.user.pk and not request.user.is_staff:
+        raise Http404("No such job")
+    return job
+
+
+def _job_json(job):
+    result = job.result or {}
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'progress': {
+            'done': job.progress_done,
+            'total': job.progress_total,
+            'percent': job.percent,
+            'message': job.progress_message,
+        },
+        'result': job.result,
+        'error': job.error_summary or None,
+        'download': reverse('job_download', args=[job.pk]) if job.status == 'succeeded' and 'file' in result else None,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
     }
+
+
+@login_required
+def job_detail(request, pk):
+    """
+    Job status page; polls the job API until the job has finished.
+    """
+    job = _user_job(request, pk)
+    return render(request, 'jobs/detail.html', {'job': job})
+
+
+@login_required
+def job_download(request, pk):
+    """
+    Download the file written by a finished export job.
+    """
+    job = _user_job(request, pk)
+    result = job.result or {}
+    if job.status != 'succeeded' or 'file' not in result:
+        raise Http404("This job has no file")
+    path = os.path.join(files_dir(), os.path.basename(result['file']))
+    if not os.path.exists(path):
+        raise Http404("The job's file has been removed")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=result['file'], content_type=result.get('content_type'))
+
+
+@staff_member_required
+def rebuild_job(request):
+    """
+    Queue a recomputation of the derived tables (POST; optional
+    targets= per REBUILD_TARGETS entry, default all).
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    targets = request.POST.getlist('targets')
+    unknown = [target for target in targets if target not in REBUILD_TARGETS]
+    if unknown:
+        return HttpResponseBadRequest(f"Unknown targets: {', '.join(unknown)}")
+    return _job_response(request, enqueue('rebuild', {'targets': targets}, user=request.user))
+
+
+# ============================================================
+# JSON API
+# ============================================================
+
+@login_required
+def api_job(request, pk):
+    """
+    Status, progress and result of a background job.
+    """
+    return JsonResponse(_job_json(_user_job(request, pk)))
+
+
+def _conditional_json(request, resource, build):
+    """
+    Answer 304 Not Modified when the client's ETag still matches the
+    resource's version and the request parameters; otherwise return
+    ``build()``.  Successful responses carry the ETag and must be
+    revalidated before reuse.  There is no Last-Modified: the newest
+    timestamp of a filtered set would cost the query the ETag avoids.
+    """
+    etag = quote_etag(list_etag(resource, request.path, request.GET))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build()
+    if response.status_code in (200, 304):
+        response.headers['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+@replica_reads
+def api_list(request, resource):
+    """
+    Read-only JSON listing of one resource with filtering and cursor
+    pagination (?after=, ?before=, ?limit=).  An unchanged poll is
+    answered with 304 Not Modified without querying the table.
+    """
+    if resource not in RESOURCES:
+        raise Http404("Unknown API resource")
     
-    # Monthly fuel costs (last 6 months)
-    from django.db.models.functions import TruncMonth
-    monthly_fuel = FuelLog.objects.annotate(
-        month=TruncMonth('date')
-    ).values('month').annotate(
-        total_cost=Sum('cost'),
-        total_quantity=Sum('fuel_quantity')
-    ).order_by('-month')[:6]
+    try:
+        queryset = filter_queryset(resource, request.GET)
+        limit = min(max(int(request.GET.get('limit', settings.FLEETFLOW_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValidationError as exc:
+        return JsonResponse({'errors': exc.message_dict}, status=400)
+    except ValueError:
+        return JsonResponse({'errors': {'limit': ["Enter a whole number."]}}, status=400)
     
-    # Recent vehicles
-    recent_vehicles = Vehicle.objects.order_by('-created_at')[:5]
+    def build():
+        try:
+            page = paginate(queryset, after=request.GET.get('after'), before=request.GET.get('before'), page_size=limit)
+        except InvalidCursor as exc:
+            return JsonResponse({'errors': {'cursor': [str(exc)]}}, status=400)
+        return JsonResponse({
+            'results': [serialize(resource, obj) for obj in page],
+            'next': page.next_cursor if page.has_next else None,
+            'previous': page.previous_cursor if page.has_previous else None,
+        })
     
-    # Recent trips
-    recent_trips = Trip.objects.select_related('vehicle', 'driver').order_by('-created_at')[:5]
+    return _conditional_json(request, resource, build)
+
+
+@login_required
+@replica_reads
+def api_fuel_efficiency(request):
+    """
+    Fuel efficiency (km/L, cost per km, rolling km/L) per vehicle and for
+    the fleet, optionally for one ?vehicle=.
+    """
+    vehicle = request.GET.get('vehicle') or None
+    try:
+        # Validates ?vehicle=
+        filter_queryset('fuel_logs', {'vehicle': vehicle})
+    except ValidationError as exc:
+        return JsonResponse({'errors': exc.message_dict}, status=400)
     
-    context = {
-        'vehicle_stats': vehicle_stats,
-        'driver_stats': driver_stats,
-        'trip_stats': trip_stats,
-        'fuel_stats': fuel_stats,
-        'maintenance_stats': maintenance_stats,
-        'monthly_fuel': monthly_fuel,
-        'recent_vehicles': recent_vehicles,
-        'recent_trips': recent_trips,
-    }
+    return _conditional_json(request, 'fuel_logs', lambda: JsonResponse(fuel_efficiency(vehicle=vehicle)))
+
+
+@login_required
+def api_autocomplete(request, source):
+    """
+    Prefix search for the vehicle and driver pickers: ?q= (any case) and
+    ?page= (1-based, at most MAX_PAGE), answered as
+    {"results": [{"id", "text"}], "more"}.
+    """
+    if source not in AUTOCOMPLETE_SOURCES:
+        raise Http404("Unknown autocomplete source")
+    
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 0
+    if not 1 <= page <= MAX_PAGE:
+        return JsonResponse({'errors': {'page': [f"Enter a whole number from 1 to {MAX_PAGE}."]}}, status=400)
+    
+    objects, more = autocomplete(source, request.GET.get('q', ''), page=page)
+    return JsonResponse({
+        'results': [{'id': obj.pk, 'text': str(obj)} for obj in objects],
+        'more': more,
+    })
+
+
+@login_required
+def api_route_distance(request):
+    """
+    Usual distance in km of the ?start= to ?end= route, or null.
+    """
+    distance = route_service().distance(request.GET.get('start', ''), request.GET.get('end', ''))
+    return JsonResponse({'distance': str(distance) if distance is not None else None})
+
+
+@csrf_exempt
+def api_telemetry(request):
+    """
+    Tracker uplink: POST a JSON array (or {"pings": [...]}) or NDJSON of
+    {vehicle, timestamp, lat, lon, speed?, heading?} pings with an
+    "Authorization: Bearer <token>" from FLEETFLOW_TELEMETRY_TOKENS.
+    Answers with how many pings were stored and why the others were not.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'errors': {'__all__': ["POST required."]}}, status=405)
+    
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not any(
+        hmac.compare_digest(token.encode(), allowed.encode()) for allowed in settings.FLEETFLOW_TELEMETRY_TOKENS
+    ):
+        return JsonResponse({'errors': {'__all__': ["Invalid telemetry token."]}}, status=401)
+    
+    # Read past DATA_UPLOAD_MAX_MEMORY_SIZE, up to MAX_REQUEST_BYTES
+    body = request.read(MAX_REQUEST_BYTES + 1)
+    if len(body) > MAX_REQUEST_BYTES:
+        return JsonResponse({'errors': {'__all__': [f"At most {MAX_REQUEST_BYTES} bytes per request."]}}, status=413)
+    try:
+        pings = parse_payload(body, request.content_type)
+    except ValueError as exc:
+        return JsonResponse({'errors': {'__all__': [f"Invalid payload: {exc}"]}}, status=400)
+    if len(pings) > MAX_PINGS_PER_REQUEST:
+        return JsonResponse({'errors': {'__all__': [f"At most {MAX_PINGS_PER_REQUEST} pings per request."]}}, status=413)
+    
+    result = ingest(pings)
+    return JsonResponse({
+        'accepted': result.accepted,
+        'rejected': result.rejected,
+        'errors': result.errors,
+    })
+
+
+@login_required
+def api_vehicle_positions(request):
+    """
+    Newest telemetry position of every vehicle, or of one ?vehicle=.
+    """
+    try:
+        vehicle = int(request.GET['vehicle']) if request.GET.get('vehicle') else None
+    except ValueError:
+        return JsonResponse({'errors': {'vehicle': ["Enter a whole number."]}}, status=400)
+    
+    return JsonResponse({
+        'results': [
+            {
+                'vehicle': position.vehicle_id,
+                'vehicle_number': position.vehicle.vehicle_number,
+                'trip': position.trip_id,
+                'recorded_at': position.recorded_at,
+                'lat': position.latitude,
+                'lon': position.longitude,
+                'speed': position.speed,
+                'heading': position.heading,
+            }
+            for position in latest_positions(vehicle)
+        ],
+    })
+
+
+@login_required
+def api_availability(request):
+    """
+    Drivers and vehicles free for the whole of ?start= to ?end= (ISO
+    datetimes; without end, from start onwards).
+    """
+    form = AvailabilityForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    
+    start, end = form.cleaned_data['start'], form.cleaned_data['end']
+    drivers = free_drivers(start, end).order_by('driver_name').values_list('id', 'driver_name')
+    vehicles = free_vehicles(start, end).order_by('vehicle_number').values_list('id', 'vehicle_number')
+    return JsonResponse({
+        'start': start,
+        'end': end,
+        'drivers': [{'id': pk, 'text': name} for pk, name in drivers],
+        'vehicles': [{'id': pk, 'text': number} for pk, number in vehicles],
+    })
+
+
+@login_required
+def api_trip_transition(request):
+    """
+    POST action= and one trips= per id; answers with how many trips
+    changed, the ids of those not started because they would be
+    double-booked, and how many drivers' availability followed.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'errors': {'__all__': ["POST required."]}}, status=405)
+    
+    form = TripTransitionForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    
+    result = transition_trips(form.cleaned_data['trips'], form.cleaned_data['action'])
+    return JsonResponse({
+        'action': result.action,
+        'requested': result.requested,
+        'changed': result.changed,
+        'skipped': result.skipped,
+        'clashing': sorted(result.clashing),
+        'drivers_updated': result.drivers_updated,
+    })
+
+
+# ============================================================
+# MONITORING
+# ============================================================
+
+@login_required
+def cache_metrics(request):
+    """
+    Page-cache hit/miss counters as JSON.
+    """
+    return JsonResponse(cache_stats())
+
+
+def metrics(request):
+    """
+    Per-view request metrics in Prometheus text format.
+    Only served to the addresses in FLEETFLOW_METRICS_ALLOWED_IPS.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.FLEETFLOW_METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
     
-    return render(request, 'reports.html', context)
+    page_cache = cache_stats()
+    text = prometheus_text({
+        'fleetflow_page_cache_hits': page_cache['hits'],
+        'fleetflow_page_cache_misses': page_cache['misses'],
+        'fleetflow_row_cache_hits': page_cache['row_hits'],
+        'fleetflow_row_cache_misses': page_cache['row_misses'],
+    })
+    return HttpResponse(text, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app1.assets.StaticAssetMiddleware',  # Serves collected static files before anything else runs
+    'app1.middleware.RequestMetricsMiddleware',  # Outermost of the rest, so it sees every query
+    'app1.routers.ReplicaRoutingMiddleware',  # Before sessions, so session saves count as writes
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,9 +82,136 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Web and run_workers processes write concurrently: take the write
+        # lock when a transaction starts (a deferred one that reads first
+        # fails at once with "database is locked") and wait up to 20s for it
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    },
+    # Read-only copy used by reports, exports and the JSON API.  Locally it
+    # is a second SQLite file refreshed by `manage.py sync_replica`; in
+    # production point it at a PostgreSQL streaming replica instead.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['app1.routers.ReplicaRouter']
+
+# Alias analytics reads go to.  Off (None, everything on 'default')
+# unless FLEETFLOW_REPLICA_ALIAS=replica is set in the environment, once
+# sync_replica runs on a schedule or a streaming replica is configured.
+FLEETFLOW_REPLICA_ALIAS = os.environ.get('FLEETFLOW_REPLICA_ALIAS') or None
+
+# Replica reads fall back to the primary when the replica's heartbeat
+# (stamped by sync_replica) is older than this many seconds
+FLEETFLOW_REPLICA_MAX_LAG_SECONDS = 60
+
+# After a request writes, that client reads from the primary for this
+# many seconds so it sees its own changes despite replication lag
+FLEETFLOW_REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache is per-process; when running several worker processes switch
+# to the file-based backend so they share cache versions, e.g.
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#   'LOCATION': BASE_DIR / 'cache',
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fleetflow',
     }
 }
 
+# Cache alias and lifetime (seconds) used for dashboard/reports contexts
+FLEETFLOW_CACHE_ALIAS = 'default'
+FLEETFLOW_CACHE_TIMEOUT = 300
+
+# Rows per page on the list views (keyset pagination)
+FLEETFLOW_PAGE_SIZE = 50
+
+# Worker threads (each with its own DB connection) that run the dashboard
+# and reports query groups concurrently; 1 runs them one after another.
+# Keep 1 on SQLite, where the threads bring no measurable win.
+FLEETFLOW_QUERY_THREADS = 1
+
+# Maintenance due within this many days raises a dashboard alert
+FLEETFLOW_MAINTENANCE_DUE_DAYS = 7
+
+
+# GPS telemetry
+# Bearer tokens trackers (or their gateway) send to POST /api/telemetry/,
+# and how many days of pings prune_telemetry keeps
+FLEETFLOW_TELEMETRY_TOKENS = []
+FLEETFLOW_TELEMETRY_RETENTION_DAYS = 90
+
+
+# Background jobs (manage.py run_workers)
+# Worker processes started by run_workers, how often an idle worker
+# polls the jobs table, and where job uploads and results are written
+FLEETFLOW_JOB_WORKERS = 2
+FLEETFLOW_JOB_POLL_SECONDS = 2
+FLEETFLOW_JOB_FILES_DIR = BASE_DIR / 'media' / 'jobs'
+
+
+# Request metrics
+# Maximum SQL queries per request, by url_name.  The session and user
+# lookups every logged-in page pays are included, so a budget of N leaves
+# N - 2 for the view itself.  Going over logs a warning, or raises when
+# FLEETFLOW_QUERY_BUDGET_STRICT is on (FLEETFLOW_QUERY_BUDGET_STRICT=1 in
+# the environment; the test runner always turns it on).
+FLEETFLOW_QUERY_BUDGETS = {
+    'dashboard': 7,
+    'reports': 12,
+    'vehicle_list': 4,
+    'driver_list': 4,
+    'trip_list': 4,
+    'fuel_list': 4,
+    'maintenance_list': 4,
+}
+FLEETFLOW_QUERY_BUDGET_STRICT = os.environ.get('FLEETFLOW_QUERY_BUDGET_STRICT') == '1'
+
+# Clients allowed to read /metrics
+FLEETFLOW_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+LOG_DIR = BASE_DIR / 'logs'
+LOG_DIR.mkdir(exist_ok=True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'request_log': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': LOG_DIR / 'requests.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'message',
+        },
+        'console': {
+            'class': 'logging.StreamHandler',
+            'level': 'WARNING',
+        },
+    },
+    'loggers': {
+        'app1.metrics': {
+            'handlers': ['request_log', 'console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -118,6 +249,18 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']  # Static files directory
+STATIC_ROOT = BASE_DIR / 'staticfiles'  # Filled by collectstatic
+
+# collectstatic stores content-hashed copies (cacheable forever) with .gz
+# and .br siblings; the test runner swaps in plain storage.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'app1.assets.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Media files (uploads)
 MEDIA_URL = '/media/'
@@ -132,3 +275,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 LOGIN_URL = 'login'
+
+# Test runner; applies the test-only settings (strict query budgets, no
+# replica, plain static storage)
+TEST_RUNNER = 'app1.test_runner.FleetFlowTestRunner'
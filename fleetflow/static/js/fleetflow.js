@@ -0,0 +1,182 @@
+/* ============================================================
+FleetFlow - Page Behaviour
+   ============================================================ */
+
+/* Dismissible alerts: the only Bootstrap JS component FleetFlow uses,
+   so it is handled here instead of loading the whole Bootstrap bundle. */
+document.addEventListener('click', function (event) {
+    var button = event.target.closest('[data-bs-dismiss="alert"]');
+    var alert = button && button.closest('.alert');
+    if (!alert) {
+        return;
+    }
+    var remove = function () {
+        alert.remove();
+    };
+    if (alert.classList.contains('fade')) {
+        alert.addEventListener('transitionend', remove, { once: true });
+        setTimeout(remove, 300);
+    } else {
+        remove();
+    }
+    alert.classList.remove('show');
+});
+
+/* Autocomplete pickers: selects rendered by AutocompleteSelect only carry
+   the current value, so a search box above each one fetches matching
+   options from the autocomplete endpoint as the user types. */
+var AUTOCOMPLETE_DELAY = 250;
+var MORE_VALUE = '__more__';
+
+function setupAutocomplete(select) {
+    var input = document.createElement('input');
+    input.type = 'search';
+    input.className = 'form-control form-control-sm mb-1';
+    input.placeholder = 'Type to search...';
+    input.setAttribute('aria-label', 'Search ' + (select.name || 'options'));
+    select.parentNode.insertBefore(input, select);
+
+    var timer = null;
+    var request = 0;
+    var page = 1;
+
+    function keepOption(option) {
+        return option.value === '' || option.selected;
+    }
+
+    function load(append) {
+        var current = ++request;
+        var url = select.dataset.autocompleteUrl + '?q=' + encodeURIComponent(input.value) + '&page=' + page;
+        fetch(url, { credentials: 'same-origin', headers: { 'Accept': 'application/json' } })
+            .then(function (response) {
+                return response.ok ? response.json() : null;
+            })
+            .then(function (data) {
+                if (!data || current !== request) {
+                    return;
+                }
+                Array.prototype.slice.call(select.options).forEach(function (option) {
+                    if (option.value === MORE_VALUE || !(append || keepOption(option))) {
+                        option.remove();
+                    }
+                });
+                var present = {};
+                Array.prototype.forEach.call(select.options, function (option) {
+                    present[option.value] = true;
+                });
+                data.results.forEach(function (item) {
+                    if (!present[String(item.id)]) {
+                        select.add(new Option(item.text, item.id));
+                    }
+                });
+                if (data.more) {
+                    select.add(new Option('More results...', MORE_VALUE));
+                }
+            })
+            .catch(function () {});
+    }
+
+    input.addEventListener('input', function () {
+        clearTimeout(timer);
+        timer = setTimeout(function () {
+            page = 1;
+            load(false);
+        }, AUTOCOMPLETE_DELAY);
+    });
+
+    var previous = select.value;
+    select.addEventListener('change', function () {
+        if (select.value === MORE_VALUE) {
+            select.value = previous;
+            page += 1;
+            load(true);
+        } else {
+            previous = select.value;
+        }
+    });
+
+    load(false);
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(setupAutocomplete);
+});
+
+/* Route distance: when both trip locations are filled in and the
+   distance is blank (or was filled in here), ask the route service for
+   the usual distance of that route. */
+function setupRouteDistance(distance) {
+    var form = distance.form;
+    var start = form.elements['start_location'];
+    var end = form.elements['end_location'];
+    if (!start || !end) {
+        return;
+    }
+    var filled = '';
+
+    function lookup() {
+        if (!start.value.trim() || !end.value.trim() || (distance.value && distance.value !== filled)) {
+            return;
+        }
+        var url = distance.dataset.routeDistanceUrl + '?start=' + encodeURIComponent(start.value) + '&end=' + encodeURIComponent(end.value);
+        fetch(url, { credentials: 'same-origin', headers: { 'Accept': 'application/json' } })
+            .then(function (response) {
+                return response.ok ? response.json() : null;
+            })
+            .then(function (data) {
+                if (data && data.distance && (!distance.value || distance.value === filled)) {
+                    distance.value = filled = data.distance;
+                }
+            })
+            .catch(function () {});
+    }
+
+    start.addEventListener('change', lookup);
+    end.addEventListener('change', lookup);
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('input[data-route-distance-url]').forEach(setupRouteDistance);
+});
+
+/* Background jobs: the job page polls the job API and reloads itself
+   (to show the result) once the job has finished. */
+var JOB_POLL_INTERVAL = 2000;
+
+function pollJob(card) {
+    var bar = card.querySelector('progress');
+    var message = card.querySelector('[data-job-message]');
+
+    function poll() {
+        fetch(card.dataset.jobUrl, { credentials: 'same-origin', headers: { 'Accept': 'application/json' } })
+            .then(function (response) {
+                return response.ok ? response.json() : null;
+            })
+            .then(function (data) {
+                if (!data) {
+                    return;
+                }
+                if (data.status === 'succeeded' || data.status === 'failed') {
+                    window.location.reload();
+                    return;
+                }
+                if (bar && data.progress.percent !== null) {
+                    bar.max = 100;
+                    bar.value = data.progress.percent;
+                }
+                if (message && data.progress.message) {
+                    message.textContent = data.progress.message;
+                }
+                setTimeout(poll, JOB_POLL_INTERVAL);
+            })
+            .catch(function () {
+                setTimeout(poll, JOB_POLL_INTERVAL);
+            });
+    }
+
+    setTimeout(poll, JOB_POLL_INTERVAL);
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-job-url]').forEach(pollJob);
+});